@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+
+from file_sorter import ScanFilter, categorize_file, file_extension, make_file_record, sniff_unknown_files
+from rule_engine import compile_rules
+from sort_journal import journaled_sort
+
+class AutoSorter:
+    """Sorts files reported by a DirectoryWatcher once they have finished writing.
+
+    Pass handle_changes as the watcher callback. Every added or modified
+    path is debounced: it is only looked at after settle_seconds without
+    new events, and it counts as finished once its size and mtime have
+    stayed the same for another settle_seconds. Finished files are
+    categorized with the scan filters and rules, moved in batches by the
+    same engine as a manual sort, under a write-ahead journal, and each batch
+    is logged for undo.
+    """
+
+    def __init__(self, destination_folder, filters, settle_seconds=3.0, categorize=None, log=None,
+                 on_sorted=None, workers_per_device=4):
+        """Set up the sorter; call start() before feeding it changes.
+
+        Args:
+            destination_folder (str): Folder that receives the category folders.
+            filters (dict): Same filters dict as file_sorter.scan_files.
+            settle_seconds (float): How long a file must stay unchanged.
+            categorize (callable): Optional hook called with each record that
+                returns its final category (e.g. smart sorting).
+            log (callable): Called with (message, level) for progress messages.
+            on_sorted (callable): Called with the moved_files list of each batch.
+            workers_per_device (int): Concurrent cross-device copies per device.
+        """
+        self.destination_folder = os.path.abspath(destination_folder)
+        self.scan_filter = ScanFilter(filters)
+        self.settle_seconds = settle_seconds
+        self.categorize = categorize
+        self.log = log or (lambda message, level="INFO": print(f"{level}: {message}"))
+        self.on_sorted = on_sorted
+        self.workers_per_device = workers_per_device
+        self.running = False
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def set_rules(self, rules):
+        """Categorize files with new rules from now on (e.g. after the rules file changed)."""
+        # One attribute assignment, so the settle thread sees the old or the new rules
+        self.scan_filter.rules = compile_rules(rules)
+
+    def start(self):
+        if self.running:
+            return False
+        self.running = True
+        self._thread = threading.Thread(target=self._settle_loop, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def handle_changes(self, changes):
+        """DirectoryWatcher callback: queue added and modified files for sorting."""
+        now = time.monotonic()
+        with self._condition:
+            for path in changes.get('added', []) + changes.get('modified', []):
+                # Files we moved into a destination inside the watched tree
+                if os.path.abspath(path).startswith(self.destination_folder + os.sep):
+                    continue
+                state = self._pending.get(path)
+                if state is None:
+                    self._pending[path] = {'last_event': now, 'signature': None, 'stable_since': now}
+                else:
+                    state['last_event'] = now
+            for path in changes.get('deleted', []):
+                self._pending.pop(path, None)
+            self._condition.notify()
+
+    def _settle_loop(self):
+        """Check pending files every half settle window; sleeps while nothing is pending."""
+        while self.running:
+            with self._condition:
+                while self.running and not self._pending:
+                    self._condition.wait()
+            if not self.running:
+                break
+
+            time.sleep(self.settle_seconds / 2)
+            settled = self._collect_settled()
+            if settled:
+                try:
+                    self._sort_batch(settled)
+                except Exception as e:
+                    self.log(f"Auto-sort failed: {e}", "ERROR")
+
+    def _collect_settled(self):
+        """Return the pending paths whose size and mtime have been stable long enough."""
+        now = time.monotonic()
+        with self._condition:
+            candidates = [
+                (path, state) for path, state in self._pending.items()
+                if now - state['last_event'] >= self.settle_seconds
+            ]
+
+        settled = []
+        for path, state in candidates:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Gone or renamed; a new event will bring the new name back
+                with self._condition:
+                    self._pending.pop(path, None)
+                continue
+
+            signature = (stat.st_size, stat.st_mtime_ns)
+            with self._condition:
+                if self._pending.get(path) is not state or state['last_event'] > now:
+                    continue
+                if signature != state['signature']:
+                    state['signature'] = signature
+                    state['stable_since'] = now
+                elif now - state['stable_since'] >= self.settle_seconds:
+                    del self._pending[path]
+                    settled.append((path, stat))
+        return settled
+
+    def _sort_batch(self, settled):
+        """Categorize settled files and move them with the shared move engine."""
+        records = []
+        for path, stat in settled:
+            filename = os.path.basename(path)
+            if self.scan_filter.is_excluded(filename):
+                continue
+            if not self.scan_filter.accepts(stat.st_size, stat.st_mtime):
+                continue
+            file_ext = file_extension(filename).lower()
+            category = categorize_file(filename, file_ext, self.scan_filter.rules)
+            records.append(make_file_record(filename, path, file_ext, stat.st_size, stat.st_mtime, category))
+
+        if not records:
+            return
+
+        if self.scan_filter.sniff_content:
+            sniff_unknown_files(records)
+        if self.categorize:
+            for record in records:
+                record['category'] = self.categorize(record)
+
+        def report_errors(failures):
+            for record, e in failures:
+                self.log(f"Failed to auto-sort {record['name']}: {e}", "ERROR")
+
+        moved_files = journaled_sort(
+            records, self.destination_folder,
+            on_error=report_errors,
+            workers_per_device=self.workers_per_device
+        )
+        if moved_files:
+            self.log(f"Auto-sorted {len(moved_files)} new files", "SUCCESS")
+            if self.on_sorted:
+                self.on_sorted(moved_files)
@@ -0,0 +1,4 @@
+"""Benchmarks for the scan, categorize, move, undo and watcher hot paths.
+
+Run everything with ``python -m benchmarks``; see benchmarks/__main__.py.
+"""
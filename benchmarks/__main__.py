@@ -0,0 +1,188 @@
+"""Time the hot paths on a generated tree and save the results as JSON.
+
+Covers scanning, rule and smart categorization, the watcher's rescan and
+diff, moving files into categories and undoing that sort. Each benchmark
+runs --repeat times and the best time is kept. Pass --compare with an
+earlier results file to print the change for every benchmark.
+
+Usage:
+    python -m benchmarks [--files N] [--depth N] [--fanout N] [--seed N]
+                         [--extensions .jpg=20,.pdf=5,...] [--sizes W:MIN:MAX,...]
+                         [--keywords a,b,...] [--keyword-ratio F] [--repeat N]
+                         [--workers N] [--output FILE] [--compare FILE]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.tree_generator import DEFAULT_EXTENSIONS, DEFAULT_KEYWORDS, DEFAULT_SIZES, generate_tree
+
+import file_sorter
+import move_engine
+import smart_sorting
+import undo_manager
+from directory_watcher import DirectoryWatcher
+
+FILTERS = {'excluded_extensions': ['.tmp', '.log', '.cache'], 'rules': {}}
+
+def timed(function, repeat, setup=None):
+    """Best wall time of repeat runs; setup (untimed) runs before each one."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def run_benchmarks(source, destination, repeat, workers):
+    results = {}
+
+    def record(name, seconds, items):
+        results[name] = {
+            'seconds': round(seconds, 6),
+            'items': items,
+            'items_per_second': round(items / seconds) if seconds else None,
+        }
+        print(f"{name:<24} {seconds * 1000:>10.1f} ms  {items:>9} items")
+
+    seconds, records = timed(lambda: file_sorter.scan_files(source, True, FILTERS), repeat)
+    record('scan', seconds, len(records))
+    if workers > 1:
+        seconds, _ = timed(lambda: file_sorter.scan_files(source, True, FILTERS, workers=workers), repeat)
+        record(f'scan_{workers}_threads', seconds, len(records))
+
+    names = [(f['name'], file_sorter.file_extension(f['name']).lower()) for f in records]
+    rules = file_sorter.compile_rules({'.pdf': 'Documents', 'screenshot*': 'Screenshots', '.py': 'Code'})
+    seconds, _ = timed(lambda: [file_sorter.categorize_file(name, ext, rules) for name, ext in names], repeat)
+    record('categorize', seconds, len(names))
+
+    seconds, _ = timed(lambda: smart_sorting.smart_categorize_batch(records), repeat)
+    record('smart_categorize', seconds, len(records))
+
+    watcher = DirectoryWatcher(source, backend='poll')
+    watcher.last_scan = watcher._scan_directory()
+    changed = records[::100]
+
+    def touch_some():
+        for f in changed:
+            os.utime(f['path'])
+
+    def rescan_and_diff():
+        return watcher._detect_changes(watcher._scan_directory())
+
+    seconds, _ = timed(rescan_and_diff, repeat, setup=touch_some)
+    record('watcher_diff', seconds, len(records))
+
+    # Move and undo alternate so every run starts from the same tree
+    move_times = []
+    undo_times = []
+    for _ in range(repeat):
+        # Keep the per-folder messages of the undo log out of the results table
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            moved = move_engine.sort_files(records, destination)
+            move_times.append(time.perf_counter() - start)
+            undo_manager.log_sort_operation(moved)
+
+            start = time.perf_counter()
+            success, message = undo_manager.undo_last_sort()
+            undo_times.append(time.perf_counter() - start)
+        if not success:
+            print(f"WARNING: undo reported failures: {message.splitlines()[0]}")
+    record('move', min(move_times), len(records))
+    record('undo', min(undo_times), len(records))
+
+    return results
+
+def compare(results, previous_path):
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = json.load(f)['results']
+    print(f"\nCompared with {previous_path}:")
+    for name, result in results.items():
+        before = previous.get(name)
+        if not before or not before['seconds']:
+            continue
+        change = (result['seconds'] - before['seconds']) / before['seconds'] * 100
+        print(f"{name:<24} {before['seconds'] * 1000:>10.1f} ms -> {result['seconds'] * 1000:>10.1f} ms"
+              f"  ({change:+.1f}%)")
+
+def _parse_extensions(text):
+    extensions = {}
+    for item in text.split(','):
+        ext, _, weight = item.partition('=')
+        extensions[ext.strip()] = float(weight or 1)
+    return extensions
+
+def _parse_sizes(text):
+    return [tuple(int(float(part)) for part in item.split(':')) for item in text.split(',')]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fanout', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--extensions', type=_parse_extensions, default=None,
+                        help="Extension weights, e.g. .jpg=20,.pdf=5,=1 (empty = no extension)")
+    parser.add_argument('--sizes', type=_parse_sizes, default=None,
+                        help="Size buckets as weight:min:max in bytes, comma separated")
+    parser.add_argument('--keywords', default=None, help="Comma-separated name keywords")
+    parser.add_argument('--keyword-ratio', type=float, default=0.2)
+    parser.add_argument('--dense', action='store_true', help="Write every byte instead of sparse files")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=0, help="Also time a parallel scan with this many threads")
+    parser.add_argument('--output', default=None, help="Results file (default: bench_results_<time>.json)")
+    parser.add_argument('--compare', default=None, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    work_root = tempfile.mkdtemp(prefix="sfs_bench_")
+    source = os.path.join(work_root, "source")
+    destination = os.path.join(work_root, "sorted")
+    output = os.path.abspath(args.output or f"bench_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    previous_dir = os.getcwd()
+    try:
+        start = time.perf_counter()
+        tree = generate_tree(
+            source, files=args.files, depth=args.depth, fanout=args.fanout,
+            extensions=args.extensions or DEFAULT_EXTENSIONS, sizes=args.sizes or DEFAULT_SIZES,
+            keywords=args.keywords.split(',') if args.keywords is not None else DEFAULT_KEYWORDS,
+            keyword_ratio=args.keyword_ratio, seed=args.seed, sparse=not args.dense
+        )
+        print(f"Generated {tree['files']} files in {tree['dirs']} folders "
+              f"({tree['total_bytes'] / 1024 ** 3:.1f} GB apparent) in {time.perf_counter() - start:.1f} s")
+
+        # The undo benchmark writes its journal to the working directory
+        os.chdir(work_root)
+        results = run_benchmarks(source, destination, args.repeat, args.workers)
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'tree': tree,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Compare the os.scandir scanner in file_sorter against the old os.walk path.
+
+Builds a throwaway tree (or uses --path), runs both implementations and
+prints wall time and the number of directory reads and stat calls each one
+issued. Stat calls are counted at the Python level by wrapping os.stat,
+os.lstat and os.scandir; a DirEntry only counts once, as its result is cached.
+
+Usage:
+    python benchmarks/bench_scan.py [--files N] [--dirs N] [--path DIR] [--repeat N] [--workers N]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_sorter  # noqa: E402
+
+EXTENSIONS = ['.jpg', '.png', '.mp4', '.mp3', '.pdf', '.docx', '.zip', '.py', '.tmp', '.log', '']
+
+
+def legacy_scan_files(source_path, recursive, filters):
+    """The os.walk based scan_files as it was before the scandir engine."""
+    valid_files = []
+    excluded_extensions = filters.get('excluded_extensions', [])
+    min_size = filters.get('min_size', 0)
+    max_size = filters.get('max_size', float('inf'))
+    cutoff_date = filters.get('cutoff_date', None)
+    rules = filters.get('rules', {})
+
+    for dirpath, dirnames, filenames in os.walk(source_path):
+        for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            try:
+                file_size = os.path.getsize(file_path)
+                file_mtime = os.path.getmtime(file_path)
+                file_ext = Path(filename).suffix.lower()
+
+                if any(filename.lower().endswith(ext.lower()) for ext in excluded_extensions):
+                    continue
+                if not (min_size <= file_size <= max_size):
+                    continue
+                if cutoff_date and file_mtime > time.mktime(cutoff_date.timetuple()):
+                    continue
+
+                category = file_sorter.categorize_file(filename, file_ext, rules)
+                valid_files.append({
+                    'name': filename,
+                    'type': file_ext or 'No Extension',
+                    'size': file_sorter.format_file_size(file_size),
+                    'size_bytes': file_size,
+                    'category': category,
+                    'path': file_path,
+                    'modified': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(file_mtime))
+                })
+            except (OSError, IOError) as e:
+                print(f"Error processing {file_path}: {e}")
+                continue
+
+        if not recursive:
+            break
+
+    return valid_files
+
+
+class SyscallCounter:
+    """Counts directory reads and stat calls made through the os module."""
+
+    def __init__(self):
+        self.counts = {'scandir': 0, 'stat': 0}
+        self._originals = {}
+
+    def __enter__(self):
+        counter = self
+        self._originals = {'stat': os.stat, 'lstat': os.lstat, 'scandir': os.scandir}
+        real_stat, real_lstat, real_scandir = os.stat, os.lstat, os.scandir
+
+        def counting_stat(*args, **kwargs):
+            counter.counts['stat'] += 1
+            return real_stat(*args, **kwargs)
+
+        def counting_lstat(*args, **kwargs):
+            counter.counts['stat'] += 1
+            return real_lstat(*args, **kwargs)
+
+        def counting_scandir(*args, **kwargs):
+            counter.counts['scandir'] += 1
+            return _CountingScandir(real_scandir(*args, **kwargs), counter)
+
+        os.stat, os.lstat, os.scandir = counting_stat, counting_lstat, counting_scandir
+        return self
+
+    def __exit__(self, *exc):
+        os.stat = self._originals['stat']
+        os.lstat = self._originals['lstat']
+        os.scandir = self._originals['scandir']
+        return False
+
+
+class _CountingScandir:
+    def __init__(self, iterator, counter):
+        self._iterator = iterator
+        self._counter = counter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __iter__(self):
+        for entry in self._iterator:
+            yield _CountingEntry(entry, self._counter)
+
+    def __next__(self):
+        return _CountingEntry(next(self._iterator), self._counter)
+
+    def close(self):
+        self._iterator.close()
+
+
+class _CountingEntry:
+    def __init__(self, entry, counter):
+        self._entry = entry
+        self._counter = counter
+        self._statted = set()
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self, *, follow_symlinks=True):
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, *, follow_symlinks=True):
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self):
+        return self._entry.is_symlink()
+
+    def inode(self):
+        return self._entry.inode()
+
+    def stat(self, *, follow_symlinks=True):
+        if follow_symlinks not in self._statted:
+            self._statted.add(follow_symlinks)
+            self._counter.counts['stat'] += 1
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+    def __fspath__(self):
+        return self.path
+
+
+def build_tree(root, total_files, total_dirs):
+    """Create total_files small files spread over total_dirs nested folders."""
+    dirs = [root]
+    for i in range(total_dirs):
+        parent = dirs[i // 4]
+        path = os.path.join(parent, f"dir_{i}")
+        os.makedirs(path, exist_ok=True)
+        dirs.append(path)
+
+    for i in range(total_files):
+        ext = EXTENSIONS[i % len(EXTENSIONS)]
+        with open(os.path.join(dirs[i % len(dirs)], f"file_{i}{ext}"), 'wb') as f:
+            f.write(b'x' * (i % 512))
+
+
+def run(label, scan, source_path, filters, repeat):
+    best = float('inf')
+    with SyscallCounter() as counter:
+        records = scan(source_path, True, filters)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scan(source_path, True, filters)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<10} files={len(records):<8} scandir={counter.counts['scandir']:<8} "
+          f"stat={counter.counts['stat']:<8} best={best * 1000:.1f} ms")
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--dirs', type=int, default=200)
+    parser.add_argument('--path', help="Scan an existing folder instead of a generated one")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Also time the parallel walker with this many threads")
+    args = parser.parse_args()
+
+    filters = {'excluded_extensions': ['.tmp', '.log', '.cache'], 'rules': {}}
+    tmp_root = None
+    source_path = args.path
+    if source_path is None:
+        tmp_root = tempfile.mkdtemp(prefix="sfs_bench_")
+        source_path = tmp_root
+        build_tree(source_path, args.files, args.dirs)
+
+    try:
+        legacy = run("os.walk", legacy_scan_files, source_path, filters, args.repeat)
+        current = run("scandir", file_sorter.scan_files, source_path, filters, args.repeat)
+        if legacy != current:
+            print("WARNING: scan results differ between implementations")
+        if args.workers > 1:
+            def parallel_scan(path, recursive, scan_filters):
+                return file_sorter.scan_files(path, recursive, scan_filters, workers=args.workers)
+            parallel = run(f"{args.workers} threads", parallel_scan, source_path, filters, args.repeat)
+            if parallel != current:
+                print("WARNING: parallel scan results differ from the serial scan")
+    finally:
+        if tmp_root:
+            shutil.rmtree(tmp_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Reproducible synthetic file trees for the benchmarks.
+
+The same arguments and seed always produce the same names, folders and
+sizes. Files are created sparse (a few real header bytes, then truncated to
+their full size), so a tree that claims many gigabytes takes almost no disk
+space or time to build.
+"""
+import os
+import random
+
+# Extension -> relative weight
+DEFAULT_EXTENSIONS = {
+    '.jpg': 20, '.png': 8, '.gif': 2, '.mp4': 5, '.mkv': 2, '.mp3': 6, '.flac': 1,
+    '.pdf': 12, '.docx': 6, '.xlsx': 3, '.txt': 8, '.zip': 4, '.7z': 1,
+    '.py': 5, '.js': 4, '.html': 2, '.tmp': 2, '.log': 2, '.bin': 2, '': 5,
+}
+
+# (weight, min bytes, max bytes)
+DEFAULT_SIZES = [
+    (70, 0, 64 * 1024),
+    (25, 64 * 1024, 8 * 1024 * 1024),
+    (5, 8 * 1024 * 1024, 512 * 1024 * 1024),
+]
+
+# Words that smart sorting recognizes, mixed into some of the names
+DEFAULT_KEYWORDS = ['project', 'screenshot', 'download', 'invoice', 'resume', 'vacation', 'report', 'thesis']
+
+# Start of each generated file, so content sniffing and hashing see real bytes
+_HEADERS = {
+    '.jpg': b'\xff\xd8\xff\xe0', '.png': b'\x89PNG\r\n\x1a\n', '.gif': b'GIF89a', '.pdf': b'%PDF-1.7\n',
+    '.zip': b'PK\x03\x04', '.docx': b'PK\x03\x04', '.xlsx': b'PK\x03\x04', '.mp3': b'ID3',
+    '.flac': b'fLaC', '.7z': b"7z\xbc\xaf'\x1c", '.mkv': b'\x1aE\xdf\xa3',
+    '.mp4': b'\x00\x00\x00\x18ftypisom', '.bin': b'%PDF-1.4\n',
+}
+
+def generate_tree(root, files=10000, depth=3, fanout=4, extensions=None, sizes=None, keywords=None,
+                  keyword_ratio=0.2, dated_ratio=0.05, seed=0, sparse=True):
+    """Create a synthetic tree under root and describe what was made.
+
+    Args:
+        root (str): Folder to fill; created if missing.
+        files (int): Number of files.
+        depth (int): Levels of folders below root.
+        fanout (int): Subfolders per folder.
+        extensions (dict): Extension -> weight (DEFAULT_EXTENSIONS if None).
+        sizes (list): (weight, min, max) size buckets in bytes (DEFAULT_SIZES if None).
+        keywords (list): Words mixed into names (DEFAULT_KEYWORDS if None).
+        keyword_ratio (float): Share of names that contain a keyword.
+        dated_ratio (float): Share of names that contain a YYYY-MM-DD date.
+        seed (int): Random seed; the same seed gives the same tree.
+        sparse (bool): Truncate files to size instead of writing every byte.
+
+    Returns:
+        dict: The parameters plus 'dirs', 'files' and 'total_bytes'.
+    """
+    rng = random.Random(seed)
+    extensions = extensions or DEFAULT_EXTENSIONS
+    sizes = sizes or DEFAULT_SIZES
+    keywords = DEFAULT_KEYWORDS if keywords is None else keywords
+
+    dirs = [root]
+    level = [root]
+    for d in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(fanout):
+                path = os.path.join(parent, f"dir_{d}_{i}")
+                next_level.append(path)
+        dirs.extend(next_level)
+        level = next_level
+    for path in dirs:
+        os.makedirs(path, exist_ok=True)
+
+    ext_choices = list(extensions)
+    ext_weights = [extensions[ext] for ext in ext_choices]
+    size_weights = [bucket[0] for bucket in sizes]
+
+    total_bytes = 0
+    for i in range(files):
+        ext = rng.choices(ext_choices, ext_weights)[0]
+        _, low, high = rng.choices(sizes, size_weights)[0]
+        size = rng.randint(low, high)
+
+        name = f"file_{i}"
+        roll = rng.random()
+        if keywords and roll < keyword_ratio:
+            name = f"{rng.choice(keywords)}_{i}"
+        elif roll < keyword_ratio + dated_ratio:
+            name = f"photo_{2015 + i % 10}-{1 + i % 12:02d}-{1 + i % 28:02d}_{i}"
+
+        path = os.path.join(rng.choice(dirs), name + ext)
+        _write_file(path, ext, size, sparse)
+        total_bytes += size
+
+    return {
+        'files': files, 'depth': depth, 'fanout': fanout, 'seed': seed, 'sparse': sparse,
+        'keyword_ratio': keyword_ratio, 'dated_ratio': dated_ratio,
+        'dirs': len(dirs), 'total_bytes': total_bytes,
+    }
+
+def _write_file(path, ext, size, sparse):
+    header = _HEADERS.get(ext, b'')[:size]
+    with open(path, 'wb') as f:
+        f.write(header)
+        if sparse:
+            f.truncate(size)
+            return
+        remaining = size - len(header)
+        chunk = b'\0' * (1024 * 1024)
+        while remaining > 0:
+            f.write(chunk[:remaining])
+            remaining -= len(chunk)
@@ -0,0 +1,408 @@
+"""Command-line interface for running scans, sorts and undos without the GUI.
+
+Usage:
+    python -m cli scan SOURCE [options]
+    python -m cli preview SOURCE --destination DEST [options]
+    python -m cli sort SOURCE --destination DEST [options]
+    python -m cli undo [--list]
+    python -m cli report SOURCE --output PATH [--format json|csv|ndjson] [--compress gzip|zstd] [--summary] [options]
+    python -m cli schedule [--once | --list]
+    python -m cli jobs [--list] [--only ID ...] [--jobs-per-device N]
+    python -m cli recover [--forward | --back] [--id ID ...]
+
+Add --metrics-json PATH and/or --metrics-prom PATH (before the command) to
+time each stage and write the results when the command finishes.
+
+Every command writes JSON lines to stdout, one object per line, each with
+an "event" key ("file", "move", "error", "summary", ...). Anything else the
+sorting modules print goes to stderr so stdout stays machine-readable.
+
+Nothing here imports PyQt6, and the sorting modules are only imported by
+the command that needs them, so the CLI starts quickly from cron.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, 'handler', None):
+        parser.print_help(sys.stderr)
+        return 2
+
+    collect_metrics = args.metrics_json or args.metrics_prom
+    if collect_metrics:
+        import metrics
+        metrics.enable()
+
+    out = sys.stdout
+    # Library modules report problems with print(); keep that off stdout
+    sys.stdout = sys.stderr
+    try:
+        lines = JsonLines(out)
+        status = args.handler(args, lines)
+        if collect_metrics:
+            lines.emit("metrics", **metrics.export(args.metrics_json, args.metrics_prom))
+        return status
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # The reader went away (e.g. "| head"); stop quietly. Point stdout at
+        # devnull so the interpreter's final flush does not fail again.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), out.fileno())
+        return 1
+    finally:
+        sys.stdout = out
+
+class JsonLines:
+    """Writes one JSON object per line."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def emit(self, event, **fields):
+        self.stream.write(json.dumps(dict(event=event, **fields), ensure_ascii=False, default=str) + "\n")
+
+    def record(self, event, file_data):
+        """Write a scan record with an event key in front."""
+        self.emit(event, **file_data)
+
+    def flush(self):
+        self.stream.flush()
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Smart File Sorter command line")
+    parser.add_argument("--metrics-json", metavar="PATH", help="Write per-stage timings and counters as JSON")
+    parser.add_argument("--metrics-prom", metavar="PATH",
+                        help="Write them in the Prometheus text format (e.g. for node_exporter's textfile collector)")
+    commands = parser.add_subparsers(dest="command")
+
+    scan_options = argparse.ArgumentParser(add_help=False)
+    scan_options.add_argument("source", help="Folder to scan")
+    scan_options.add_argument("--no-recursive", action="store_true", help="Do not scan subfolders")
+    scan_options.add_argument("--exclude", nargs="*", metavar="EXT",
+                              help="Extensions to skip (default: excluded_extensions from the config)")
+    scan_options.add_argument("--min-size", type=int, default=0, metavar="BYTES")
+    scan_options.add_argument("--max-size", type=int, default=None, metavar="BYTES")
+    scan_options.add_argument("--before", metavar="YYYY-MM-DD", help="Only files modified before this date")
+    scan_options.add_argument("--rules", metavar="FILE", help="Custom rules file (default: custom_rules.json)")
+    scan_options.add_argument("--smart", action="store_true", help="Apply smart sorting on top of the rules")
+    scan_options.add_argument("--workers", type=int, default=None, help="Scan threads (default: from config)")
+    scan_options.add_argument("--incremental", action="store_true", help="Use the scan index")
+    scan_options.add_argument("--no-sniff", action="store_true", help="Do not identify unknown files by content")
+    scan_options.add_argument("--duplicates", action="store_true", help="Mark duplicate files")
+
+    scan = commands.add_parser("scan", parents=[scan_options], help="List the files a sort would pick up")
+    scan.set_defaults(handler=run_scan)
+
+    preview = commands.add_parser("preview", parents=[scan_options], help="Show where each file would go")
+    preview.add_argument("--destination", required=True)
+    preview.set_defaults(handler=run_preview)
+
+    sort = commands.add_parser("sort", parents=[scan_options], help="Scan and move files into category folders")
+    sort.add_argument("--destination", required=True)
+    sort.add_argument("--duplicate-policy", choices=('skip', 'link', 'quarantine'),
+                      help="What to do with duplicates (implies --duplicates)")
+    sort.set_defaults(handler=run_sort)
+
+    undo = commands.add_parser("undo", help="Undo the last sort")
+    undo.add_argument("--list", action="store_true", help="List the sorts that can be undone instead")
+    undo.set_defaults(handler=run_undo)
+
+    report = commands.add_parser("report", parents=[scan_options], help="Scan and export a report file")
+    report.add_argument("--output", required=True)
+    report.add_argument("--format", choices=('json', 'csv', 'ndjson'), default='json')
+    report.add_argument("--compress", choices=('gzip', 'zstd'), default=None,
+                        help="Compress the report (default: from the file name, .gz or .zst)")
+    report.add_argument("--summary", action="store_true", help="Write only per-category totals")
+    report.set_defaults(handler=run_report)
+
+    schedule = commands.add_parser("schedule", help="Run the scheduled jobs from the config until interrupted")
+    schedule.add_argument("--once", action="store_true",
+                          help="Run the jobs that are due (including missed runs) and exit, e.g. from cron")
+    schedule.add_argument("--list", action="store_true", help="List the jobs with their next and last runs")
+    schedule.set_defaults(handler=run_schedule)
+
+    jobs = commands.add_parser("jobs", help="Sort every job in the config's job queue, in parallel across disks")
+    jobs.add_argument("--list", action="store_true", help="List the jobs instead")
+    jobs.add_argument("--only", nargs="+", metavar="ID", help="Run only these jobs")
+    jobs.add_argument("--jobs-per-device", type=int, default=None,
+                      help="Jobs that may use one disk at once (default: jobs_per_device from the config)")
+    jobs.set_defaults(handler=run_jobs)
+
+    recover = commands.add_parser("recover", help="List, finish or roll back sorts that were interrupted")
+    action = recover.add_mutually_exclusive_group()
+    action.add_argument("--forward", action="store_true", help="Finish the remaining moves")
+    action.add_argument("--back", action="store_true", help="Move the already sorted files back")
+    recover.add_argument("--id", nargs="+", metavar="ID", help="Only these sorts (default: all)")
+    recover.set_defaults(handler=run_recover)
+
+    return parser
+
+def _scan(args, config):
+    """Yield batches of scan records for the scan options in args."""
+    from datetime import date
+    from file_sorter import iter_scan_batches
+    from rule_loader import load_compiled_rules
+
+    filters = {
+        'excluded_extensions': args.exclude if args.exclude is not None else config.get('excluded_extensions', []),
+        'min_size': args.min_size,
+        'max_size': args.max_size if args.max_size is not None else float('inf'),
+        'cutoff_date': date.fromisoformat(args.before) if args.before else None,
+        'rules': load_compiled_rules(args.rules),
+        'sniff_content': config.get('content_sniffing', True) and not args.no_sniff
+    }
+    workers = args.workers if args.workers is not None else config.get('scan_workers', 0)
+
+    index = None
+    if args.incremental:
+        from scan_index import ScanIndex
+        index = ScanIndex()
+
+    matcher = None
+    if args.smart:
+        from smart_sorting import build_keyword_matcher, smart_categorize_batch
+        matcher = build_keyword_matcher(config.get('smart_keywords', {}))
+
+    for batch in iter_scan_batches(args.source, not args.no_recursive, filters, workers, index=index):
+        if matcher is not None:
+            # Same labelling as the GUI's AI sorting
+            for file_data, smart_category in zip(batch, smart_categorize_batch(batch, matcher)):
+                if smart_category != file_data['category']:
+                    file_data['category'] = f"AI: {smart_category}"
+        yield batch
+
+def _scan_all(args, config):
+    files = [file_data for batch in _scan(args, config) for file_data in batch]
+    if args.duplicates or getattr(args, 'duplicate_policy', None):
+        from duplicate_finder import find_duplicates
+        find_duplicates(files)
+    return files
+
+def _load_config():
+    from config_manager import load_config
+    return load_config()
+
+def _summary(files):
+    from scan_columns import ScanColumns
+
+    summary = ScanColumns(files).summary()
+    categories = summary.pop('categories')
+    summary['categories'] = {category: totals['files'] for category, totals in categories.items()}
+    summary['category_bytes'] = {category: totals['bytes'] for category, totals in categories.items()}
+    summary['duplicates'] = sum(1 for file_data in files if file_data.get('duplicate_of'))
+    return summary
+
+def run_scan(args, out):
+    config = _load_config()
+    if args.duplicates:
+        # Duplicates are only known once everything has been scanned
+        files = _scan_all(args, config)
+        for file_data in files:
+            out.record("file", file_data)
+    else:
+        files = []
+        for batch in _scan(args, config):
+            for file_data in batch:
+                out.record("file", file_data)
+            out.flush()
+            files.extend(batch)
+    out.emit("summary", **_summary(files))
+    return 0
+
+def run_preview(args, out):
+    from move_engine import plan_destinations
+
+    config = _load_config()
+    files = _scan_all(args, config)
+    for file_data, destination in zip(files, plan_destinations(files, args.destination)):
+        out.emit("move", name=file_data['name'], path=file_data['path'], category=file_data['category'],
+                 destination=destination, duplicate_of=file_data.get('duplicate_of'))
+    out.emit("summary", **_summary(files))
+    return 0
+
+def run_sort(args, out):
+    from sort_journal import journaled_sort, find_interrupted_sorts
+
+    config = _load_config()
+    interrupted = find_interrupted_sorts()
+    if interrupted:
+        for journal in interrupted:
+            out.emit("error", message=f"Interrupted sort {journal.operation_id}: {journal.summary()}")
+        out.emit("error", message="Finish or roll back interrupted sorts before sorting again: "
+                                  "python -m cli recover --forward (or --back)")
+        return 1
+
+    files = _scan_all(args, config)
+    to_move, duplicates = files, []
+    if args.duplicate_policy:
+        from duplicate_finder import apply_duplicate_policy
+        to_move, duplicates = apply_duplicate_policy(files, args.duplicate_policy)
+
+    def on_progress(moved, done, total):
+        for file_data in moved:
+            out.emit("move", path=file_data['path'], category=file_data['category'])
+        out.flush()
+
+    def on_error(failures):
+        for file_data, e in failures:
+            out.emit("error", path=file_data['path'], message=str(e))
+
+    moved_files = journaled_sort(to_move, args.destination, on_progress=on_progress, on_error=on_error,
+                                 workers_per_device=config.get('move_workers_per_device', 4))
+
+    linked = 0
+    if duplicates and args.duplicate_policy == 'link':
+        from duplicate_finder import link_duplicates
+        linked, errors = link_duplicates(duplicates, moved_files)
+        for message in errors:
+            out.emit("error", message=message)
+
+    out.emit("summary", scanned=len(files), moved=len(moved_files), failed=len(to_move) - len(moved_files),
+             duplicates_left=len(duplicates) - linked, duplicates_linked=linked)
+    return 0 if len(moved_files) == len(to_move) else 1
+
+def run_undo(args, out):
+    from undo_manager import get_undo_history, undo_last_sort
+
+    if args.list:
+        for operation in get_undo_history():
+            out.emit("operation", id=operation.get("id"), timestamp=operation.get("timestamp"),
+                     files=len(operation.get("files", [])))
+        return 0
+
+    config = _load_config()
+    success, message = undo_last_sort(workers_per_device=config.get('move_workers_per_device', 4))
+    out.emit("undo", success=success, message=message)
+    return 0 if success else 1
+
+def run_recover(args, out):
+    from sort_journal import find_interrupted_sorts
+
+    config = _load_config()
+    journals = find_interrupted_sorts()
+    if args.id:
+        journals = [journal for journal in journals if journal.operation_id in args.id]
+    if not (args.forward or args.back):
+        for journal in journals:
+            out.emit("interrupted", id=journal.operation_id, destination=journal.destination,
+                     files=len(journal.moves), moved=len(journal.completed_moves()), summary=journal.summary())
+        return 0
+
+    workers = config.get('move_workers_per_device', 4)
+    status = 0
+    for journal in journals:
+        if args.forward:
+            success, message = journal.roll_forward(workers_per_device=workers)
+        else:
+            success, message = journal.roll_back(workers_per_device=workers)
+        out.emit("recover", id=journal.operation_id, action="forward" if args.forward else "back",
+                 success=success, message=message)
+        out.flush()
+        if not success:
+            status = 1
+    return status
+
+def run_report(args, out):
+    from itertools import chain
+    from report_export import write_report
+
+    config = _load_config()
+    if args.duplicates:
+        # Duplicates are only known once everything has been scanned
+        files = _scan_all(args, config)
+    else:
+        # Written as it is scanned, so memory use does not grow with the tree
+        files = chain.from_iterable(_scan(args, config))
+    try:
+        summary = write_report(files, args.output, args.format, args.compress, args.summary)
+    except (OSError, ValueError) as e:
+        out.emit("error", message=f"Could not write report to {args.output}: {e}")
+        return 1
+    categories = summary.pop('categories')
+    summary['categories'] = {category: totals['files'] for category, totals in categories.items()}
+    summary['category_bytes'] = {category: totals['bytes'] for category, totals in categories.items()}
+    out.emit("report", path=args.output, format=args.format, **summary)
+    return 0
+
+def run_schedule(args, out):
+    import time
+    from scheduler import Scheduler
+
+    config = _load_config()
+    jobs = config.get('scheduled_jobs', [])
+
+    def on_finished(entry):
+        out.emit("run", **entry)
+        out.flush()
+
+    scheduler = Scheduler(jobs, log=lambda message, level="INFO": out.emit("log", level=level, message=message),
+                          on_finished=on_finished)
+    if args.list:
+        for job in jobs:
+            next_run = scheduler.next_run(job['id'])
+            out.emit("job", id=job['id'], name=job.get('name'), frequency=job.get('frequency'),
+                     enabled=job.get('enabled', True), next_run=next_run.isoformat() if next_run else None,
+                     last_run=scheduler.last_run(job['id']))
+        return 0
+    if args.once:
+        scheduler.run_due()
+        return 0
+
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(3600)
+    finally:
+        scheduler.stop()
+        scheduler.wait()
+
+def run_jobs(args, out):
+    from job_queue import JobQueue
+
+    config = _load_config()
+    jobs = config.get('sort_jobs', [])
+    if args.only:
+        jobs = [job for job in jobs if job['id'] in args.only]
+    if args.list:
+        for job in jobs:
+            out.emit("job", **job)
+        return 0
+
+    lock = threading.Lock()
+
+    def on_progress(job, moved, totals):
+        with lock:
+            for file_data in moved:
+                out.emit("move", job=job['id'], path=file_data['path'], category=file_data['category'])
+            out.flush()
+
+    def on_error(job, failures):
+        with lock:
+            for file_data, e in failures:
+                out.emit("error", job=job['id'], path=file_data['path'], message=str(e))
+
+    def on_job_finished(job, result):
+        with lock:
+            out.emit("job_done", job=job['id'], name=job.get('name'), **result)
+            out.flush()
+
+    queue = JobQueue(
+        jobs, config,
+        jobs_per_device=args.jobs_per_device or config.get('jobs_per_device', 1),
+        device_limits=config.get('device_limits', {}),
+        on_progress=on_progress, on_error=on_error, on_job_finished=on_job_finished,
+        log=lambda message, level="INFO": None
+    )
+    results = queue.run()
+    failed = [job_id for job_id, result in results.items() if 'error' in result or result.get('failed')]
+    out.emit("summary", jobs=len(results), moved=sum(result.get('moved', 0) for result in results.values()),
+             failed_jobs=failed)
+    return 0 if not failed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
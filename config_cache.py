@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+
+class CachedFile:
+    """A settings file parsed once and reloaded only when it changes on disk.
+
+    get() costs one stat: the parsed value is reused as long as the file's
+    inode, mtime and size are unchanged. A changed file is parsed into a new
+    value that replaces the old one in one assignment, so readers see either
+    the old or the new value, never a mix. If the new contents do not parse
+    (e.g. an editor is half-way through saving), the old value is kept.
+
+    Subscribers are called with the new value after every reload, on the
+    thread that noticed the change (see check_for_changes).
+    """
+
+    def __init__(self, path, load):
+        """
+        Args:
+            path (str): The file to watch.
+            load (callable): Parses the file; called with the path, raises
+                OSError or ValueError if it cannot be read.
+        """
+        self.path = path
+        self.load = load
+        self.value = None
+        self._signature = None
+        self._loaded = False
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def signature(self):
+        """(inode, mtime_ns, size) of the file, or None if it does not exist."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def get(self):
+        """Return the parsed value, reloading it first if the file changed."""
+        self.check()
+        return self.value
+
+    def check(self):
+        """Reload the file if it changed since the last load; True if it was reloaded."""
+        signature = self.signature()
+        if self._loaded and signature == self._signature:
+            return False
+
+        with self._lock:
+            # Another thread may have reloaded it while we waited
+            if self._loaded and signature == self._signature:
+                return False
+            try:
+                value = self.load(self.path)
+            except (OSError, ValueError) as e:
+                print(f"Error loading {self.path}: {e}")
+                # Keep the old value; try again once the file changes again
+                self._signature = signature
+                self._loaded = True
+                return False
+            first_load = not self._loaded
+            self.value = value
+            self._signature = signature
+            self._loaded = True
+
+        if not first_load:
+            self._notify(value)
+        return True
+
+    def prime(self, value):
+        """Record a value we just wrote ourselves, so saving does not count as a change."""
+        with self._lock:
+            self.value = value
+            self._signature = self.signature()
+            self._loaded = True
+
+    def subscribe(self, callback):
+        """Call callback(value) whenever the file is reloaded after a change."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _notify(self, value):
+        for callback in list(self._subscribers):
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"Error applying changes from {self.path}: {e}")
+
+_files = {}
+_files_lock = threading.Lock()
+
+def cached_file(path, load):
+    """The shared CachedFile for path (one per absolute path)."""
+    key = os.path.abspath(path)
+    with _files_lock:
+        cached = _files.get(key)
+        if cached is None:
+            cached = _files[key] = CachedFile(key, load)
+        return cached
+
+def check_for_changes():
+    """Reload every cached file that has subscribers and changed on disk.
+
+    Meant to be called every second or two, e.g. from a GUI timer; each call
+    costs one stat per file.
+    """
+    with _files_lock:
+        watched = [cached for cached in _files.values() if cached._subscribers]
+    return [cached.path for cached in watched if cached.check()]
+
+def write_json_atomically(path, data):
+    """Write JSON through a temporary file and a rename, so readers never see half a file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    with open(temp_path, 'w') as file:
+        json.dump(data, file, indent=4)
+    os.replace(temp_path, path)
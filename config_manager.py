@@ -1,8 +1,10 @@
+import copy
 import json
 import os
-import csv
 from datetime import datetime
 
+from config_cache import cached_file, write_json_atomically
+
 # Default configuration settings
 DEFAULT_CONFIG = {
     "categories": ["Images", "Videos", "Documents", "Audio", "Archives", "Code Files", "Other"],
@@ -11,38 +13,67 @@ DEFAULT_CONFIG = {
     "excluded_extensions": [".tmp", ".log", ".cache"],
     "auto_watch": False,
     "ai_sorting": False,
-    "theme": "light"
+    "theme": "light",
+    "scan_workers": 0,
+    "smart_keywords": {},
+    "incremental_scan": False,
+    "watch_backend": "auto",
+    "auto_sort": False,
+    "auto_sort_settle_seconds": 3.0,
+    "move_workers_per_device": 4,
+    "detect_duplicates": False,
+    "duplicate_policy": "skip",
+    "content_sniffing": True,
+    "metrics_enabled": False,
+    "metrics_json_file": "metrics.json",
+    "metrics_prometheus_file": "",
+    "scheduled_jobs": [],
+    "sort_jobs": [],
+    "jobs_per_device": 1,
+    "device_limits": {}
 }
 
 CONFIG_FILE = "file_sorter_config.json"
 
 def load_config():
-    """Load configuration from file."""
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, 'r') as file:
-                config = json.load(file)
-                # Merge with defaults to ensure all keys exist
-                for key, value in DEFAULT_CONFIG.items():
-                    if key not in config:
-                        config[key] = value
-                return config
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Error loading config: {e}")
-            return DEFAULT_CONFIG.copy()
-    else:
-        return DEFAULT_CONFIG.copy()
+    """Load configuration from file.
+
+    The parsed file is cached and only read again after it changes on disk
+    (see config_cache). Each call returns a fresh copy the caller may modify.
+    """
+    config = _config_file().get()
+    return copy.deepcopy(config) if config is not None else copy.deepcopy(DEFAULT_CONFIG)
 
 def save_config(config):
     """Save configuration to file."""
     try:
-        with open(CONFIG_FILE, 'w') as file:
-            json.dump(config, file, indent=4)
+        write_json_atomically(CONFIG_FILE, config)
+        _config_file().prime(_with_defaults(copy.deepcopy(config)))
         return True
     except IOError as e:
         print(f"Error saving config: {e}")
         return False
 
+def subscribe_config(callback):
+    """Call callback(config) with a fresh copy whenever the config file is changed outside the app."""
+    _config_file().subscribe(lambda config: callback(copy.deepcopy(config)))
+
+def _config_file():
+    return cached_file(CONFIG_FILE, _read_config)
+
+def _read_config(path):
+    if not os.path.exists(path):
+        return copy.deepcopy(DEFAULT_CONFIG)
+    with open(path, 'r') as file:
+        return _with_defaults(json.load(file))
+
+def _with_defaults(config):
+    # Merge with defaults to ensure all keys exist
+    for key, value in DEFAULT_CONFIG.items():
+        if key not in config:
+            config[key] = value
+    return config
+
 def export_config(export_path=None):
     """Export current configuration to a file."""
     if export_path is None:
@@ -65,7 +96,7 @@ def import_config(import_path):
             imported_config = json.load(file)
         
         # Validate imported config
-        config = DEFAULT_CONFIG.copy()
+        config = copy.deepcopy(DEFAULT_CONFIG)
         for key, value in imported_config.items():
             if key in DEFAULT_CONFIG:
                 config[key] = value
@@ -76,35 +107,23 @@ def import_config(import_path):
         print(f"Error importing config: {e}")
         return None
 
-def export_report(preview_data, report_type='json', export_path=None):
-    """Export sorting report in various formats."""
+def export_report(preview_data, report_type='json', export_path=None, compression=None, summary=False):
+    """Export sorting report in various formats.
+
+    preview_data can be any iterable of file records, including a scan
+    generator; it is written as a stream (see report_export.write_report).
+    """
+    from report_export import write_report
+
     if export_path is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        export_path = f"sort_report_{timestamp}.{report_type}"
+        suffix = {'gzip': '.gz', 'zstd': '.zst'}.get(compression, '')
+        export_path = f"sort_report_{timestamp}.{report_type}{suffix}"
     
     try:
         os.makedirs(os.path.dirname(export_path) if os.path.dirname(export_path) else '.', exist_ok=True)
-        
-        if report_type == 'json':
-            with open(export_path, 'w') as file:
-                json.dump(preview_data, file, indent=4)
-        
-        elif report_type == 'csv':
-            with open(export_path, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow(['File Name', 'Type', 'Size', 'Category', 'Path', 'Modified'])
-                
-                for file_data in preview_data:
-                    writer.writerow([
-                        file_data.get('name', ''),
-                        file_data.get('type', ''),
-                        file_data.get('size', ''),
-                        file_data.get('category', ''),
-                        file_data.get('path', ''),
-                        file_data.get('modified', '')
-                    ])
-        
+        write_report(preview_data, export_path, report_type, compression, summary)
         return export_path
-    except IOError as e:
+    except (IOError, ValueError) as e:
         print(f"Error exporting report: {e}")
         return None
\ No newline at end of file
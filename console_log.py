@@ -0,0 +1,115 @@
+import logging
+import logging.handlers
+import threading
+import time
+from datetime import datetime
+
+LOG_FILE = "file_sorter.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# Lines kept in the console widget; older ones are dropped
+MAX_CONSOLE_LINES = 2000
+
+# More per-file messages than this from one group in one flush become a summary line
+COLLAPSE_THRESHOLD = 5
+
+class LogSink:
+    """Collects log messages from any thread and hands them out in batches.
+
+    emit() only appends to a list under a lock, so it costs next to nothing
+    on a worker thread. A GUI timer calls drain() to get everything since
+    the last call in one go. Every message goes to a rotating log file;
+    for the console, per-file messages that share a group, such as one
+    "Moved" line per file, are collapsed into a summary line when there are
+    many of them.
+    """
+
+    def __init__(self, log_file=LOG_FILE, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT):
+        self.log_file = log_file
+        self._pending = []
+        self._lock = threading.Lock()
+        self._file_handler = None
+        if log_file:
+            try:
+                self._file_handler = logging.handlers.RotatingFileHandler(
+                    log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+                )
+                self._file_handler.setFormatter(logging.Formatter('%(message)s'))
+            except OSError as e:
+                print(f"Could not open log file {log_file}: {e}")
+
+    def emit(self, message, level="INFO", group=None):
+        """Queue a message. Messages with a group are per-file details that may be collapsed."""
+        # Timestamps are formatted later, in drain(), off the caller's thread
+        entry = (time.time(), level, message, group)
+        with self._lock:
+            self._pending.append(entry)
+
+    def drain(self):
+        """Write queued messages to the log file and return the console lines.
+
+        Returns:
+            list: (timestamp, level, message) tuples, oldest first.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return []
+
+        pending = _format_timestamps(pending)
+        self._write_file(pending)
+        return _collapse(pending, self.log_file)
+
+    def close(self):
+        self.drain()
+        if self._file_handler:
+            self._file_handler.close()
+            self._file_handler = None
+
+    def _write_file(self, entries):
+        if not self._file_handler:
+            return
+        # Each entry carries its own date, so a batch spanning midnight is dated correctly
+        text = "\n".join(
+            f"{date} {timestamp} {level}: {message}" for date, timestamp, level, message, group in entries
+        )
+        # One record per flush, so the file is written (and rotated) once per batch
+        record = logging.LogRecord("file_sorter", logging.INFO, __file__, 0, text, None, None)
+        self._file_handler.handle(record)
+
+def _format_timestamps(entries):
+    """Turn the epoch times of queued entries into date and HH:MM:SS strings, once per second."""
+    formatted = []
+    last_second = None
+    last_date = last_text = ""
+    for created, level, message, group in entries:
+        second = int(created)
+        if second != last_second:
+            last_second = second
+            last_date, last_text = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S").split(" ")
+        formatted.append((last_date, last_text, level, message, group))
+    return formatted
+
+def _collapse(entries, log_file):
+    """Replace large runs of grouped per-file messages with one summary line each."""
+    counts = {}
+    for date, timestamp, level, message, group in entries:
+        if group is not None:
+            counts[(group, level)] = counts.get((group, level), 0) + 1
+
+    lines = []
+    summarized = set()
+    for date, timestamp, level, message, group in entries:
+        if group is None or counts[(group, level)] <= COLLAPSE_THRESHOLD:
+            lines.append((timestamp, level, message))
+            continue
+        key = (group, level)
+        if key in summarized:
+            continue
+        summarized.add(key)
+        summary = f"{group}: {counts[key]} files"
+        if log_file:
+            summary += f" (details in {log_file})"
+        lines.append((timestamp, level, summary))
+    return lines
@@ -0,0 +1,189 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+# Bytes read from the start of a file; enough for every signature below (tar is at 257)
+SNIFF_BYTES = 4096
+
+# Threads reading file headers for one batch of records
+SNIFF_WORKERS = 8
+
+# Results remembered per (device, inode, size, mtime)
+MEMO_SIZE = 100000
+
+# Extensions that say nothing about the content, so the content is checked instead
+AMBIGUOUS_EXTENSIONS = frozenset(['', '.bin', '.dat', '.data', '.raw', '.file', '.download', '.part',
+                                  '.crdownload', '.partial', '.unknown', '.out'])
+
+def _ooxml(head):
+    # Office Open XML files are zip archives; the member names are stored uncompressed
+    if b'word/' in head:
+        return '.docx'
+    if b'xl/' in head:
+        return '.xlsx'
+    if b'ppt/' in head:
+        return '.pptx'
+    if b'[Content_Types].xml' in head:
+        return '.docx'
+    if b'mimetypeapplication/vnd.oasis.opendocument.text' in head:
+        return '.odt'
+    return '.zip'
+
+def _riff(head):
+    return {b'WEBP': '.webp', b'WAVE': '.wav', b'AVI ': '.avi'}.get(head[8:12])
+
+def _markup(head):
+    text = head[:1024].lstrip().lower()
+    if text.startswith((b'<!doctype html', b'<html')):
+        return '.html'
+    if text.startswith((b'<svg', b'<?xml')) and b'<svg' in text:
+        return '.svg'
+    return None
+
+def _iso_media(head):
+    brand = head[8:12]
+    if brand == b'qt  ':
+        return '.mov'
+    if brand in (b'M4A ', b'M4B '):
+        return '.m4a'
+    return '.mp4'
+
+def _script(head):
+    first_line = head.split(b'\n', 1)[0]
+    return '.py' if b'python' in first_line else None
+
+# (offset, magic bytes, extension or function of the header returning one)
+SIGNATURES = [
+    (0, b'%PDF-', '.pdf'),
+    (0, b'\xff\xd8\xff', '.jpg'),
+    (0, b'\x89PNG\r\n\x1a\n', '.png'),
+    (0, b'GIF87a', '.gif'),
+    (0, b'GIF89a', '.gif'),
+    (0, b'II*\x00', '.tiff'),
+    (0, b'MM\x00*', '.tiff'),
+    (0, b'RIFF', _riff),
+    (0, b'\x1aE\xdf\xa3', '.mkv'),
+    (0, b'0&\xb2u\x8ef\xcf\x11', '.wmv'),
+    (0, b'FLV\x01', '.flv'),
+    (0, b'ID3', '.mp3'),
+    (0, b'\xff\xfb', '.mp3'),
+    (0, b'fLaC', '.flac'),
+    (0, b'OggS', '.ogg'),
+    (0, b'PK\x03\x04', _ooxml),
+    (0, b'Rar!\x1a\x07', '.rar'),
+    (0, b"7z\xbc\xaf'\x1c", '.7z'),
+    (0, b'\x1f\x8b', '.gz'),
+    (0, b'BZh', '.bz2'),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', '.doc'),
+    (0, b'{\\rtf', '.rtf'),
+    (0, b'#!', _script),
+    (4, b'ftyp', _iso_media),
+    (257, b'ustar', '.tar'),
+]
+
+def _compile_signatures(signatures):
+    """Index offset-0 signatures by their first byte; the rest are checked in order."""
+    by_first_byte = {}
+    at_offset = []
+    for offset, magic, result in signatures:
+        if offset == 0:
+            by_first_byte.setdefault(magic[0], []).append((magic, result))
+        else:
+            at_offset.append((offset, magic, result))
+    # Longest magic first so e.g. a specific 8-byte signature beats a 2-byte one
+    for candidates in by_first_byte.values():
+        candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+    return by_first_byte, at_offset
+
+_BY_FIRST_BYTE, _AT_OFFSET = _compile_signatures(SIGNATURES)
+
+def identify(head):
+    """Return the extension (e.g. '.pdf') that matches a file header, or None."""
+    if not head:
+        return None
+    for magic, result in _BY_FIRST_BYTE.get(head[0], ()):
+        if head.startswith(magic):
+            extension = result(head) if callable(result) else result
+            if extension:
+                return extension
+    for offset, magic, result in _AT_OFFSET:
+        if head[offset:offset + len(magic)] == magic:
+            extension = result(head) if callable(result) else result
+            if extension:
+                return extension
+    return _markup(head)
+
+def needs_sniffing(file_ext, known_extensions):
+    """True if a file's extension is missing, ambiguous or not in known_extensions."""
+    return file_ext in AMBIGUOUS_EXTENSIONS or file_ext not in known_extensions
+
+class ContentSniffer:
+    """Identifies file types from their first bytes, remembering every answer.
+
+    A file is read with a single pread of SNIFF_BYTES. Results are kept per
+    (device, inode, size, mtime), so a file that has not changed since it was
+    last sniffed costs one stat and no read.
+    """
+
+    def __init__(self, memo_size=MEMO_SIZE, workers=SNIFF_WORKERS):
+        self.memo_size = memo_size
+        self.workers = workers
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sniff(self, file_path):
+        """Return the extension matching the file's content, or None."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+
+        extension = None
+        if stat.st_size > 0:
+            try:
+                fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+                try:
+                    head = _read_head(fd)
+                finally:
+                    os.close(fd)
+                extension = identify(head)
+                metrics.count('content_reads')
+            except OSError as e:
+                print(f"Error reading {file_path}: {e}")
+                return None
+
+        with self._lock:
+            self._memo[key] = extension
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return extension
+
+    def sniff_many(self, file_paths):
+        """Sniff several files on a bounded thread pool; results are in input order."""
+        if len(file_paths) < 2:
+            return [self.sniff(path) for path in file_paths]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(file_paths))) as pool:
+            return list(pool.map(self.sniff, file_paths))
+
+def _read_head(fd):
+    if hasattr(os, 'pread'):
+        return os.pread(fd, SNIFF_BYTES, 0)
+    return os.read(fd, SNIFF_BYTES)
+
+_default_sniffer = ContentSniffer()
+
+def sniff_file_type(file_path):
+    """Extension matching a file's content, using the shared memo."""
+    return _default_sniffer.sniff(file_path)
+
+def sniff_file_types(file_paths):
+    """sniff_file_type for many files at once, on a bounded thread pool."""
+    return _default_sniffer.sniff_many(file_paths)
@@ -3,53 +3,115 @@ import threading
 import os
 from pathlib import Path
 
+import metrics
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # watchdog is optional; fall back to polling without it
+    Observer = None
+    FileSystemEventHandler = object
+
+WATCH_BACKENDS = ('auto', 'watchdog', 'poll')
+
 class DirectoryWatcher:
-    def __init__(self, watch_directory, callback=None):
+    """Watch a directory tree and report added, modified and deleted files.
+
+    The callback receives a dict with 'added', 'modified' and 'deleted' lists
+    of file paths; a deleted or moved folder is reported as its files, never
+    as the folder path. Two backends produce it:
+
+    - 'watchdog': kernel change notifications (inotify on Linux) through the
+      watchdog package. Events are coalesced for flush_interval seconds and
+      nothing runs while the tree is idle. The paths of the files in the tree
+      are kept so that a folder event can be expanded into file events.
+    - 'poll': rescans the whole tree every poll_interval seconds and diffs
+      the results. Used when watchdog is not installed.
+
+    'auto' picks watchdog when it is available.
+    """
+
+    def __init__(self, watch_directory, callback=None, backend='auto', poll_interval=2, flush_interval=0.5):
+        if backend not in WATCH_BACKENDS:
+            raise ValueError(f"Unknown watch backend: {backend}")
         self.watch_directory = watch_directory
         self.callback = callback
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.flush_interval = flush_interval
+        self.active_backend = None
         self.watching = False
         self.watch_thread = None
         self.last_scan = {}
-        
+        self._observer = None
+        self._pending = {}
+        self._pending_cond = threading.Condition()
+        self._known_files = set()
+
     def start_watching(self):
         """Start watching the directory for changes."""
         if self.watching:
             return False
-        
+
+        use_watchdog = self.backend == 'watchdog' or (self.backend == 'auto' and Observer is not None)
+        if use_watchdog and Observer is None:
+            print("watchdog is not installed, falling back to polling")
+            use_watchdog = False
+
         self.watching = True
+        if use_watchdog:
+            try:
+                self._start_observer()
+                self.active_backend = 'watchdog'
+                return True
+            except Exception as e:
+                # e.g. inotify watch limit reached; polling still works
+                print(f"Could not start watchdog observer, falling back to polling: {e}")
+
+        self.active_backend = 'poll'
         self.watch_thread = threading.Thread(target=self._watch_loop, daemon=True)
         self.watch_thread.start()
         return True
-    
+
     def stop_watching(self):
         """Stop watching the directory."""
         self.watching = False
+        if self._observer:
+            self._observer.stop()
+            self._observer.join(timeout=1)
+            self._observer = None
+        with self._pending_cond:
+            self._pending_cond.notify_all()
         if self.watch_thread:
             self.watch_thread.join(timeout=1)
-    
+
     def _watch_loop(self):
-        """Main watching loop."""
+        """Main polling loop."""
+        # Start from the current state so only later changes are reported
+        self.last_scan = self._scan_directory()
         while self.watching:
             try:
-                current_files = self._scan_directory()
-                changes = self._detect_changes(current_files)
-                
+                time.sleep(self.poll_interval)
+                with metrics.timer('watcher_poll'):
+                    current_files = self._scan_directory()
+                    changes = self._detect_changes(current_files)
+                metrics.count('watcher_files_polled', len(current_files))
+
                 if changes and self.callback:
                     self.callback(changes)
-                
+
                 self.last_scan = current_files
-                time.sleep(2)  # Check every 2 seconds
-                
+
             except Exception as e:
                 print(f"Directory watcher error: {e}")
                 time.sleep(5)  # Wait longer if there's an error
-    
+
     def _scan_directory(self):
         """Scan directory and return file information."""
         files = {}
         if not os.path.exists(self.watch_directory):
             return files
-        
+
         try:
             for root, dirs, filenames in os.walk(self.watch_directory):
                 for filename in filenames:
@@ -64,9 +126,9 @@ class DirectoryWatcher:
                         continue
         except OSError as e:
             print(f"Error scanning directory: {e}")
-        
+
         return files
-    
+
     def _detect_changes(self, current_files):
         """Detect changes between current and last scan."""
         changes = {
@@ -74,21 +136,128 @@ class DirectoryWatcher:
             'modified': [],
             'deleted': []
         }
-        
+
         # Find added and modified files
         for file_path, file_info in current_files.items():
             if file_path not in self.last_scan:
                 changes['added'].append(file_path)
             elif self.last_scan[file_path]['modified'] != file_info['modified']:
                 changes['modified'].append(file_path)
-        
+
         # Find deleted files
         for file_path in self.last_scan:
             if file_path not in current_files:
                 changes['deleted'].append(file_path)
-        
+
         return changes if any(changes.values()) else None
 
+    def _start_observer(self):
+        """Start the watchdog observer and the thread that delivers its events."""
+        self._known_files = set(self._scan_directory())
+        observer = Observer()
+        observer.schedule(_EventHandler(self), self.watch_directory, recursive=True)
+        observer.start()
+        self._observer = observer
+        self.watch_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self.watch_thread.start()
+
+    def _record_event(self, kind, path):
+        """Merge one file event into the pending changes."""
+        with self._pending_cond:
+            if kind == 'deleted':
+                self._known_files.discard(path)
+            else:
+                self._known_files.add(path)
+            previous = self._pending.get(path)
+            if previous == 'added' and kind == 'deleted':
+                # Created and removed again before anyone saw it
+                del self._pending[path]
+            elif previous == 'added' and kind == 'modified':
+                pass
+            elif previous == 'deleted' and kind == 'added':
+                self._pending[path] = 'modified'
+            else:
+                self._pending[path] = kind
+            self._pending_cond.notify()
+
+    def _record_new_directory(self, dir_path):
+        """Report every file in a directory that was created or moved in."""
+        for root, dirs, filenames in os.walk(dir_path):
+            for filename in filenames:
+                self._record_event('added', os.path.join(root, filename))
+
+    def _record_removed_directory(self, dir_path):
+        """Report every known file under a directory that was deleted or moved away."""
+        prefix = os.path.join(dir_path, '')
+        with self._pending_cond:
+            removed = [path for path in self._known_files if path.startswith(prefix)]
+        for path in removed:
+            self._record_event('deleted', path)
+
+    def _flush_loop(self):
+        """Deliver coalesced watchdog events to the callback; sleeps while idle."""
+        while self.watching:
+            with self._pending_cond:
+                while self.watching and not self._pending:
+                    self._pending_cond.wait()
+            if not self.watching:
+                break
+
+            # Let a burst of events (e.g. a large copy) settle into one callback
+            time.sleep(self.flush_interval)
+            with self._pending_cond:
+                pending, self._pending = self._pending, {}
+
+            changes = {'added': [], 'modified': [], 'deleted': []}
+            for path, kind in pending.items():
+                changes[kind].append(path)
+            metrics.count('watcher_events', len(pending))
+
+            if any(changes.values()) and self.callback:
+                try:
+                    self.callback(changes)
+                except Exception as e:
+                    print(f"Directory watcher error: {e}")
+
+class _EventHandler(FileSystemEventHandler):
+    """Translates watchdog events into DirectoryWatcher change records."""
+
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_created(self, event):
+        if event.is_directory:
+            self.watcher._record_new_directory(event.src_path)
+        else:
+            self.watcher._record_event('added', event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher._record_event('modified', event.src_path)
+
+    def on_deleted(self, event):
+        if event.is_directory:
+            self.watcher._record_removed_directory(event.src_path)
+        else:
+            self.watcher._record_event('deleted', event.src_path)
+
+    def on_moved(self, event):
+        if event.is_directory:
+            self.watcher._record_removed_directory(event.src_path)
+        else:
+            self.watcher._record_event('deleted', event.src_path)
+        if not _is_inside(event.dest_path, self.watcher.watch_directory):
+            return
+        if event.is_directory:
+            self.watcher._record_new_directory(event.dest_path)
+        else:
+            self.watcher._record_event('added', event.dest_path)
+
+def _is_inside(path, directory):
+    directory = os.path.join(os.path.abspath(directory), '')
+    return os.path.abspath(path).startswith(directory)
+
 def start_watching(directory, callback=None):
     """Convenience function to start watching a directory."""
     watcher = DirectoryWatcher(directory, callback)
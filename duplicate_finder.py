@@ -0,0 +1,163 @@
+import hashlib
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+DUPLICATE_POLICIES = ('skip', 'link', 'quarantine')
+QUARANTINE_CATEGORY = "Duplicates"
+
+# Bytes hashed from each end of a file before deciding whether a full hash is needed
+PARTIAL_HASH_BYTES = 64 * 1024
+
+# Below this many files a process pool costs more than it saves
+PROCESS_POOL_MIN_FILES = 4
+
+def find_duplicates(file_records, workers=0):
+    """Group scan records whose files have identical content.
+
+    Work is narrowed down in three stages so only a few files are read in full:
+
+    1. records are bucketed by size_bytes; unique sizes are dropped,
+    2. within each bucket the first and last 64 KiB are hashed,
+    3. files that still collide are hashed in full (mmap'd, on a process pool).
+
+    Files no bigger than the two partial blocks are fully covered by stage 2.
+    The first record of each group (in scan order) is the one that is kept;
+    every other record gets a 'duplicate_of' key with the kept file's path.
+
+    Args:
+        file_records (list): Records from file_sorter.scan_files.
+        workers (int): Processes for full hashing (0 = one per CPU).
+
+    Returns:
+        list: Groups of records, each a list with the kept record first.
+    """
+    by_size = {}
+    for file_data in file_records:
+        # Empty files are all "identical" but not worth reporting
+        if file_data['size_bytes'] > 0:
+            by_size.setdefault(file_data['size_bytes'], []).append(file_data)
+    candidates = [file_data for bucket in by_size.values() if len(bucket) > 1 for file_data in bucket]
+    if not candidates:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+        partial_hashes = list(pool.map(_partial_hash, (f['path'] for f in candidates)))
+    by_partial = {}
+    for file_data, digest in zip(candidates, partial_hashes):
+        if digest is not None:
+            by_partial.setdefault((file_data['size_bytes'], digest), []).append(file_data)
+
+    confirmed = []
+    needs_full_hash = []
+    for (size, digest), bucket in by_partial.items():
+        if len(bucket) < 2:
+            continue
+        if size <= 2 * PARTIAL_HASH_BYTES:
+            confirmed.append(bucket)
+        else:
+            needs_full_hash.extend(bucket)
+
+    if needs_full_hash:
+        paths = [f['path'] for f in needs_full_hash]
+        if len(paths) < PROCESS_POOL_MIN_FILES:
+            full_hashes = [_full_hash(path) for path in paths]
+        else:
+            # spawn, not fork: callers (the GUI scan worker) are multithreaded
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers or None, mp_context=context) as pool:
+                # Unlike a thread pool, a process pool uses chunksize to batch paths per round trip
+                full_hashes = list(pool.map(_full_hash, paths, chunksize=8))
+        by_full = {}
+        for file_data, digest in zip(needs_full_hash, full_hashes):
+            if digest is not None:
+                by_full.setdefault((file_data['size_bytes'], digest), []).append(file_data)
+        confirmed.extend(bucket for bucket in by_full.values() if len(bucket) > 1)
+
+    # Keep scan order: groups and their members sorted by position in file_records
+    order = {id(file_data): index for index, file_data in enumerate(file_records)}
+    groups = [sorted(bucket, key=lambda f: order[id(f)]) for bucket in confirmed]
+    groups.sort(key=lambda group: order[id(group[0])])
+    for group in groups:
+        for file_data in group[1:]:
+            file_data['duplicate_of'] = group[0]['path']
+    return groups
+
+def apply_duplicate_policy(file_records, policy):
+    """Decide what happens to records marked by find_duplicates before a sort.
+
+    - 'skip': duplicates are left where they are,
+    - 'quarantine': duplicates are moved into the Duplicates category folder,
+    - 'link': duplicates are not moved; after the sort, link_duplicates()
+      replaces each one with a hard link to the sorted copy.
+
+    Returns:
+        tuple: (records_to_move, duplicates_left_in_place)
+    """
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicate policy: {policy}")
+
+    to_move = []
+    duplicates = []
+    for file_data in file_records:
+        if not file_data.get('duplicate_of'):
+            to_move.append(file_data)
+        elif policy == 'quarantine':
+            to_move.append(dict(file_data, category=QUARANTINE_CATEGORY))
+        else:
+            duplicates.append(file_data)
+    return to_move, duplicates
+
+def link_duplicates(duplicates, moved_files):
+    """Replace each duplicate with a hard link to where its kept copy was sorted.
+
+    Duplicates whose kept copy was not moved, or that live on another device,
+    are left untouched.
+
+    Returns:
+        tuple: (linked_count, list of error messages)
+    """
+    new_paths = {moved['original_path']: moved['new_path'] for moved in moved_files}
+    linked = 0
+    errors = []
+    for file_data in duplicates:
+        target = new_paths.get(file_data['duplicate_of'])
+        if target is None:
+            continue
+        temp_path = file_data['path'] + ".dup-link"
+        try:
+            os.link(target, temp_path)
+            os.replace(temp_path, file_data['path'])
+            linked += 1
+        except OSError as e:
+            errors.append(f"Could not link {file_data['path']} to {target}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+    return linked, errors
+
+def _partial_hash(path):
+    """Hash the size-bounded head and tail of a file; None if it can't be read."""
+    try:
+        with open(path, 'rb') as f:
+            digest = hashlib.blake2b(f.read(PARTIAL_HASH_BYTES))
+            size = os.fstat(f.fileno()).st_size
+            if size > PARTIAL_HASH_BYTES:
+                f.seek(max(PARTIAL_HASH_BYTES, size - PARTIAL_HASH_BYTES))
+                digest.update(f.read(PARTIAL_HASH_BYTES))
+        return digest.hexdigest()
+    except OSError as e:
+        print(f"Error hashing {path}: {e}")
+        return None
+
+def _full_hash(path):
+    """Hash a whole file through mmap; None if it can't be read."""
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.blake2b(mapped).hexdigest()
+    except (OSError, ValueError) as e:
+        print(f"Error hashing {path}: {e}")
+        return None
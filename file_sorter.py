@@ -1,99 +1,415 @@
 import os
+import sys
+import threading
 import time
-from pathlib import Path
+from collections import deque
 
-def scan_files(source_path, recursive, filters):
+import metrics
+from content_sniffer import needs_sniffing, sniff_file_types
+from rule_engine import compile_rules
+
+# Built-in extension to category mapping used when no custom rule matches
+DEFAULT_CATEGORIES = {}
+for _category, _extensions in (
+    ('Images', ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp']),
+    ('Videos', ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v']),
+    ('Audio', ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a']),
+    ('Documents', ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt', '.xls', '.xlsx', '.ppt', '.pptx']),
+    ('Archives', ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2']),
+    ('Code Files', ['.py', '.js', '.html', '.css', '.cpp', '.java', '.c', '.h']),
+):
+    for _ext in _extensions:
+        DEFAULT_CATEGORIES.setdefault(_ext, _category)
+
+def scan_files(source_path, recursive, filters, workers=1):
     """Scan the source folder and apply filters, returning structured data.
 
     Args:
         source_path (str): Path to the source folder.
         recursive (bool): Whether to scan subfolders.
         filters (dict): Filters for date, size, and excluded extensions.
+        workers (int): Number of threads reading directories in parallel.
+            Values of 1 or less use the single-threaded walker.
 
     Returns:
-        list: List of dictionaries with file information (name, type, size, category, path).
+        list: FileRecord objects (name, type, size, category, path, ...).
+    """
+    return [file_data for batch in iter_scan_batches(source_path, recursive, filters, workers) for file_data in batch]
+
+def iter_scan_files(source_path, recursive, filters, workers=1, index=None):
+    """Generator version of scan_files that yields each file record as it is found.
+
+    Takes the same arguments as scan_files. Closing the generator early stops
+    the walk, including any parallel reader threads. When index is a
+    scan_index.ScanIndex, the scan is served incrementally from it instead.
     """
-    valid_files = []
-    excluded_extensions = filters.get('excluded_extensions', [])
-    min_size = filters.get('min_size', 0)
-    max_size = filters.get('max_size', float('inf'))
-    cutoff_date = filters.get('cutoff_date', None)
-    rules = filters.get('rules', {})
-
-    for dirpath, dirnames, filenames in os.walk(source_path):
-        for filename in filenames:
-            file_path = os.path.join(dirpath, filename)
+    if index is not None:
+        yield from index.iter_scan(source_path, recursive, filters)
+        return
+
+    scan_filter = ScanFilter(filters)
+    rules = scan_filter.rules
+
+    # Excluded extensions are dropped by name inside the walker, before any stat
+    if workers and workers > 1:
+        entries = _iter_file_entries_parallel(source_path, recursive, scan_filter.excluded_extensions, workers)
+    else:
+        entries = _iter_file_entries(source_path, recursive, scan_filter.excluded_extensions)
+
+    # Counted locally and reported once at the end, so disabled metrics cost nothing per file
+    timing = metrics.enabled()
+    started = time.perf_counter()
+    stat_calls = errors = categorized = 0
+    categorize_seconds = 0.0
+    try:
+        for entry in entries:
+            filename = entry.name
+
+            stat_calls += 1
             try:
-                file_size = os.path.getsize(file_path)
-                file_mtime = os.path.getmtime(file_path)
-                file_ext = Path(filename).suffix.lower()
+                # DirEntry caches the result, so this is the only stat for the file
+                stat = entry.stat()
+            except OSError as e:
+                errors += 1
+                print(f"Error processing {entry.path}: {e}")
+                continue
 
-                # Apply exclusion filter
-                if any(filename.lower().endswith(ext.lower()) for ext in excluded_extensions):
-                    continue
+            file_size = stat.st_size
+            file_mtime = stat.st_mtime
 
-                # Apply size filter
-                if not (min_size <= file_size <= max_size):
-                    continue
+            # Apply size and date filters
+            if not scan_filter.accepts(file_size, file_mtime):
+                continue
 
-                # Apply date filter (only if cutoff_date is provided)
-                if cutoff_date and file_mtime > time.mktime(cutoff_date.timetuple()):
-                    continue
+            file_ext = file_extension(filename).lower()
 
-                # Categorize file
+            # Categorize file
+            if timing:
+                categorize_start = time.perf_counter()
+                category = categorize_file(filename, file_ext, rules)
+                categorize_seconds += time.perf_counter() - categorize_start
+            else:
                 category = categorize_file(filename, file_ext, rules)
+            categorized += 1
+
+            yield make_file_record(filename, entry.path, file_ext, file_size, file_mtime, category)
+    finally:
+        # Stops the parallel reader threads when the caller closes us early
+        entries.close()
+        if timing:
+            metrics.record_stage('scan', time.perf_counter() - started)
+            metrics.record_stage('categorize', categorize_seconds)
+            metrics.count('files_scanned', stat_calls - errors)
+            metrics.count('stat_calls', stat_calls)
+            metrics.count('rule_lookups', categorized)
+            metrics.count('scan_errors', errors)
+
+class ScanFilter:
+    """The filters dict passed to scan_files, prepared once per scan."""
+
+    def __init__(self, filters):
+        self.excluded_extensions = tuple(ext.lower() for ext in filters.get('excluded_extensions', []))
+        self.min_size = filters.get('min_size', 0)
+        self.max_size = filters.get('max_size', float('inf'))
+        cutoff_date = filters.get('cutoff_date', None)
+        self.cutoff_time = time.mktime(cutoff_date.timetuple()) if cutoff_date else None
+        self.rules = compile_rules(filters.get('rules', {}))
+        self.sniff_content = filters.get('sniff_content', False)
+
+    def is_excluded(self, filename):
+        """True if the name ends with one of the excluded extensions."""
+        return bool(self.excluded_extensions) and filename.lower().endswith(self.excluded_extensions)
+
+    def accepts(self, file_size, file_mtime):
+        """True if a file of this size and modification time passes the filters."""
+        if not (self.min_size <= file_size <= self.max_size):
+            return False
+        # Date filter only applies if cutoff_date is provided
+        if self.cutoff_time is not None and file_mtime > self.cutoff_time:
+            return False
+        return True
+
+class FileRecord:
+    """One scanned file, stored compactly.
+
+    Only the raw values are kept: name, path, extension, size in bytes,
+    modification time and category. Extensions and categories are interned,
+    so millions of records share a handful of strings. The display strings
+    'type', 'size' and 'modified' are formatted when they are read, which in
+    the preview means only for the rows on screen.
+
+    Records still read and write like the dicts scan_files used to return
+    (record['category'], record.get('duplicate_of'), dict(record), **record),
+    so callers and report exports work unchanged.
+    """
+
+    __slots__ = ('name', 'path', 'ext', 'size_bytes', 'mtime', 'category', 'duplicate_of')
+
+    # Keys of the dict view, in the order the old dicts had them
+    KEYS = ('name', 'type', 'size', 'size_bytes', 'category', 'path', 'modified')
+
+    def __init__(self, name, path, ext, size_bytes, mtime, category, duplicate_of=None):
+        self.name = name
+        self.path = path
+        self.ext = sys.intern(ext)
+        self.size_bytes = size_bytes
+        self.mtime = mtime
+        self.category = sys.intern(category)
+        self.duplicate_of = duplicate_of
+
+    @property
+    def type(self):
+        return self.ext or 'No Extension'
+
+    @property
+    def size(self):
+        return format_file_size(self.size_bytes)
+
+    @property
+    def modified(self):
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.mtime))
+
+    def __getitem__(self, key):
+        if key == 'duplicate_of':
+            if self.duplicate_of is None:
+                raise KeyError(key)
+            return self.duplicate_of
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key == 'category':
+            self.category = sys.intern(value)
+        elif key in ('name', 'path', 'size_bytes', 'duplicate_of'):
+            setattr(self, key, value)
+        else:
+            raise KeyError(f"{key} cannot be set on a file record")
+
+    def __contains__(self, key):
+        return key in self.KEYS or (key == 'duplicate_of' and self.duplicate_of is not None)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.KEYS + ('duplicate_of',) if self.duplicate_of is not None else self.KEYS
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
 
-                # Create structured file data
-                file_data = {
-                    'name': filename,
-                    'type': file_ext or 'No Extension',
-                    'size': format_file_size(file_size),
-                    'size_bytes': file_size,
-                    'category': category,
-                    'path': file_path,
-                    'modified': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(file_mtime))
-                }
-
-                valid_files.append(file_data)
-
-            except (OSError, IOError) as e:
-                print(f"Error processing {file_path}: {e}")
+    def to_dict(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        # Equal to another record with the same values, or to its dict view
+        if isinstance(other, FileRecord):
+            return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    # Records are mutable (category, duplicate_of), so they are not hashable
+    __hash__ = None
+
+    def __repr__(self):
+        return f"FileRecord({self.path!r}, {self.category!r})"
+
+def make_file_record(filename, file_path, file_ext, file_size, file_mtime, category):
+    """Create the structured file data returned by scan_files."""
+    return FileRecord(filename, file_path, file_ext, file_size, file_mtime, category)
+
+def iter_scan_batches(source_path, recursive, filters, workers=1, batch_size=500, interval=0.1, index=None):
+    """Group the records from iter_scan_files into lists for incremental display.
+
+    A batch is yielded once it holds batch_size records or interval seconds
+    have passed since the last one, whichever comes first, so the first
+    results show up quickly even on very large trees.
+
+    With filters['sniff_content'] set, files left in 'Other' are identified
+    by their content before their batch is yielded (see sniff_unknown_files).
+    """
+    sniff_content = filters.get('sniff_content', False)
+    batch = []
+    last_flush = time.monotonic()
+    for file_data in iter_scan_files(source_path, recursive, filters, workers, index):
+        batch.append(file_data)
+        now = time.monotonic()
+        if len(batch) >= batch_size or now - last_flush >= interval:
+            if sniff_content:
+                sniff_unknown_files(batch)
+            yield batch
+            batch = []
+            last_flush = now
+    if batch:
+        if sniff_content:
+            sniff_unknown_files(batch)
+        yield batch
+
+def sniff_unknown_files(file_records):
+    """Recategorize records in 'Other' by the magic bytes at the start of the file.
+
+    Only files whose extension is missing, ambiguous (.bin, .dat, ...) or
+    unknown are read, so a scan of ordinary files does no extra I/O.
+    Records are updated in place.
+    """
+    unknown = [
+        file_data for file_data in file_records
+        if file_data['category'] == 'Other'
+        and needs_sniffing(file_extension(file_data['name']).lower(), DEFAULT_CATEGORIES)
+    ]
+    if not unknown:
+        return
+    for file_data, detected_ext in zip(unknown, sniff_file_types([f['path'] for f in unknown])):
+        if detected_ext:
+            file_data['category'] = DEFAULT_CATEGORIES.get(detected_ext, 'Other')
+
+def file_extension(filename):
+    """Return the suffix of a bare filename, matching Path(filename).suffix."""
+    i = filename.rfind('.')
+    if 0 < i < len(filename) - 1:
+        return filename[i:]
+    return ''
+
+class _DirNode:
+    """One directory of a walk: its file entries and its subfolders, in listing order."""
+    __slots__ = ('path', 'entries', 'children', 'done')
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+        self.children = []
+        self.done = threading.Event()
+
+def _read_directory(node, recursive, skip_suffixes):
+    """Fill node with the files and subfolders of node.path using one os.scandir."""
+    try:
+        with os.scandir(node.path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if not is_dir:
+                    if skip_suffixes and entry.name.lower().endswith(skip_suffixes):
+                        continue
+                    node.entries.append(entry)
+                elif recursive and not entry.is_symlink():
+                    node.children.append(_DirNode(entry.path))
+    except OSError:
+        # Unreadable directories are skipped, as os.walk does
+        pass
+
+def _iter_file_entries(source_path, recursive, skip_suffixes=()):
+    """Yield os.DirEntry objects for files under source_path.
+
+    Uses os.scandir with an explicit stack instead of os.walk so the d_type
+    information and stat cache of each DirEntry can be reused by the caller.
+    Entries come out in the same top-down order as os.walk, and symlinked
+    directories are not followed. Names ending in skip_suffixes are dropped.
+    """
+    stack = [_DirNode(source_path)]
+    while stack:
+        node = stack.pop()
+        _read_directory(node, recursive, skip_suffixes)
+        yield from node.entries
+
+        # Push in reverse so subfolders are visited in listing order
+        stack.extend(reversed(node.children))
+
+def _iter_file_entries_parallel(source_path, recursive, skip_suffixes, workers):
+    """Parallel version of _iter_file_entries with the same output order.
+
+    Directories are read by a bounded pool of threads. Each thread works
+    depth-first from its own deque and steals the oldest (usually largest)
+    pending directory from another thread's deque when it runs dry. The
+    threads also stat every file entry so the caller's entry.stat() is
+    served from the DirEntry cache. Entries are yielded in top-down order
+    as soon as each directory is done, so results stream while the rest of
+    the tree is still being read.
+    """
+    root = _DirNode(source_path)
+    queues = [deque() for _ in range(workers)]
+    queues[0].append(root)
+    condition = threading.Condition()
+    state = {'pending': 1, 'stopped': False}
+
+    def take(index):
+        try:
+            return queues[index].pop()
+        except IndexError:
+            pass
+        for offset in range(1, workers):
+            try:
+                return queues[(index + offset) % workers].popleft()
+            except IndexError:
                 continue
+        return None
 
-        if not recursive:
-            break
+    def work(index):
+        while True:
+            node = take(index)
+            if node is None:
+                with condition:
+                    if state['pending'] == 0 or state['stopped']:
+                        return
+                    condition.wait(0.05)
+                continue
+
+            if not state['stopped']:
+                _read_directory(node, recursive, skip_suffixes)
+                for entry in node.entries:
+                    try:
+                        entry.stat()
+                    except OSError:
+                        # Reported by the caller when it stats the entry again
+                        pass
+
+            with condition:
+                state['pending'] += len(node.children)
+            queues[index].extend(node.children)
+            node.done.set()
+            with condition:
+                state['pending'] -= 1
+                condition.notify_all()
+
+    threads = [threading.Thread(target=work, args=(i,), daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
 
-    return valid_files
+    try:
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node.done.wait()
+            yield from node.entries
+            stack.extend(reversed(node.children))
+    finally:
+        # Also reached when the caller stops iterating early
+        with condition:
+            state['stopped'] = True
+            condition.notify_all()
+        for thread in threads:
+            thread.join()
 
 def categorize_file(filename, file_ext, rules):
-    """Categorize a file based on extension and custom rules."""
+    """Categorize a file based on extension and custom rules.
+
+    rules may be a plain dict or a RuleIndex from rule_engine.compile_rules;
+    pass a compiled index when categorizing many files with the same rules.
+    """
     # Check custom rules first
-    for pattern, category in rules.items():
-        if filename.lower().endswith(pattern.lower()) or file_ext.lower() == pattern.lower():
+    if rules:
+        category = compile_rules(rules).match_suffix(filename, file_ext)
+        if category is not None:
             return category
-    
+
     # Default categorization
-    image_exts = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp']
-    video_exts = ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v']
-    audio_exts = ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a']
-    document_exts = ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt', '.xls', '.xlsx', '.ppt', '.pptx']
-    archive_exts = ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2']
-    code_exts = ['.py', '.js', '.html', '.css', '.cpp', '.java', '.c', '.h']
-    
-    if file_ext.lower() in image_exts:
-        return 'Images'
-    elif file_ext.lower() in video_exts:
-        return 'Videos'
-    elif file_ext.lower() in audio_exts:
-        return 'Audio'
-    elif file_ext.lower() in document_exts:
-        return 'Documents'
-    elif file_ext.lower() in archive_exts:
-        return 'Archives'
-    elif file_ext.lower() in code_exts:
-        return 'Code Files'
-    else:
-        return 'Other'
+    return DEFAULT_CATEGORIES.get(file_ext.lower(), 'Other')
 
 def format_file_size(size_bytes):
     """Format file size in human-readable format."""
@@ -0,0 +1,254 @@
+"""Sort many source folders at once, with a limit on jobs per disk.
+
+A job is a dict, stored under "sort_jobs" in the config (scheduled jobs
+under "scheduled_jobs" use the same fields):
+
+    {
+        "id": "scans",
+        "name": "Scanner inbox",
+        "source": "/mnt/disk2/inbox/scans",
+        "destination": "/mnt/disk2/sorted",
+        "recursive": true,
+        "rules_file": "scan_rules.json",        # default: custom_rules.json
+        "filters": {"min_size": 0, "max_size": null, "modified_before": "2024-01-01",
+                    "excluded_extensions": [".tmp"]},   # default: the config's list
+        "ai_sorting": false,
+        "incremental": false,                   # scan through the scan index
+        "enabled": true
+    }
+
+Jobs on different disks (st_dev) run in parallel. A job counts against the
+disk of its source and the disk of its destination, and no disk runs more
+than its limit of jobs at once: jobs_per_device, or a per-disk value from
+device_limits ({"/mnt/disk2": 2}, keyed by any path on that disk). Each
+job is one sort, so it is one operation in the undo history.
+"""
+import os
+import threading
+from datetime import date
+
+def build_job_filters(job, config):
+    """The scan_files filters dict for a job, from its own filters and rules."""
+    from rule_loader import load_compiled_rules
+
+    filters = job.get('filters') or {}
+    modified_before = filters.get('modified_before')
+    return {
+        'excluded_extensions': filters.get('excluded_extensions', config.get('excluded_extensions', [])),
+        'min_size': filters.get('min_size') or 0,
+        'max_size': filters.get('max_size') or float('inf'),
+        'cutoff_date': date.fromisoformat(modified_before) if modified_before else None,
+        'rules': load_compiled_rules(job.get('rules_file')),
+        'sniff_content': config.get('content_sniffing', True)
+    }
+
+def run_sort_job(job, config=None, incremental=True, on_progress=None, on_error=None, check_interrupted=True):
+    """Scan a job's source folder and sort it into its destination as one undoable sort.
+
+    Args:
+        job (dict): The job (see the module docstring).
+        config (dict): App config; loaded if None.
+        incremental (bool): Scan through the scan index, so unchanged folders
+            are not listed again.
+        on_progress (callable): Passed to sort_journal.journaled_sort.
+        on_error (callable): Passed to sort_journal.journaled_sort.
+        check_interrupted (bool): Refuse to run while an earlier crashed sort
+            of the same source or destination is waiting to be rolled
+            forward or back. Interrupted sorts of other folders do not matter.
+
+    Returns:
+        dict: Counts: scanned, moved, failed, and with incremental,
+            dirs_skipped, dirs_scanned and dirs_failed.
+    """
+    from file_sorter import iter_scan_batches
+    from sort_journal import journaled_sort, find_interrupted_sorts
+
+    if config is None:
+        from config_manager import load_config
+        config = load_config()
+    source = os.path.expanduser(job['source'])
+    destination = os.path.abspath(os.path.expanduser(job['destination']))
+    if not os.path.isdir(source):
+        raise FileNotFoundError(f"Source folder does not exist: {source}")
+
+    if check_interrupted and any(journal.touches(source, destination) for journal in find_interrupted_sorts()):
+        raise RuntimeError(f"An interrupted sort of {source} or {destination} must be rolled forward or back "
+                           f"first (python -m cli recover)")
+
+    index = None
+    if incremental:
+        from scan_index import ScanIndex
+        index = ScanIndex()
+
+    files = []
+    batches = iter_scan_batches(source, job.get('recursive', True), build_job_filters(job, config),
+                                config.get('scan_workers', 0), index=index)
+    for batch in batches:
+        # Files already sorted into a destination inside the source stay put
+        files.extend(f for f in batch if not _is_inside(f['path'], destination))
+
+    if files and job.get('ai_sorting'):
+        from smart_sorting import build_keyword_matcher, smart_categorize_batch
+        matcher = build_keyword_matcher(config.get('smart_keywords', {}))
+        for file_data, smart_category in zip(files, smart_categorize_batch(files, matcher)):
+            if smart_category != file_data['category']:
+                file_data['category'] = f"AI: {smart_category}"
+
+    moved = []
+    if files:
+        moved = journaled_sort(files, destination, on_progress=on_progress, on_error=on_error,
+                               workers_per_device=config.get('move_workers_per_device', 4))
+    result = {'scanned': len(files), 'moved': len(moved), 'failed': len(files) - len(moved)}
+    if index is not None:
+        result['dirs_skipped'] = index.last_stats.get('dirs_skipped', 0)
+        result['dirs_scanned'] = index.last_stats.get('dirs_scanned', 0)
+        result['dirs_failed'] = index.last_stats.get('dirs_failed', 0)
+    return result
+
+class JobQueue:
+    """Runs sort jobs in parallel, limited per disk.
+
+    run() blocks until every job has finished and returns their results, so
+    call it from a worker thread in the GUI. Callbacks are made from the job
+    threads. A job whose folders have an interrupted sort waiting for
+    recovery fails on its own; the other jobs still run.
+    """
+
+    def __init__(self, jobs, config=None, jobs_per_device=1, device_limits=None, on_progress=None,
+                 on_job_finished=None, on_error=None, log=None):
+        """
+        Args:
+            jobs (list): Job dicts; disabled ones are skipped.
+            config (dict): App config; loaded if None.
+            jobs_per_device (int): Jobs that may use one disk at the same time.
+            device_limits (dict): Path on a disk -> its own limit.
+            on_progress (callable): Called with (job, moved_batch, totals) as
+                files are moved, where totals sums up every job so far:
+                jobs_done, jobs_total, files_done, files_total.
+            on_job_finished (callable): Called with (job, result) per job.
+            on_error (callable): Called with (job, failures) for files that could not be moved.
+            log (callable): Called with (message, level) for progress messages.
+        """
+        if config is None:
+            from config_manager import load_config
+            config = load_config()
+        self.config = config
+        self.jobs = [job for job in jobs if job.get('enabled', True)]
+        self.jobs_per_device = max(1, jobs_per_device)
+        self.on_progress = on_progress
+        self.on_job_finished = on_job_finished
+        self.on_error = on_error
+        self.log = log or (lambda message, level="INFO": print(f"{level}: {message}"))
+        self.results = {}
+        self._device_limits = {}
+        for path, limit in (device_limits or {}).items():
+            try:
+                self._device_limits[os.stat(os.path.expanduser(path)).st_dev] = max(1, int(limit))
+            except (OSError, ValueError) as e:
+                self.log(f"Ignoring device limit for {path}: {e}", "WARNING")
+        self._busy = {}
+        self._job_files = {}
+        self._cancelled = False
+        self._condition = threading.Condition()
+
+    def cancel(self):
+        """Start no more jobs; running jobs finish their sort."""
+        with self._condition:
+            self._cancelled = True
+            self._condition.notify_all()
+
+    def totals(self):
+        with self._condition:
+            return self._totals()
+
+    def run(self):
+        """Run every job and return {job id: result}; a failed job's result has an 'error'."""
+        pending = []
+        for job in self.jobs:
+            try:
+                pending.append((job, _job_devices(job)))
+            except OSError as e:
+                self._finish(job, None, {'error': str(e)})
+
+        threads = []
+        with self._condition:
+            while pending and not self._cancelled:
+                for entry in list(pending):
+                    job, devices = entry
+                    if all(self._busy.get(device, 0) < self._limit(device) for device in devices):
+                        for device in devices:
+                            self._busy[device] = self._busy.get(device, 0) + 1
+                        pending.remove(entry)
+                        thread = threading.Thread(target=self._run_job, args=(job, devices), daemon=True)
+                        threads.append(thread)
+                        thread.start()
+                if pending:
+                    # Woken when a job finishes and frees its disks
+                    self._condition.wait()
+
+        for thread in threads:
+            thread.join()
+        for job, devices in pending:
+            self.results[job['id']] = {'error': "Cancelled"}
+        return self.results
+
+    def _limit(self, device):
+        return self._device_limits.get(device, self.jobs_per_device)
+
+    def _run_job(self, job, devices):
+        name = job.get('name', job['id'])
+        self.log(f"Job {name} started: {job['source']} ➜ {job['destination']}", "INFO")
+
+        def progress(moved, done, total):
+            with self._condition:
+                self._job_files[job['id']] = (done, total)
+                totals = self._totals()
+            if self.on_progress:
+                self.on_progress(job, moved, totals)
+
+        def error(failures):
+            if self.on_error:
+                self.on_error(job, failures)
+
+        try:
+            result = run_sort_job(job, self.config, incremental=job.get('incremental', False),
+                                  on_progress=progress, on_error=error)
+        except Exception as e:
+            result = {'error': str(e)}
+        self._finish(job, devices, result)
+
+    def _finish(self, job, devices, result):
+        name = job.get('name', job['id'])
+        with self._condition:
+            self.results[job['id']] = result
+            for device in devices or ():
+                self._busy[device] -= 1
+            self._condition.notify_all()
+
+        if 'error' in result:
+            self.log(f"Job {name} failed: {result['error']}", "ERROR")
+        else:
+            self.log(f"Job {name} finished: {result['moved']} moved, {result['failed']} failed",
+                     "SUCCESS" if not result['failed'] else "WARNING")
+        if self.on_job_finished:
+            self.on_job_finished(job, result)
+
+    def _totals(self):
+        return {
+            'jobs_done': len(self.results),
+            'jobs_total': len(self.jobs),
+            'files_done': sum(done for done, total in self._job_files.values()),
+            'files_total': sum(total for done, total in self._job_files.values()),
+        }
+
+def _job_devices(job):
+    """The disks a job reads from and writes to."""
+    source = os.path.expanduser(job['source'])
+    destination = os.path.abspath(os.path.expanduser(job['destination']))
+    # The destination may not exist yet; its nearest existing parent is on the same disk
+    while not os.path.exists(destination) and os.path.dirname(destination) != destination:
+        destination = os.path.dirname(destination)
+    return sorted({os.stat(source).st_dev, os.stat(destination).st_dev})
+
+def _is_inside(path, folder):
+    return os.path.abspath(path).startswith(folder + os.sep)
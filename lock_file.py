@@ -0,0 +1,57 @@
+"""Lock files that record the PID of the process holding them.
+
+A lock left behind by a process that has died is stale and is taken over
+by the next process that asks for it. Used for scheduled jobs (scheduler.py)
+and for sorts in progress (sort_journal.py).
+"""
+import os
+import time
+
+def acquire_lock(lock_path):
+    """Create a lock file holding our PID; False if a live process holds it."""
+    for _ in range(2):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not lock_is_stale(lock_path):
+                return False
+            try:
+                os.remove(lock_path)
+            except OSError:
+                return False
+            continue
+        except OSError as e:
+            print(f"Could not create lock file {lock_path}: {e}")
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
+    return False
+
+def release_lock(lock_path):
+    try:
+        os.remove(lock_path)
+    except OSError:
+        pass
+
+def lock_is_stale(lock_path):
+    """A lock is stale when the process that wrote it is gone."""
+    try:
+        with open(lock_path, 'r') as f:
+            pid = int(f.read().strip() or 0)
+        age = time.time() - os.path.getmtime(lock_path)
+    except (OSError, ValueError):
+        return True
+    if pid <= 0:
+        # The holder may not have written its PID yet
+        return age > 60
+    if os.name == 'nt':
+        # os.kill would terminate the process on Windows; go by age instead
+        return age > 24 * 3600
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
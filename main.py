@@ -1,29 +1,248 @@
 import sys
 import os
-import shutil
+import html
 import threading
+import time
+import uuid
+import metrics
 from datetime import datetime, date
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QLineEdit, QGroupBox, QCheckBox,
-    QComboBox, QDateEdit, QListWidget, QTableWidget, QTableWidgetItem,
-    QFileDialog, QTextEdit, QSpinBox, QMessageBox, QHeaderView
+    QComboBox, QDateEdit, QDateTimeEdit, QListWidget, QTableView,
+    QFileDialog, QPlainTextEdit, QSpinBox, QMessageBox, QHeaderView
 )
-from PyQt6.QtCore import Qt, QDate, QTimer, pyqtSignal, QObject
+from PyQt6.QtCore import Qt, QDate, QDateTime, QTime, QTimer, pyqtSignal, QObject
 from PyQt6.QtGui import QPalette, QColor
 
 # Assuming these modules exist in the same directory or are in your PYTHONPATH
-from config_manager import load_config, save_config, export_config, import_config, export_report
-from file_sorter import scan_files
-from rule_loader import load_rules_from_json, save_rules_to_json, manage_rules_ui
-from undo_manager import undo_last_sort, log_sort_operation # Directly import log_sort_operation here
-from smart_sorting import smart_categorize
+from config_manager import load_config, save_config, export_config, import_config, export_report, subscribe_config
+from config_cache import check_for_changes
+from file_sorter import ScanFilter, iter_scan_batches
+from rule_loader import DEFAULT_RULES_FILE, load_compiled_rules, save_rules_to_json, manage_rules_ui, subscribe_rules
+from rule_engine import compile_rules
+from undo_manager import undo_last_sort
+from smart_sorting import smart_categorize_batch, build_keyword_matcher
 from directory_watcher import DirectoryWatcher
+from scan_index import ScanIndex
+from sort_journal import journaled_sort, find_interrupted_sorts
+from preview_model import PreviewTableModel
+from scan_columns import ScanColumns
+from console_log import LogSink, MAX_CONSOLE_LINES
+from duplicate_finder import DUPLICATE_POLICIES, find_duplicates, apply_duplicate_policy, link_duplicates
+from auto_sorter import AutoSorter
+from scheduler import FREQUENCIES, Scheduler, make_schedule
+from job_queue import JobQueue
+
+# Id of the job edited through the scheduling panel
+GUI_JOB_ID = "gui"
+CUSTOM_FREQUENCY = "Custom (cron)..."
 
 class WorkerSignals(QObject):
     finished = pyqtSignal(list)
     progress = pyqtSignal(str)
     error = pyqtSignal(str)
+    batch = pyqtSignal(list)
+    log = pyqtSignal(str, str)
+
+class ScanWorker:
+    """Runs a file scan on a background thread and reports through WorkerSignals.
+
+    Records are emitted in batches via ``batch`` while the scan runs, and the
+    complete list is emitted via ``finished`` at the end (also after a cancel).
+    """
+
+    def __init__(self, source_folder, recursive, filters, workers=0, ai_sorting=False, smart_keywords=None,
+                 index=None, detect_duplicates=False):
+        self.source_folder = source_folder
+        self.recursive = recursive
+        self.filters = filters
+        self.workers = workers
+        self.index = index
+        self.ai_sorting = ai_sorting
+        self.smart_keywords = smart_keywords
+        self.detect_duplicates = detect_duplicates
+        self.signals = WorkerSignals()
+        self.cancelled = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def run(self):
+        found_files = []
+        try:
+            if self.ai_sorting:
+                self.signals.progress.emit("Applying AI smart categorization...")
+                matcher = build_keyword_matcher(self.smart_keywords)
+
+            batches = iter_scan_batches(self.source_folder, self.recursive, self.filters, self.workers,
+                                        index=self.index)
+            for batch in batches:
+                if self.cancelled.is_set():
+                    batches.close()
+                    self.signals.progress.emit("Scan cancelled")
+                    break
+
+                # Apply AI sorting if enabled
+                if self.ai_sorting:
+                    ai_categories = smart_categorize_batch(batch, matcher)
+                    for file_data, ai_category in zip(batch, ai_categories):
+                        if ai_category != file_data['category']:
+                            file_data['category'] = f"AI: {ai_category}"
+
+                found_files.extend(batch)
+                self.signals.batch.emit(batch)
+
+            if self.index is not None:
+                stats = self.index.last_stats
+                self.signals.progress.emit(
+                    f"Incremental scan: {stats.get('dirs_skipped', 0)} unchanged folders reused, "
+                    f"{stats.get('dirs_scanned', 0)} rescanned, "
+                    f"{stats.get('dirs_failed', 0)} could not be read"
+                )
+
+            if self.detect_duplicates and not self.cancelled.is_set():
+                self.signals.progress.emit("Checking for duplicate files...")
+                groups = find_duplicates(found_files)
+                duplicate_count = sum(len(group) - 1 for group in groups)
+                self.signals.progress.emit(f"Found {duplicate_count} duplicate files in {len(groups)} groups")
+            self.signals.finished.emit(found_files)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+
+class SortWorker:
+    """Moves files with sort_journal.journaled_sort on a background thread.
+
+    Moved records are emitted in batches via ``batch``, per-file failures go
+    straight to the log sink, and the moved-files list (already logged for
+    undo) is emitted via ``finished``.
+
+    Given a journal instead, it rolls that interrupted sort forward (or back
+    with roll_back=True), reports the outcome via ``log`` and emits an empty
+    list via ``finished``.
+    """
+
+    def __init__(self, file_records, destination_folder, log_sink, workers_per_device=4, duplicate_policy=None,
+                 journal=None, roll_back=False):
+        self.file_records = file_records
+        self.log_sink = log_sink
+        self.destination_folder = destination_folder
+        self.workers_per_device = workers_per_device
+        self.duplicate_policy = duplicate_policy
+        self.journal = journal
+        self.roll_back = roll_back
+        self.signals = WorkerSignals()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def run(self):
+        if self.journal is not None:
+            self.recover()
+            return
+        try:
+            to_move, duplicates = self.file_records, []
+            if self.duplicate_policy:
+                to_move, duplicates = apply_duplicate_policy(self.file_records, self.duplicate_policy)
+
+            moved_files = journaled_sort(
+                to_move,
+                self.destination_folder,
+                on_progress=lambda moved, done, total: self.signals.batch.emit(moved),
+                on_error=self.report_errors,
+                workers_per_device=self.workers_per_device
+            )
+
+            if duplicates and self.duplicate_policy == 'link':
+                linked, errors = link_duplicates(duplicates, moved_files)
+                for message in errors:
+                    self.log_sink.emit(f"❌ {message}", "ERROR", group="Failed to link")
+                self.signals.log.emit(f"Replaced {linked} duplicates with links to the sorted copies", "INFO")
+            elif duplicates:
+                self.signals.log.emit(f"Skipped {len(duplicates)} duplicate files", "INFO")
+            self.signals.finished.emit(moved_files)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+
+    def recover(self):
+        try:
+            if self.roll_back:
+                success, message = self.journal.roll_back(workers_per_device=self.workers_per_device)
+            else:
+                success, message = self.journal.roll_forward(
+                    on_progress=lambda moved, done, total: self.signals.batch.emit(moved),
+                    on_error=self.report_errors,
+                    workers_per_device=self.workers_per_device
+                )
+            self.signals.log.emit(message, "SUCCESS" if success else "ERROR")
+            self.signals.finished.emit([])
+        except Exception as e:
+            self.signals.error.emit(str(e))
+
+    def report_errors(self, failures):
+        for file_data, e in failures:
+            self.log_sink.emit(f"❌ Failed to move {file_data['name']}: {e}", "ERROR", group="Failed to move")
+
+class JobQueueWorker:
+    """Runs the configured sort jobs with job_queue.JobQueue on a background thread.
+
+    Moved records go out via ``batch``, a running total via ``progress``,
+    per-job messages via ``log`` and the results via ``finished``.
+    """
+
+    def __init__(self, jobs, config, log_sink):
+        self.log_sink = log_sink
+        self.signals = WorkerSignals()
+        self.queue = JobQueue(
+            jobs, config,
+            jobs_per_device=config.get('jobs_per_device', 1),
+            device_limits=config.get('device_limits', {}),
+            on_progress=self.report_progress,
+            on_error=self.report_errors,
+            log=self.signals.log.emit
+        )
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        self.queue.cancel()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def run(self):
+        try:
+            results = self.queue.run()
+            self.signals.finished.emit([dict(result, job=job_id) for job_id, result in results.items()])
+        except Exception as e:
+            self.signals.error.emit(str(e))
+
+    def report_progress(self, job, moved, totals):
+        self.signals.batch.emit(moved)
+        self.signals.progress.emit(
+            f"Jobs: {totals['jobs_done']}/{totals['jobs_total']} done, "
+            f"{totals['files_done']}/{totals['files_total']} files moved"
+        )
+
+    def report_errors(self, job, failures):
+        for file_data, e in failures:
+            self.log_sink.emit(f"❌ Failed to move {file_data['name']}: {e}", "ERROR", group="Failed to move")
 
 class SmartFileSorter(QMainWindow):
     def __init__(self):
@@ -38,9 +257,24 @@ class SmartFileSorter(QMainWindow):
 
         # Initialize data
         self.current_files = []
+        self.scanned_files = []
+        self.scan_columns = None
+        self.scan_filter = None
         self.rules = {}
+        self.rules_file = DEFAULT_RULES_FILE
+        self.watched_rules_files = set()
         self.config = load_config()
+        if self.config.get('metrics_enabled', False):
+            metrics.enable()
         self.directory_watcher = None
+        self.auto_sorter = None
+        self.scheduler = None
+        self.watch_signals = WorkerSignals()
+        self.scan_worker = None
+        self.sort_worker = None
+        self.pending_recoveries = []
+        self.job_queue_worker = None
+        self.scan_total_bytes = 0
         self.dark_mode = False
 
         self.create_theme_toggle()
@@ -53,11 +287,29 @@ class SmartFileSorter(QMainWindow):
         self.create_console_area()
         self.create_footer()
 
+        # Watcher and auto-sort threads log through a signal so the console
+        # is only touched from the GUI thread
+        self.watch_signals.log.connect(self.log_to_console)
+
         # Load initial rules
         self.load_initial_rules()
+
+        # Pick up edits to the config and rules files while the app runs
+        subscribe_config(self.on_config_file_changed)
+        self.settings_timer = QTimer(self)
+        self.settings_timer.setInterval(2000)
+        self.settings_timer.timeout.connect(check_for_changes)
+        self.settings_timer.timeout.connect(self.update_schedule_status)
+        self.settings_timer.start()
+
+        # Jobs saved earlier (from this panel or added to the config by hand)
+        self.apply_scheduled_jobs()
         
         self.show()
 
+        # Ask about sorts interrupted by a crash once the window is up
+        QTimer.singleShot(0, self.recover_interrupted_sorts)
+
     def create_theme_toggle(self):
         toggle_button = QPushButton("🌙 Toggle Dark Mode")
         toggle_button.clicked.connect(self.toggle_theme)
@@ -74,8 +326,8 @@ class SmartFileSorter(QMainWindow):
                 QPushButton { background-color: #404040; border: 1px solid #555; padding: 5px; }
                 QPushButton:hover { background-color: #505050; }
                 QLineEdit, QComboBox, QSpinBox { background-color: #404040; border: 1px solid #555; padding: 2px; }
-                QTableWidget { background-color: #353535; alternate-background-color: #404040; }
-                QTextEdit { background-color: #1e1e1e; color: #fff; border: 1px solid #555; }
+                QTableView { background-color: #353535; alternate-background-color: #404040; }
+                QPlainTextEdit { background-color: #1e1e1e; color: #fff; border: 1px solid #555; }
             """)
         else:
             self.setStyleSheet("""
@@ -85,8 +337,8 @@ class SmartFileSorter(QMainWindow):
                 QPushButton { background-color: #f0f0f0; border: 1px solid #ccc; padding: 5px; }
                 QPushButton:hover { background-color: #e0e0e0; }
                 QLineEdit, QComboBox, QSpinBox { background-color: white; border: 1px solid #ccc; padding: 2px; }
-                QTableWidget { background-color: white; alternate-background-color: #f5f5f5; }
-                QTextEdit { background-color: white; color: black; border: 1px solid #ccc; }
+                QTableView { background-color: white; alternate-background-color: #f5f5f5; }
+                QPlainTextEdit { background-color: white; color: black; border: 1px solid #ccc; }
             """)
 
     def create_quick_start_panel(self):
@@ -130,8 +382,135 @@ class SmartFileSorter(QMainWindow):
         dest_row.addWidget(browse_dest_button)
         layout.addLayout(dest_row)
 
+        # Job queue: many source -> destination pairs, sorted in parallel across disks
+        layout.addWidget(QLabel("🗂️ Job Queue (each job keeps the folders, rules and filters it was added with):"))
+        self.job_list = QListWidget()
+        self.job_list.setMaximumHeight(80)
+        layout.addWidget(self.job_list)
+
+        job_row = QHBoxLayout()
+        add_job_button = QPushButton("➕ Add as Job")
+        add_job_button.clicked.connect(self.add_sort_job)
+        job_row.addWidget(add_job_button)
+        remove_job_button = QPushButton("🗑️ Remove Job")
+        remove_job_button.clicked.connect(self.remove_sort_job)
+        job_row.addWidget(remove_job_button)
+        self.run_jobs_button = QPushButton("▶️ Run All Jobs")
+        self.run_jobs_button.clicked.connect(self.run_sort_jobs)
+        job_row.addWidget(self.run_jobs_button)
+        self.cancel_jobs_button = QPushButton("⏹️ Stop Queue")
+        self.cancel_jobs_button.setEnabled(False)
+        self.cancel_jobs_button.clicked.connect(self.cancel_sort_jobs)
+        job_row.addWidget(self.cancel_jobs_button)
+        self.job_progress_label = QLabel("")
+        job_row.addWidget(self.job_progress_label)
+        layout.addLayout(job_row)
+        self.update_job_list()
+
         self.layout.addWidget(panel)
 
+    def update_job_list(self):
+        """Show the configured sort jobs."""
+        self.job_list.clear()
+        for job in self.config.get('sort_jobs', []):
+            text = f"{job.get('name', job['id'])}: {job['source']} ➜ {job['destination']}"
+            if job.get('rules_file'):
+                text += f" (rules: {os.path.basename(job['rules_file'])})"
+            if not job.get('enabled', True):
+                text += " [disabled]"
+            self.job_list.addItem(text)
+
+    def add_sort_job(self):
+        """Add the current folders, rules and filters to the job queue."""
+        source = self.source_folder_input.text().strip()
+        destination = self.destination_folder_input.text().strip()
+        if not source or not destination:
+            QMessageBox.warning(self, "Warning", "Select a source and a destination folder first!")
+            return
+        job = {
+            'id': uuid.uuid4().hex[:8],
+            'name': os.path.basename(os.path.normpath(source)) or source,
+            'source': source,
+            'destination': destination,
+            'recursive': self.scan_subfolders_checkbox.isChecked(),
+            'rules_file': self.rules_file if self.rules_file != DEFAULT_RULES_FILE else None,
+            'filters': {
+                'min_size': self.get_size_filter(),
+                'max_size': None,
+                'modified_before': (self.date_picker.date().toPyDate().isoformat()
+                                    if self.modified_filter_checkbox.isChecked() else None)
+            },
+            'ai_sorting': self.ai_sort_checkbox.isChecked(),
+            'enabled': True
+        }
+        self.config.setdefault('sort_jobs', []).append(job)
+        save_config(self.config)
+        self.update_job_list()
+        self.log_to_console(f"Added job {job['name']}: {source} ➜ {destination}", "SUCCESS")
+
+    def remove_sort_job(self):
+        """Remove the selected job from the queue."""
+        row = self.job_list.currentRow()
+        jobs = self.config.get('sort_jobs', [])
+        if row < 0 or row >= len(jobs):
+            return
+        job = jobs.pop(row)
+        save_config(self.config)
+        self.update_job_list()
+        self.log_to_console(f"Removed job {job.get('name', job['id'])}")
+
+    def run_sort_jobs(self):
+        """Sort every job in the queue, in parallel across disks."""
+        jobs = [job for job in self.config.get('sort_jobs', []) if job.get('enabled', True)]
+        if not jobs:
+            QMessageBox.information(self, "Job Queue", "Add a job first with \"Add as Job\".")
+            return
+        if self.job_queue_worker and self.job_queue_worker.is_running():
+            return
+        if self.sort_worker and self.sort_worker.is_running():
+            QMessageBox.warning(self, "Warning", "Wait for the current sort to finish first.")
+            return
+        reply = QMessageBox.question(
+            self, "Run Job Queue", f"Sort the files of {len(jobs)} job(s) now?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        self.job_queue_worker = JobQueueWorker(jobs, self.config, self.log_sink)
+        worker = self.job_queue_worker
+        worker.signals.batch.connect(self.on_sort_batch)
+        worker.signals.progress.connect(self.job_progress_label.setText)
+        worker.signals.log.connect(self.log_to_console)
+        worker.signals.finished.connect(self.on_sort_jobs_finished)
+        worker.signals.error.connect(self.on_sort_error)
+        worker.signals.error.connect(lambda message: self.on_sort_jobs_finished([]))
+        self.run_jobs_button.setEnabled(False)
+        self.cancel_jobs_button.setEnabled(True)
+        self.log_to_console(f"Running {len(jobs)} sort job(s)...")
+        worker.start()
+
+    def cancel_sort_jobs(self):
+        """Start no further jobs; running ones finish."""
+        if self.job_queue_worker and self.job_queue_worker.is_running():
+            self.job_queue_worker.cancel()
+            self.log_to_console("Stopping the job queue after the running jobs...", "WARNING")
+
+    def on_sort_jobs_finished(self, results):
+        """Sum up a finished job queue run."""
+        self.run_jobs_button.setEnabled(True)
+        self.cancel_jobs_button.setEnabled(False)
+        if not results:
+            return
+        moved = sum(result.get('moved', 0) for result in results)
+        failed_jobs = [result['job'] for result in results if 'error' in result]
+        self.job_progress_label.setText(f"Jobs done: {moved} files moved")
+        self.log_to_console(
+            f"Job queue finished: {len(results)} job(s), {moved} files moved, {len(failed_jobs)} job(s) failed",
+            "SUCCESS" if not failed_jobs else "WARNING"
+        )
+        self.export_metrics()
+
     def create_sorting_options_panel(self):
         panel = QGroupBox("⚙️ Sorting Options")
         layout = QVBoxLayout(panel)
@@ -144,6 +523,7 @@ class SmartFileSorter(QMainWindow):
         
         self.modified_filter_checkbox = QCheckBox("📅 Enable Modified Before Filter")
         self.modified_filter_checkbox.clicked.connect(self.toggle_date_picker)
+        self.modified_filter_checkbox.toggled.connect(self.refilter_preview)
         checkbox_row.addWidget(self.modified_filter_checkbox)
         layout.addLayout(checkbox_row)
 
@@ -153,6 +533,7 @@ class SmartFileSorter(QMainWindow):
         self.size_filter_combo = QComboBox()
         self.size_filter_combo.addItems(["Any Size", ">1MB", ">10MB", ">100MB", "Custom Size..."])
         self.size_filter_combo.currentTextChanged.connect(self.toggle_custom_size)
+        self.size_filter_combo.currentTextChanged.connect(self.refilter_preview)
         size_row.addWidget(self.size_filter_combo)
 
         self.custom_size_input = QSpinBox()
@@ -160,12 +541,14 @@ class SmartFileSorter(QMainWindow):
         self.custom_size_input.setMaximum(10240)
         self.custom_size_input.setValue(1)
         self.custom_size_input.setVisible(False)
+        self.custom_size_input.valueChanged.connect(self.refilter_preview)
         size_row.addWidget(self.custom_size_input)
         
         self.date_picker = QDateEdit()
         self.date_picker.setCalendarPopup(True)
         self.date_picker.setDate(QDate.currentDate())
         self.date_picker.setEnabled(False)
+        self.date_picker.dateChanged.connect(self.refilter_preview)
         size_row.addWidget(QLabel("Modified Before:"))
         size_row.addWidget(self.date_picker)
         layout.addLayout(size_row)
@@ -205,20 +588,30 @@ class SmartFileSorter(QMainWindow):
         self.preview_label.setStyleSheet("font-weight: bold; color: #2196F3;")
         layout.addWidget(self.preview_label)
 
-        self.preview_table = QTableWidget()
-        self.preview_table.setColumnCount(6)
-        self.preview_table.setHorizontalHeaderLabels(["File Name", "Type", "Size", "Category", "Modified", "Path"])
+        self.preview_filter_input = QLineEdit()
+        self.preview_filter_input.setPlaceholderText("🔍 Filter by name, category or path...")
+        self.preview_filter_input.textChanged.connect(self.filter_preview)
+        layout.addWidget(self.preview_filter_input)
+
+        # The view only formats the rows on screen, so huge scans stay responsive
+        self.preview_model = PreviewTableModel(self)
+        self.preview_table = QTableView()
+        self.preview_table.setModel(self.preview_model)
         self.preview_table.setAlternatingRowColors(True)
         self.preview_table.setSortingEnabled(True)
-        
+        self.preview_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+
         # Set column widths
         header = self.preview_table.horizontalHeader()
+        # Size columns to a sample of rows rather than every row
+        header.setResizeContentsPrecision(200)
         header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(4, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(5, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(6, QHeaderView.ResizeMode.ResizeToContents)
         
         layout.addWidget(self.preview_table)
 
@@ -239,6 +632,11 @@ class SmartFileSorter(QMainWindow):
         refresh_button.clicked.connect(self.start_sorting)
         button_row.addWidget(refresh_button)
 
+        self.cancel_scan_button = QPushButton("⏹️ Cancel Scan")
+        self.cancel_scan_button.clicked.connect(self.cancel_scan)
+        self.cancel_scan_button.setEnabled(False)
+        button_row.addWidget(self.cancel_scan_button)
+
         layout.addLayout(button_row)
         self.layout.addWidget(panel)
 
@@ -254,8 +652,24 @@ class SmartFileSorter(QMainWindow):
 
         self.ai_sort_checkbox = QCheckBox("🤖 Use AI Smart Sorting")
         checkbox_row.addWidget(self.ai_sort_checkbox)
+
+        self.auto_sort_checkbox = QCheckBox("🗂️ Auto-Sort New Files While Watching")
+        self.auto_sort_checkbox.setChecked(self.config.get('auto_sort', False))
+        checkbox_row.addWidget(self.auto_sort_checkbox)
         layout.addLayout(checkbox_row)
 
+        duplicate_row = QHBoxLayout()
+        self.duplicates_checkbox = QCheckBox("🧬 Detect Duplicate Files")
+        self.duplicates_checkbox.setChecked(self.config.get('detect_duplicates', False))
+        duplicate_row.addWidget(self.duplicates_checkbox)
+
+        duplicate_row.addWidget(QLabel("Duplicates:"))
+        self.duplicate_policy_combo = QComboBox()
+        self.duplicate_policy_combo.addItems(DUPLICATE_POLICIES)
+        self.duplicate_policy_combo.setCurrentText(self.config.get('duplicate_policy', 'skip'))
+        duplicate_row.addWidget(self.duplicate_policy_combo)
+        layout.addLayout(duplicate_row)
+
         # Action buttons
         button_row = QHBoxLayout()
         
@@ -275,41 +689,177 @@ class SmartFileSorter(QMainWindow):
         self.layout.addWidget(panel)
 
     def create_scheduling_panel(self):
-        panel = QGroupBox("⏰ Scheduling (Future Feature)")
-        layout = QHBoxLayout(panel)
+        panel = QGroupBox("⏰ Scheduling")
+        layout = QVBoxLayout(panel)
+        row = QHBoxLayout()
 
         self.frequency_combo = QComboBox()
-        self.frequency_combo.addItems(["Hourly", "Daily", "Weekly", "Monthly"])
-        layout.addWidget(QLabel("Frequency:"))
-        layout.addWidget(self.frequency_combo)
-
-        self.time_picker = QDateEdit()
+        self.frequency_combo.addItems(list(FREQUENCIES) + [CUSTOM_FREQUENCY])
+        row.addWidget(QLabel("Frequency:"))
+        row.addWidget(self.frequency_combo)
+
+        self.cron_input = QLineEdit()
+        self.cron_input.setPlaceholderText("*/30 * * * *")
+        self.cron_input.setToolTip("minute hour day-of-month month day-of-week")
+        self.cron_input.setVisible(False)
+        row.addWidget(self.cron_input)
+
+        # Defaults to the next full hour
+        next_hour = QDateTime.currentDateTime().addSecs(3600)
+        self.time_picker = QDateTimeEdit(QDateTime(next_hour.date(), QTime(next_hour.time().hour(), 0)))
         self.time_picker.setCalendarPopup(True)
-        self.time_picker.setDate(QDate.currentDate())
-        layout.addWidget(QLabel("Next Run:"))
-        layout.addWidget(self.time_picker)
+        self.time_picker.setDisplayFormat("yyyy-MM-dd HH:mm")
+        row.addWidget(QLabel("Next Run:"))
+        row.addWidget(self.time_picker)
 
         self.enable_scheduler_checkbox = QCheckBox("📅 Enable Scheduler")
-        layout.addWidget(self.enable_scheduler_checkbox)
+        row.addWidget(self.enable_scheduler_checkbox)
+
+        self.run_scheduled_now_button = QPushButton("▶️ Run Now")
+        self.run_scheduled_now_button.clicked.connect(self.run_scheduled_job_now)
+        row.addWidget(self.run_scheduled_now_button)
+        layout.addLayout(row)
+
+        self.schedule_status_label = QLabel("Scheduler off")
+        self.schedule_status_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.schedule_status_label)
+
+        self.restore_scheduled_job()
+        self.frequency_combo.currentTextChanged.connect(self.update_scheduled_job)
+        self.cron_input.editingFinished.connect(self.update_scheduled_job)
+        self.time_picker.dateTimeChanged.connect(self.update_scheduled_job)
+        self.enable_scheduler_checkbox.toggled.connect(self.update_scheduled_job)
 
         self.layout.addWidget(panel)
 
+    def restore_scheduled_job(self):
+        """Fill the scheduling panel from the saved panel job."""
+        job = next((job for job in self.config.get('scheduled_jobs', []) if job.get('id') == GUI_JOB_ID), None)
+        if job is None:
+            return
+        frequency = job.get('frequency', 'Daily')
+        if frequency in FREQUENCIES:
+            self.frequency_combo.setCurrentText(frequency)
+        else:
+            self.frequency_combo.setCurrentText(CUSTOM_FREQUENCY)
+            self.cron_input.setText(frequency)
+        self.cron_input.setVisible(frequency not in FREQUENCIES)
+        if job.get('start'):
+            self.time_picker.setDateTime(QDateTime.fromString(job['start'], Qt.DateFormat.ISODate))
+        self.enable_scheduler_checkbox.setChecked(job.get('enabled', False))
+
+    def build_scheduled_job(self):
+        """The panel's job: sort the current source folder into the current destination."""
+        frequency = self.frequency_combo.currentText()
+        if frequency == CUSTOM_FREQUENCY:
+            frequency = self.cron_input.text().strip()
+        return {
+            'id': GUI_JOB_ID,
+            'name': "Scheduled sort",
+            'source': self.source_folder_input.text().strip(),
+            'destination': self.destination_folder_input.text().strip(),
+            'recursive': self.scan_subfolders_checkbox.isChecked(),
+            'frequency': frequency,
+            'start': self.time_picker.dateTime().toString("yyyy-MM-dd'T'HH:mm"),
+            'ai_sorting': self.ai_sort_checkbox.isChecked(),
+            'enabled': self.enable_scheduler_checkbox.isChecked()
+        }
+
+    def update_scheduled_job(self, *args):
+        """Save the panel's job and hand every configured job to the scheduler."""
+        self.cron_input.setVisible(self.frequency_combo.currentText() == CUSTOM_FREQUENCY)
+        job = self.build_scheduled_job()
+        if job['enabled']:
+            problem = None
+            if not job['source'] or not job['destination']:
+                problem = "Select a source and a destination folder before enabling the scheduler."
+            else:
+                try:
+                    make_schedule(job)
+                except ValueError as e:
+                    problem = str(e)
+            if problem:
+                self.log_to_console(f"Scheduler not enabled: {problem}", "WARNING")
+                # Unchecking calls back in here and saves the job as disabled
+                self.enable_scheduler_checkbox.setChecked(False)
+                return
+
+        jobs = [other for other in self.config.get('scheduled_jobs', []) if other.get('id') != GUI_JOB_ID]
+        self.config['scheduled_jobs'] = jobs + [job]
+        save_config(self.config)
+        self.apply_scheduled_jobs()
+        if job['enabled']:
+            next_run = self.scheduler.next_run(GUI_JOB_ID)
+            self.log_to_console(f"Scheduled sort enabled; next run {next_run:%Y-%m-%d %H:%M}", "SUCCESS")
+
+    def apply_scheduled_jobs(self):
+        """Start, update or stop the background scheduler to match the configured jobs."""
+        jobs = self.config.get('scheduled_jobs', [])
+        if self.scheduler is None:
+            if not any(job.get('enabled', True) for job in jobs):
+                return
+            self.scheduler = Scheduler(jobs, log=self.watch_signals.log.emit)
+        else:
+            self.scheduler.set_jobs(jobs)
+        if self.scheduler.jobs():
+            self.scheduler.start()
+        else:
+            self.scheduler.stop()
+        self.update_schedule_status()
+
+    def run_scheduled_job_now(self):
+        """Run the panel's scheduled sort immediately."""
+        if not self.scheduler or not self.scheduler.run_now(GUI_JOB_ID):
+            if self.scheduler and self.scheduler.is_active(GUI_JOB_ID):
+                self.log_to_console("The scheduled sort is already running", "WARNING")
+            else:
+                self.log_to_console("Enable the scheduler first", "WARNING")
+        self.update_schedule_status()
+
+    def update_schedule_status(self):
+        """Show the next run and the result of the last run."""
+        if not self.scheduler or not self.scheduler.jobs():
+            self.schedule_status_label.setText("Scheduler off")
+            return
+        parts = []
+        for job in self.scheduler.jobs():
+            name = job.get('name', job['id'])
+            if self.scheduler.is_active(job['id']):
+                parts.append(f"{name}: running")
+                continue
+            next_run = self.scheduler.next_run(job['id'])
+            text = f"{name}: next {next_run:%Y-%m-%d %H:%M}"
+            last = self.scheduler.last_run(job['id'])
+            if last:
+                text += f" (last {last['started'].replace('T', ' ')}, {last['status']}, {last['seconds']:.1f} s)"
+            parts.append(text)
+        self.schedule_status_label.setText(" | ".join(parts))
+
     def create_console_area(self):
         panel = QGroupBox("💻 Console Output")
         layout = QVBoxLayout(panel)
         
-        self.console_output = QTextEdit()
+        self.console_output = QPlainTextEdit()
         self.console_output.setReadOnly(True)
+        # Oldest lines are dropped so the console never grows without limit
+        self.console_output.setMaximumBlockCount(MAX_CONSOLE_LINES)
         self.console_output.setMaximumHeight(150)
         self.console_output.setStyleSheet("font-family: 'Courier New', monospace; font-size: 10px;")
         layout.addWidget(self.console_output)
         
         # Add clear button
         clear_button = QPushButton("🗑️ Clear Console")
-        clear_button.clicked.connect(self.console_output.clear)
+        clear_button.clicked.connect(self.clear_console)
         layout.addWidget(clear_button, alignment=Qt.AlignmentFlag.AlignRight)
         
         self.layout.addWidget(panel)
+
+        # Messages are buffered and written to the console a few times a second
+        self.log_sink = LogSink()
+        self.console_timer = QTimer(self)
+        self.console_timer.setInterval(200)
+        self.console_timer.timeout.connect(self.flush_console)
+        self.console_timer.start()
         
         # Initial console message
         self.log_to_console("Smart File Sorter initialized successfully!", "SUCCESS")
@@ -320,10 +870,20 @@ class SmartFileSorter(QMainWindow):
         footer.setStyleSheet("color: gray; font-size: 10px; margin: 5px;")
         self.layout.addWidget(footer)
 
-    def log_to_console(self, message, level="INFO"):
-        """Log messages to the console with timestamps and colors."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
+    def log_to_console(self, message, level="INFO", group=None):
+        """Log a message to the console; it shows up on the next flush.
+
+        Pass a group (e.g. "Moved") for per-file messages so a large batch of
+        them is collapsed into one summary line. Safe to call from any thread.
+        """
+        self.log_sink.emit(message, level, group)
+
+    def flush_console(self):
+        """Append everything logged since the last flush in one update."""
+        lines = self.log_sink.drain()
+        if not lines:
+            return
+
         color_map = {
             "INFO": "#2196F3",
             "SUCCESS": "#4CAF50", 
@@ -331,14 +891,21 @@ class SmartFileSorter(QMainWindow):
             "ERROR": "#f44336"
         }
         
-        color = color_map.get(level, "#000000")
-        formatted_message = f'<span style="color: {color};">[{timestamp}] {level}: {message}</span>'
-        
-        self.console_output.append(formatted_message)
+        # Repaint once for the whole batch rather than once per line
+        self.console_output.setUpdatesEnabled(False)
+        for timestamp, level, message in lines[-MAX_CONSOLE_LINES:]:
+            color = color_map.get(level, "#000000")
+            self.console_output.appendHtml(
+                f'<span style="color: {color};">[{timestamp}] {level}: {html.escape(message)}</span>'
+            )
+        self.console_output.setUpdatesEnabled(True)
         self.console_output.verticalScrollBar().setValue(
             self.console_output.verticalScrollBar().maximum()
         )
 
+    def clear_console(self):
+        self.console_output.clear()
+
     def browse_source_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Source Folder")
         if folder:
@@ -354,7 +921,8 @@ class SmartFileSorter(QMainWindow):
     def load_initial_rules(self):
         """Load initial rules on startup."""
         try:
-            self.rules = load_rules_from_json()
+            self.rules = load_compiled_rules()
+            self.watch_rules_file(DEFAULT_RULES_FILE)
             self.log_to_console(f"Loaded {len(self.rules)} custom rules")
         except Exception as e:
             self.log_to_console(f"Failed to load rules: {e}", "ERROR")
@@ -367,7 +935,8 @@ class SmartFileSorter(QMainWindow):
         )
         if file_path:
             try:
-                self.rules = load_rules_from_json(file_path)
+                self.rules = load_compiled_rules(file_path)
+                self.watch_rules_file(file_path)
                 self.log_to_console(f"Successfully loaded {len(self.rules)} rules from {file_path}", "SUCCESS")
                 QMessageBox.information(self, "Success", f"Loaded {len(self.rules)} rules successfully!")
             except Exception as e:
@@ -380,11 +949,39 @@ class SmartFileSorter(QMainWindow):
         # For now, use console-based management
         # In a full implementation, this would open a GUI dialog
         try:
-            self.rules = manage_rules_ui()
+            self.rules = compile_rules(manage_rules_ui())
+            self.rules_file = DEFAULT_RULES_FILE
+            if self.auto_sorter:
+                self.auto_sorter.set_rules(self.rules)
             self.log_to_console("Rules management completed", "SUCCESS")
         except Exception as e:
             self.log_to_console(f"Rules management failed: {e}", "ERROR")
 
+    def watch_rules_file(self, rules_file):
+        """Make rules_file the active rules, reloaded automatically when it is edited."""
+        if self.auto_sorter:
+            self.auto_sorter.set_rules(self.rules)
+        self.rules_file = rules_file
+        if rules_file not in self.watched_rules_files:
+            self.watched_rules_files.add(rules_file)
+            subscribe_rules(lambda rules: self.on_rules_file_changed(rules_file, rules), rules_file)
+
+    def on_rules_file_changed(self, rules_file, rules):
+        """Swap in rules that were edited on disk."""
+        if rules_file != self.rules_file:
+            return
+        self.rules = rules
+        if self.auto_sorter:
+            self.auto_sorter.set_rules(rules)
+        self.log_to_console(f"Reloaded {len(rules)} rules from {rules_file}; refresh the preview to apply them", "INFO")
+
+    def on_config_file_changed(self, config):
+        """Take over settings edited in the config file while the app runs."""
+        self.config = config
+        self.update_ui_from_config()
+        self.apply_scheduled_jobs()
+        self.log_to_console("Configuration file changed on disk - settings reloaded", "INFO")
+
     def update_excluded_extensions_list(self):
         """Update the excluded extensions list display."""
         self.excluded_extensions_list.clear()
@@ -406,32 +1003,71 @@ class SmartFileSorter(QMainWindow):
     def start_directory_watching(self, directory):
         """Start watching directory for changes."""
         try:
-            self.directory_watcher = DirectoryWatcher(directory, self.on_directory_change)
+            self.directory_watcher = DirectoryWatcher(
+                directory, self.on_directory_change, backend=self.config.get('watch_backend', 'auto')
+            )
             if self.directory_watcher.start_watching():
-                self.log_to_console(f"Started watching directory: {directory}", "SUCCESS")
+                self.log_to_console(
+                    f"Started watching directory: {directory} ({self.directory_watcher.active_backend})", "SUCCESS"
+                )
+                if self.auto_sort_checkbox.isChecked():
+                    self.start_auto_sort()
             else:
                 self.log_to_console("Failed to start directory watching", "ERROR")
         except Exception as e:
             self.log_to_console(f"Directory watching error: {e}", "ERROR")
 
+    def start_auto_sort(self):
+        """Sort files from the watched folder into the destination once they settle."""
+        destination_folder = self.destination_folder_input.text().strip()
+        if not destination_folder:
+            self.log_to_console("Auto-sort needs a destination folder; only logging changes", "WARNING")
+            return
+
+        categorize = None
+        if self.ai_sort_checkbox.isChecked():
+            matcher = build_keyword_matcher(self.config.get('smart_keywords', {}))
+
+            def categorize(record):
+                ai_category = smart_categorize_batch([record], matcher)[0]
+                return f"AI: {ai_category}" if ai_category != record['category'] else record['category']
+
+        self.auto_sorter = AutoSorter(
+            destination_folder,
+            self.build_filters(),
+            settle_seconds=self.config.get('auto_sort_settle_seconds', 3.0),
+            categorize=categorize,
+            log=self.watch_signals.log.emit,
+            workers_per_device=self.config.get('move_workers_per_device', 4)
+        )
+        self.auto_sorter.start()
+        self.log_to_console(f"Auto-sorting settled files into: {destination_folder}", "SUCCESS")
+
     def stop_directory_watching(self):
         """Stop directory watching."""
+        if self.auto_sorter:
+            self.auto_sorter.stop()
+            self.auto_sorter = None
         if self.directory_watcher:
             self.directory_watcher.stop_watching()
             self.log_to_console("Stopped directory watching", "INFO")
 
     def on_directory_change(self, changes):
-        """Handle directory change events."""
+        """Handle directory change events (called from the watcher thread)."""
         added_count = len(changes.get('added', []))
         modified_count = len(changes.get('modified', []))
         deleted_count = len(changes.get('deleted', []))
         
         if added_count > 0:
-            self.log_to_console(f"Detected {added_count} new files", "INFO")
+            self.watch_signals.log.emit(f"Detected {added_count} new files", "INFO")
         if modified_count > 0:
-            self.log_to_console(f"Detected {modified_count} modified files", "INFO")
+            self.watch_signals.log.emit(f"Detected {modified_count} modified files", "INFO")
         if deleted_count > 0:
-            self.log_to_console(f"Detected {deleted_count} deleted files", "INFO")
+            self.watch_signals.log.emit(f"Detected {deleted_count} deleted files", "INFO")
+
+        auto_sorter = self.auto_sorter
+        if auto_sorter:
+            auto_sorter.handle_changes(changes)
 
     def get_size_filter(self):
         """Get the size filter in bytes."""
@@ -447,6 +1083,17 @@ class SmartFileSorter(QMainWindow):
         else:
             return size_map.get(size_option, 0)
 
+    def build_filters(self):
+        """Collect the scan filters from the current UI settings."""
+        return {
+            'excluded_extensions': self.config.get('excluded_extensions', []),
+            'min_size': self.get_size_filter(),
+            'max_size': float('inf'),
+            'cutoff_date': self.date_picker.date().toPyDate() if self.modified_filter_checkbox.isChecked() else None,
+            'rules': self.rules,
+            'sniff_content': self.config.get('content_sniffing', True)
+        }
+
     def start_sorting(self):
         """Start the file sorting process."""
         source_folder = self.source_folder_input.text().strip()
@@ -463,58 +1110,131 @@ class SmartFileSorter(QMainWindow):
 
         self.log_to_console(f"Starting file scan in: {source_folder}")
         
-        # Prepare filters
-        filters = {
-            'excluded_extensions': self.config.get('excluded_extensions', []),
-            'min_size': self.get_size_filter(),
-            'max_size': float('inf'),
-            'cutoff_date': self.date_picker.date().toPyDate() if self.modified_filter_checkbox.isChecked() else None,
-            'rules': self.rules
-        }
+        # Size and date filters are applied to the scan results, not the walk,
+        # so changing them later re-filters without scanning again
+        filters = self.build_filters()
+        self.scan_filter = ScanFilter(filters)
+        filters.update(min_size=0, max_size=float('inf'), cutoff_date=None)
 
-        try:
-            # Scan files
-            found_files = scan_files(
-                source_folder, 
-                recursive=self.scan_subfolders_checkbox.isChecked(), 
-                filters=filters
+        # Only one scan at a time; a refresh replaces the running one
+        if self.scan_worker and self.scan_worker.is_running():
+            self.scan_worker.cancel()
+
+        self.current_files = []
+        self.scanned_files = []
+        self.scan_columns = None
+        self.scan_total_bytes = 0
+        self.preview_table.setSortingEnabled(False)
+        self.preview_model.clear()
+        self.preview_label.setText("📊 Scanning... 0 files (0 B)")
+
+        self.scan_worker = ScanWorker(
+            source_folder,
+            recursive=self.scan_subfolders_checkbox.isChecked(),
+            filters=filters,
+            workers=self.config.get('scan_workers', 0),
+            ai_sorting=self.ai_sort_checkbox.isChecked(),
+            smart_keywords=self.config.get('smart_keywords', {}),
+            index=ScanIndex() if self.config.get('incremental_scan', False) else None,
+            detect_duplicates=self.duplicates_checkbox.isChecked()
+        )
+        worker = self.scan_worker
+        worker.signals.batch.connect(lambda batch: self.on_scan_batch(worker, batch))
+        worker.signals.finished.connect(lambda files: self.on_scan_finished(worker, files))
+        worker.signals.error.connect(lambda message: self.on_scan_error(worker, message))
+        worker.signals.progress.connect(self.log_to_console)
+        self.cancel_scan_button.setEnabled(True)
+        worker.start()
+
+    def cancel_scan(self):
+        """Stop the running scan, keeping the files found so far."""
+        if self.scan_worker and self.scan_worker.is_running():
+            self.scan_worker.cancel()
+            self.log_to_console("Cancelling scan...", "WARNING")
+
+    def on_scan_batch(self, worker, batch):
+        """Append a batch of scanned files to the preview while the scan runs."""
+        if worker is not self.scan_worker:
+            return
+        batch = [f for f in batch if self.scan_filter.accepts(f.size_bytes, f.mtime)]
+        self.append_preview_rows(batch)
+        self.scan_total_bytes += sum(f.size_bytes for f in batch)
+        row_count = self.preview_model.record_count()
+        size_str = self.format_file_size(self.scan_total_bytes)
+        self.preview_label.setText(f"📊 Scanning... {row_count} files ({size_str})")
+
+    def on_scan_finished(self, worker, found_files):
+        """Finalize the preview once the background scan is done."""
+        if worker is not self.scan_worker:
+            return
+        self.scanned_files = found_files
+        self.scan_columns = ScanColumns(found_files)
+        mask = self.scan_columns.mask(self.build_filters())
+        self.current_files = self.scan_columns.select(mask)
+        if any(f.get('duplicate_of') for f in self.current_files):
+            # Rows went in before the duplicate check ran
+            self.preview_model.refresh()
+        # Re-enabling sorting applies the current sort to the complete list
+        self.preview_table.setSortingEnabled(True)
+        self.cancel_scan_button.setEnabled(False)
+
+        summary = self.scan_columns.summary(mask)
+        size_str = self.format_file_size(summary['bytes'])
+        self.preview_label.setText(f"📊 Files Ready to Sort: {summary['files']} files ({size_str})")
+        self.log_to_console(f"Scan completed: Found {summary['files']} files ({size_str})", "SUCCESS")
+        for category, totals in sorted(summary['categories'].items(), key=lambda item: -item[1]['bytes']):
+            self.log_to_console(
+                f"  {category}: {totals['files']} files ({self.format_file_size(totals['bytes'])})", "INFO"
             )
-            
-            # Apply AI sorting if enabled
-            if self.ai_sort_checkbox.isChecked():
-                self.log_to_console("Applying AI smart categorization...")
-                for file_data in found_files:
-                    ai_category = smart_categorize(file_data['path'])
-                    if ai_category != file_data['category']:
-                        file_data['category'] = f"AI: {ai_category}"
-
-            self.current_files = found_files
-            self.update_preview_table(found_files)
-            
-            total_size = sum(f['size_bytes'] for f in found_files)
-            size_str = self.format_file_size(total_size)
-            
-            self.preview_label.setText(f"📊 Files Ready to Sort: {len(found_files)} files ({size_str})")
-            self.log_to_console(f"Scan completed: Found {len(found_files)} files ({size_str})", "SUCCESS")
-            
-        except Exception as e:
-            self.log_to_console(f"Error during file scan: {e}", "ERROR")
-            QMessageBox.critical(self, "Error", f"Error during file scan: {e}")
+
+    def refilter_preview(self, *args):
+        """Apply changed size and date filters to the last scan without scanning again."""
+        if self.scan_columns is None or (self.scan_worker and self.scan_worker.is_running()):
+            return
+        start = time.perf_counter()
+        mask = self.scan_columns.mask(self.build_filters())
+        self.current_files = self.scan_columns.select(mask)
+        summary = self.scan_columns.summary(mask)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.update_preview_table(self.current_files)
+        size_str = self.format_file_size(summary['bytes'])
+        self.preview_label.setText(f"📊 Files Ready to Sort: {summary['files']} files ({size_str})")
+        self.log_to_console(
+            f"Filters applied: {summary['files']} of {len(self.scan_columns)} scanned files ({elapsed_ms:.0f} ms)"
+        )
+
+    def on_scan_error(self, worker, message):
+        """Report a failed background scan."""
+        if worker is not self.scan_worker:
+            return
+        self.preview_table.setSortingEnabled(True)
+        self.cancel_scan_button.setEnabled(False)
+        self.log_to_console(f"Error during file scan: {message}", "ERROR")
+        QMessageBox.critical(self, "Error", f"Error during file scan: {message}")
 
     def update_preview_table(self, files):
-        """Update the preview table with file data."""
-        self.preview_table.setRowCount(len(files))
-        
-        for row, file_data in enumerate(files):
-            self.preview_table.setItem(row, 0, QTableWidgetItem(file_data['name']))
-            self.preview_table.setItem(row, 1, QTableWidgetItem(file_data['type']))
-            self.preview_table.setItem(row, 2, QTableWidgetItem(file_data['size']))
-            self.preview_table.setItem(row, 3, QTableWidgetItem(file_data['category']))
-            self.preview_table.setItem(row, 4, QTableWidgetItem(file_data['modified']))
-            self.preview_table.setItem(row, 5, QTableWidgetItem(file_data['path']))
+        """Update the preview table with file data, keeping the sort order."""
+        self.preview_model.set_records(files)
+
+    def append_preview_rows(self, files):
+        """Add rows for files to the end of the preview table."""
+        self.preview_model.append_records(files)
+
+    def filter_preview(self, text):
+        """Show only the preview rows matching the filter box."""
+        self.preview_model.set_filter(text)
 
     def execute_sort(self):
         """Execute the actual file sorting."""
+        if self.scan_worker and self.scan_worker.is_running():
+            QMessageBox.warning(self, "Warning", "Please wait for the scan to finish first.")
+            return
+
+        if (self.sort_worker and self.sort_worker.is_running()) or self.pending_recoveries:
+            QMessageBox.warning(self, "Warning", "A sort is already running.")
+            return
+
         if not self.current_files:
             QMessageBox.warning(self, "Warning", "No files to sort! Please run a scan first.")
             return
@@ -536,34 +1256,91 @@ class SmartFileSorter(QMainWindow):
 
         self.log_to_console(f"Starting file sort operation for {len(self.current_files)} files...")
 
-        moved_files = []
-        for file_data in self.current_files:
-            category_folder = os.path.join(destination_folder, file_data['category'])
-            os.makedirs(category_folder, exist_ok=True)  # ✅ Ensure folder exists
-
-            destination_path = os.path.join(category_folder, file_data['name'])
-
-            try:
-                shutil.move(file_data['path'], destination_path)  # ✅ Actually move the file
-                moved_files.append({
-                    'original_path': file_data['path'],
-                    'new_path': destination_path,
-                    'category': file_data['category']
-                })
-                self.log_to_console(f"✅ Moved: {file_data['name']} ➜ {file_data['category']}", "INFO")
-            except Exception as e:
-                self.log_to_console(f"❌ Failed to move {file_data['name']}: {e}", "ERROR")
-
-        # After the for loop ends, log the operation and give feedback
-        log_sort_operation(moved_files) # Corrected indentation and used imported function directly
-
+        # Moves run in the background; the worker logs the operation for undo
+        self.sort_worker = SortWorker(
+            self.current_files,
+            destination_folder,
+            log_sink=self.log_sink,
+            workers_per_device=self.config.get('move_workers_per_device', 4),
+            duplicate_policy=self.duplicate_policy_combo.currentText() if self.duplicates_checkbox.isChecked() else None
+        )
+        self.sort_worker.signals.batch.connect(self.on_sort_batch)
+        self.sort_worker.signals.log.connect(self.log_to_console)
+        self.sort_worker.signals.finished.connect(self.on_sort_finished)
+        self.sort_worker.signals.error.connect(self.on_sort_error)
+        self.sort_worker.start()
+
+    def on_sort_batch(self, moved):
+        """Log a batch of moved files."""
+        for file_data in moved:
+            self.log_to_console(f"✅ Moved: {file_data['name']} ➜ {file_data['category']}", "INFO", group="Moved")
+
+    def on_sort_finished(self, moved_files):
+        """Give feedback once the background sort is done."""
         self.log_to_console(f"Sort operation completed for {len(moved_files)} files!", "SUCCESS")
+        self.export_metrics()
         QMessageBox.information(self, "Success", f"Successfully sorted {len(moved_files)} files!")
 
+    def export_metrics(self):
+        """Write the metrics files and log a run summary, if metrics are enabled."""
+        if not metrics.enabled():
+            return
+        data = metrics.export(self.config.get('metrics_json_file'), self.config.get('metrics_prometheus_file'))
+        for line in metrics.format_summary(data).splitlines():
+            self.log_to_console(line.strip(), "INFO")
+
+    def on_sort_error(self, message):
+        """Report a sort that failed as a whole."""
+        self.log_to_console(f"Sort operation failed: {message}", "ERROR")
+        QMessageBox.critical(self, "Error", f"Sort operation failed: {message}")
+
+
+    def recover_interrupted_sorts(self):
+        """Offer to finish or revert sorts that were cut short by a crash.
+
+        The chosen recoveries run one after another on a SortWorker, so a
+        large roll-forward does not freeze the window.
+        """
+        for journal in find_interrupted_sorts():
+            box = QMessageBox(self)
+            box.setIcon(QMessageBox.Icon.Warning)
+            box.setWindowTitle("Interrupted Sort")
+            box.setText(f"A previous sort did not finish: {journal.summary()}.")
+            box.setInformativeText("Finish the remaining moves, or move the sorted files back?")
+            forward_button = box.addButton("Roll Forward", QMessageBox.ButtonRole.AcceptRole)
+            back_button = box.addButton("Roll Back", QMessageBox.ButtonRole.DestructiveRole)
+            box.addButton("Later", QMessageBox.ButtonRole.RejectRole)
+            box.exec()
+
+            clicked = box.clickedButton()
+            if clicked is forward_button or clicked is back_button:
+                self.pending_recoveries.append((journal, clicked is back_button))
+            else:
+                self.log_to_console("Interrupted sort left for later", "WARNING")
+        self.run_next_recovery()
+
+    def run_next_recovery(self, *args):
+        """Start the next chosen roll-forward or roll-back, if any are left."""
+        if not self.pending_recoveries:
+            return
+        journal, roll_back = self.pending_recoveries.pop(0)
+        self.log_to_console(f"{'Rolling back' if roll_back else 'Finishing'} an interrupted sort...")
+        self.sort_worker = SortWorker(
+            [], journal.destination, log_sink=self.log_sink,
+            workers_per_device=self.config.get("move_workers_per_device", 4),
+            journal=journal, roll_back=roll_back
+        )
+        self.sort_worker.signals.batch.connect(self.on_sort_batch)
+        self.sort_worker.signals.log.connect(self.log_to_console)
+        self.sort_worker.signals.finished.connect(self.run_next_recovery)
+        self.sort_worker.signals.error.connect(self.on_sort_error)
+        self.sort_worker.start()
 
     def undo_last_operation(self):
         """Undo the last sort operation."""
-        success, message = undo_last_sort()
+        success, message = undo_last_sort(
+            workers_per_device=self.config.get("move_workers_per_device", 4)
+        )
         
         if success:
             self.log_to_console(message, "SUCCESS")
@@ -580,13 +1357,21 @@ class SmartFileSorter(QMainWindow):
         
         file_path, file_type = QFileDialog.getSaveFileName(
             self, "Export Report", f"sort_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}", 
-            "CSV Files (*.csv);;JSON Files (*.json)"
+            "CSV Files (*.csv);;JSON Files (*.json);;NDJSON Files (*.ndjson);;"
+            "Compressed NDJSON (*.ndjson.gz);;Category Summary (*.csv)"
         )
         
         if file_path:
             try:
-                report_type = 'csv' if 'csv' in file_type.lower() else 'json'
-                result_path = export_report(self.current_files, report_type, file_path)
+                file_type = file_type.lower()
+                summary = 'summary' in file_type
+                if 'ndjson' in file_type:
+                    report_type = 'ndjson'
+                    if 'compressed' in file_type and not file_path.endswith('.gz'):
+                        file_path += '.gz'
+                else:
+                    report_type = 'csv' if 'csv' in file_type else 'json'
+                result_path = export_report(self.current_files, report_type, file_path, summary=summary)
                 
                 if result_path:
                     self.log_to_console(f"Report exported to: {result_path}", "SUCCESS")
@@ -641,7 +1426,11 @@ class SmartFileSorter(QMainWindow):
         """Update UI elements from loaded configuration."""
         self.auto_watch_checkbox.setChecked(self.config.get('auto_watch', False))
         self.ai_sort_checkbox.setChecked(self.config.get('ai_sorting', False))
+        self.auto_sort_checkbox.setChecked(self.config.get('auto_sort', False))
+        self.duplicates_checkbox.setChecked(self.config.get('detect_duplicates', False))
+        self.duplicate_policy_combo.setCurrentText(self.config.get('duplicate_policy', 'skip'))
         self.update_excluded_extensions_list()
+        self.update_job_list()
 
     def format_file_size(self, size_bytes):
         """Format file size in human-readable format."""
@@ -656,12 +1445,24 @@ class SmartFileSorter(QMainWindow):
 
     def closeEvent(self, event):
         """Handle application closing."""
+        if self.scan_worker:
+            self.scan_worker.cancel()
+        if self.auto_sorter:
+            self.auto_sorter.stop()
         if self.directory_watcher:
             self.directory_watcher.stop_watching()
+        if self.scheduler:
+            self.scheduler.stop()
+        if self.job_queue_worker:
+            self.job_queue_worker.cancel()
         
         # Save current configuration
         save_config(self.config)
+        self.export_metrics()
         self.log_to_console("Application closing - configuration saved", "INFO")
+        self.console_timer.stop()
+        self.settings_timer.stop()
+        self.log_sink.close()
         event.accept()
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import time
+
+# Counter that measures the items handled by each stage, for the files-per-second figures
+STAGE_ITEMS = {
+    'scan': 'files_scanned',
+    'categorize': 'rule_lookups',
+    'ai_categorize': 'files_ai_categorized',
+    'move': 'files_moved',
+    'undo': 'files_restored',
+    'watcher_poll': 'watcher_files_polled',
+}
+
+PROMETHEUS_PREFIX = "file_sorter"
+
+# Instrumentation is off unless enable() is called. While it is off every
+# entry point returns after one global check, so the calls can stay in the
+# hot paths; per-file work is counted in local variables and reported once
+# per scan, batch or operation.
+_enabled = False
+_lock = threading.Lock()
+_stages = {}
+_counters = {}
+_started = time.time()
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def enabled():
+    return _enabled
+
+def reset():
+    """Forget every recorded timing and counter."""
+    global _started
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+        _started = time.time()
+
+def count(name, value=1):
+    """Add value to a counter."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def record_stage(stage, seconds, calls=1):
+    """Add time spent in a stage, e.g. when it was measured by hand."""
+    if not _enabled:
+        return
+    with _lock:
+        totals = _stages.setdefault(stage, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+        totals['calls'] += calls
+        totals['seconds'] += seconds
+        totals['max_seconds'] = max(totals['max_seconds'], seconds / calls if calls else seconds)
+
+def timer(stage):
+    """Context manager that adds its wall time to a stage."""
+    if not _enabled:
+        return _NULL_TIMER
+    return _StageTimer(stage)
+
+class _StageTimer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_stage(self.stage, time.perf_counter() - self.start)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+def snapshot():
+    """Return the stages, counters and per-stage throughput recorded so far."""
+    with _lock:
+        stages = {stage: dict(totals) for stage, totals in _stages.items()}
+        counters = dict(_counters)
+
+    for stage, totals in stages.items():
+        items = counters.get(STAGE_ITEMS.get(stage))
+        if items and totals['seconds'] > 0:
+            totals['items_per_second'] = round(items / totals['seconds'], 1)
+    return {
+        'started': _started,
+        'finished': time.time(),
+        'stages': stages,
+        'counters': counters,
+    }
+
+def format_summary(data=None):
+    """Human-readable run summary, one line per stage and counter."""
+    data = data or snapshot()
+    lines = [f"Run summary ({data['finished'] - data['started']:.1f} s)"]
+    for stage, totals in sorted(data['stages'].items()):
+        line = f"  {stage}: {totals['seconds']:.3f} s in {totals['calls']} call(s)"
+        if 'items_per_second' in totals:
+            line += f", {totals['items_per_second']:,.0f} items/s"
+        lines.append(line)
+    for name, value in sorted(data['counters'].items()):
+        lines.append(f"  {name}: {value:,}")
+    return "\n".join(lines)
+
+def write_json(path, data=None):
+    """Write the snapshot to a JSON file."""
+    _write_atomically(path, json.dumps(data or snapshot(), indent=2))
+
+def write_prometheus(path, data=None):
+    """Write the snapshot in the Prometheus text format.
+
+    The file is replaced atomically, as node_exporter's textfile collector
+    expects, so point path at a file in its --collector.textfile.directory.
+    """
+    data = data or snapshot()
+    p = PROMETHEUS_PREFIX
+    lines = [
+        f"# HELP {p}_stage_seconds_total Wall time spent in each stage.",
+        f"# TYPE {p}_stage_seconds_total counter",
+    ]
+    lines += [f'{p}_stage_seconds_total{{stage="{stage}"}} {totals["seconds"]:.6f}'
+              for stage, totals in sorted(data['stages'].items())]
+    lines += [
+        f"# HELP {p}_stage_calls_total Number of times each stage ran.",
+        f"# TYPE {p}_stage_calls_total counter",
+    ]
+    lines += [f'{p}_stage_calls_total{{stage="{stage}"}} {totals["calls"]}'
+              for stage, totals in sorted(data['stages'].items())]
+    lines += [
+        f"# HELP {p}_stage_items_per_second Items handled per second in each stage.",
+        f"# TYPE {p}_stage_items_per_second gauge",
+    ]
+    lines += [f'{p}_stage_items_per_second{{stage="{stage}"}} {totals["items_per_second"]}'
+              for stage, totals in sorted(data['stages'].items()) if 'items_per_second' in totals]
+    for name, value in sorted(data['counters'].items()):
+        lines.append(f"# TYPE {p}_{name}_total counter")
+        lines.append(f"{p}_{name}_total {value}")
+    lines += [
+        f"# HELP {p}_last_run_timestamp_seconds When these metrics were written.",
+        f"# TYPE {p}_last_run_timestamp_seconds gauge",
+        f"{p}_last_run_timestamp_seconds {data['finished']:.0f}",
+    ]
+    _write_atomically(path, "\n".join(lines) + "\n")
+
+def export(json_path=None, prometheus_path=None):
+    """Write whichever export files are configured; returns the snapshot."""
+    data = snapshot()
+    for path, writer in ((json_path, write_json), (prometheus_path, write_prometheus)):
+        if not path:
+            continue
+        try:
+            writer(path, data)
+        except OSError as e:
+            print(f"Error writing metrics to {path}: {e}")
+    return data
+
+def _write_atomically(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
@@ -0,0 +1,260 @@
+import errno
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metrics
+
+# Progress is reported after this many files or this many seconds, whichever comes first
+PROGRESS_BATCH_SIZE = 500
+PROGRESS_INTERVAL = 0.2
+
+def sort_files(file_records, destination_folder, on_progress=None, on_error=None, workers_per_device=4,
+               destinations=None):
+    """Move scanned files into per-category folders under destination_folder.
+
+    Moves are planned up front and grouped by the devices of the source and
+    destination folders:
+
+    - same-device moves are a plain os.rename, done in order on the calling
+      thread, with each category folder created only once,
+    - cross-device moves (a copy followed by a delete) run on a thread pool
+      per destination device, bounded by workers_per_device.
+
+    Callbacks are always invoked on the calling thread, in batches.
+
+    Args:
+        file_records (list): Records from file_sorter.scan_files.
+        destination_folder (str): Folder that receives one subfolder per category.
+        on_progress (callable): Called with (moved_records, done, total) for
+            each batch of successfully moved records.
+        on_error (callable): Called with a list of (record, exception) pairs.
+        workers_per_device (int): Concurrent cross-device copies per destination device.
+        destinations (list): Target path for each record, as from plan_destinations;
+            planned here if None.
+
+    Returns:
+        list: Moved files in the format expected by undo_manager.log_sort_operation,
+            in the same order as file_records.
+    """
+    with metrics.timer('move'):
+        if destinations is None:
+            destinations = plan_destinations(file_records, destination_folder)
+        reporter = _BatchReporter(len(file_records), on_progress, on_error)
+        indexes = _create_category_folders(file_records, destinations, reporter)
+        moved = {}
+
+        def finished(position, error):
+            index = indexes[position]
+            file_data = file_records[index]
+            if error is None:
+                moved[index] = _moved_entry(file_data, destinations[index])
+                reporter.moved(file_data)
+            else:
+                reporter.failed(file_data, error)
+
+        moves = [(file_records[index]['path'], destinations[index]) for index in indexes]
+        _run_moves(moves, workers_per_device, finished)
+
+        reporter.flush()
+
+    if metrics.enabled():
+        metrics.count('files_moved', len(moved))
+        metrics.count('bytes_moved', sum(file_records[index].get('size_bytes', 0) for index in moved))
+        metrics.count('move_errors', len(file_records) - len(moved))
+    return [moved[index] for index in sorted(moved)]
+
+def plan_destinations(file_records, destination_folder):
+    """The path each record will be moved to: destination_folder/category/name.
+
+    A name that is already taken in the category folder, or by an earlier
+    record in the same sort, gets a number: "report.txt", "report (2).txt",
+    ... so a sort never replaces an existing file. Each category folder is
+    listed once, not statted per file.
+    """
+    taken = {}
+    destinations = []
+    for file_data in file_records:
+        category_folder = os.path.join(destination_folder, file_data['category'])
+        names = taken.get(category_folder)
+        if names is None:
+            try:
+                names = set(os.listdir(category_folder))
+            except OSError:
+                names = set()
+            taken[category_folder] = names
+
+        name = file_data['name']
+        if name in names:
+            stem, ext = os.path.splitext(name)
+            number = 2
+            while f"{stem} ({number}){ext}" in names:
+                number += 1
+            name = f"{stem} ({number}){ext}"
+        names.add(name)
+        destinations.append(os.path.join(category_folder, name))
+    return destinations
+
+def move_paths(moves, workers_per_device=4):
+    """Move files between explicit paths, grouped by device like sort_files.
+
+    Same-device moves are renamed in order on the calling thread; cross-device
+    moves run on a bounded pool per destination device. Destination folders
+    must already exist.
+
+    Args:
+        moves (list): (source_path, destination_path) pairs.
+        workers_per_device (int): Concurrent cross-device copies per destination device.
+
+    Returns:
+        list: One entry per move, None if it succeeded or the exception if it failed.
+    """
+    errors = [None] * len(moves)
+
+    def finished(index, error):
+        errors[index] = error
+
+    _run_moves(moves, workers_per_device, finished)
+    return errors
+
+def _create_category_folders(file_records, destinations, reporter):
+    """Create each destination folder once; returns the indexes of the records that can be moved."""
+    created_folders = set()
+    indexes = []
+    for index, (file_data, destination_path) in enumerate(zip(file_records, destinations)):
+        category_folder = os.path.dirname(destination_path)
+        if category_folder not in created_folders:
+            try:
+                os.makedirs(category_folder, exist_ok=True)
+            except OSError as e:
+                reporter.failed(file_data, e)
+                continue
+            created_folders.add(category_folder)
+        indexes.append(index)
+    return indexes
+
+def _run_moves(moves, workers_per_device, on_done):
+    """Move (source_path, destination_path) pairs, split by device.
+
+    Same-device moves are renamed in order on the calling thread. Cross-device
+    moves (a copy followed by a delete) run on one bounded pool per
+    destination device. Device numbers are looked up once per folder, not
+    once per file. on_done(index, error) is called on the calling thread for
+    every move, with error None if it succeeded.
+    """
+    folder_devices = {}
+    cross_device = {}
+
+    def device_of(folder):
+        device = folder_devices.get(folder)
+        if device is None:
+            device = os.stat(folder).st_dev
+            folder_devices[folder] = device
+        return device
+
+    for index, (source_path, destination_path) in enumerate(moves):
+        try:
+            source_device = device_of(os.path.dirname(source_path))
+            destination_device = device_of(os.path.dirname(destination_path))
+        except OSError as e:
+            on_done(index, e)
+            continue
+
+        if source_device != destination_device:
+            cross_device.setdefault(destination_device, []).append((index, source_path, destination_path))
+            continue
+        try:
+            _rename(source_path, destination_path)
+        except Exception as e:
+            on_done(index, e)
+        else:
+            on_done(index, None)
+
+    pools = []
+    futures = []
+    try:
+        for device_moves in cross_device.values():
+            pool = ThreadPoolExecutor(max_workers=max(1, workers_per_device))
+            pools.append(pool)
+            futures.extend(pool.submit(_move_chain, chain) for chain in _chains_by_destination(device_moves))
+
+        for future in as_completed(futures):
+            for index, error in future.result():
+                on_done(index, error)
+    finally:
+        for pool in pools:
+            pool.shutdown(wait=True)
+
+def _rename(source_path, destination_path):
+    """Same-device move; falls back to shutil.move where a plain rename can't do it.
+
+    That covers a rename that crosses a mount after all and, on Windows, a
+    destination that already exists (which shutil.move overwrites).
+    """
+    try:
+        os.rename(source_path, destination_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV and not isinstance(e, FileExistsError):
+            raise
+        shutil.move(source_path, destination_path)
+
+def _chains_by_destination(moves):
+    """Group moves by destination path so files with the same name are written in order."""
+    chains = {}
+    for move in moves:
+        chains.setdefault(move[2], []).append(move)
+    return chains.values()
+
+def _move_chain(chain):
+    results = []
+    for index, source_path, destination_path in chain:
+        try:
+            shutil.move(source_path, destination_path)
+            results.append((index, None))
+        except Exception as e:
+            results.append((index, e))
+    return results
+
+def _moved_entry(file_data, destination_path):
+    return {
+        'original_path': file_data['path'],
+        'new_path': destination_path,
+        'category': file_data['category']
+    }
+
+class _BatchReporter:
+    """Collects per-file results and hands them to the callbacks in batches."""
+
+    def __init__(self, total, on_progress, on_error):
+        self.total = total
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.done = 0
+        self._moved = []
+        self._errors = []
+        self._last_flush = time.monotonic()
+
+    def moved(self, file_data):
+        self.done += 1
+        self._moved.append(file_data)
+        self._maybe_flush()
+
+    def failed(self, file_data, error):
+        self.done += 1
+        self._errors.append((file_data, error))
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        pending = len(self._moved) + len(self._errors)
+        if pending >= PROGRESS_BATCH_SIZE or time.monotonic() - self._last_flush >= PROGRESS_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        moved, self._moved = self._moved, []
+        errors, self._errors = self._errors, []
+        if errors and self.on_error:
+            self.on_error(errors)
+        if moved and self.on_progress:
+            self.on_progress(moved, self.done, self.total)
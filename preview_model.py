@@ -0,0 +1,129 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+# (header, record key, sort key)
+PREVIEW_COLUMNS = [
+    ("File Name", 'name', lambda f: f['name'].lower()),
+    ("Type", 'type', lambda f: f['type']),
+    ("Size", 'size', lambda f: f['size_bytes']),
+    ("Category", 'category', lambda f: f['category']),
+    ("Modified", 'modified', lambda f: f.mtime),
+    ("Path", 'path', lambda f: f['path']),
+    ("Duplicate Of", 'duplicate_of', lambda f: f.get('duplicate_of', '')),
+]
+
+class PreviewTableModel(QAbstractTableModel):
+    """Table model over the scan records, for a QTableView.
+
+    The view only asks for the rows it is showing, so no per-cell objects
+    are created and memory stays at one list entry per scanned file. Sorting
+    and filtering reorder a list of row numbers into the records; the
+    records themselves are never copied.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.records = []
+        self._rows = None  # Record index per visible row; None shows every record in order
+        self._filter_text = ""
+        self._sort_column = None
+        self._sort_order = Qt.SortOrder.AscendingOrder
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.records) if self._rows is None else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(PREVIEW_COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return self.record(index.row()).get(PREVIEW_COLUMNS[index.column()][1], '')
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return PREVIEW_COLUMNS[section][0]
+        return section + 1
+
+    def record(self, row):
+        """The scan record shown in a view row."""
+        return self.records[row if self._rows is None else self._rows[row]]
+
+    def record_count(self):
+        """Number of records, including those hidden by the filter."""
+        return len(self.records)
+
+    def clear(self):
+        """Remove every record; the sort column, order and filter stay set."""
+        self.set_records([])
+
+    def set_records(self, files):
+        """Replace every record, applying the current sort and filter."""
+        self.beginResetModel()
+        self.records = list(files)
+        self._rebuild_rows()
+        self.endResetModel()
+
+    def append_records(self, files):
+        """Add a batch of streamed scan records at the end of the view."""
+        if not files:
+            return
+        start = len(self.records)
+        if self._rows is None:
+            self.beginInsertRows(QModelIndex(), start, start + len(files) - 1)
+            self.records.extend(files)
+            self.endInsertRows()
+            return
+
+        # Filtered or sorted: new matches go at the end until the next sort
+        self.records.extend(files)
+        new_rows = [i for i in range(start, len(self.records)) if self._matches(self.records[i])]
+        if new_rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+            self._rows.extend(new_rows)
+            self.endInsertRows()
+
+    def refresh(self):
+        """Repaint after records were changed in place (e.g. marked as duplicates)."""
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1))
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self._sort_column = column if column >= 0 else None
+        self._sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        self._rebuild_rows()
+        self.layoutChanged.emit()
+
+    def set_filter(self, text):
+        """Show only records whose name, category or path contains text (case-insensitive)."""
+        self._filter_text = text.strip().lower()
+        self.beginResetModel()
+        self._rebuild_rows()
+        self.endResetModel()
+
+    def _matches(self, file_data):
+        text = self._filter_text
+        return (not text or text in file_data['name'].lower() or text in file_data['category'].lower()
+                or text in file_data['path'].lower())
+
+    def _rebuild_rows(self):
+        if self._filter_text:
+            rows = [i for i, file_data in enumerate(self.records) if self._matches(file_data)]
+        elif self._sort_column is not None:
+            rows = list(range(len(self.records)))
+        else:
+            self._rows = None
+            return
+
+        if self._sort_column is not None:
+            key = PREVIEW_COLUMNS[self._sort_column][2]
+            records = self.records
+            rows.sort(key=lambda i: key(records[i]), reverse=self._sort_order == Qt.SortOrder.DescendingOrder)
+        self._rows = rows
@@ -0,0 +1,118 @@
+import hashlib
+import json
+from collections.abc import Mapping
+
+# Key under which a trie node stores the (order, category) of a pattern ending there
+_END = None
+
+def compile_rules(rules):
+    """Compile a rules dict into a RuleIndex (returned as-is if already compiled)."""
+    if isinstance(rules, RuleIndex):
+        return rules
+    return RuleIndex(rules or {})
+
+class RuleIndex(Mapping):
+    """Custom rules compiled into lookup tables, built once per rules load.
+
+    Behaves like the read-only rules dict it was built from, so it can be
+    stored and passed around wherever the plain dict was used. Lookups cost
+    time proportional to the filename length, not to the number of rules:
+
+    - simple extensions such as ".pdf" live in a hash map,
+    - suffix patterns ("*_backup", ".tar.gz", "report.txt") live in a trie
+      keyed by the reversed pattern,
+    - name prefixes ("invoice", "IMG_") live in a prefix trie.
+
+    When several rules match, the one listed first in the rules file wins,
+    as it did with the old linear loops.
+    """
+
+    def __init__(self, rules):
+        self._rules = dict(rules)
+        self._version = None
+        self._extensions = {}
+        self._suffixes = {}
+        self._wildcard_suffixes = {}
+        self._prefixes = {}
+
+        for order, (pattern, category) in enumerate(self._rules.items()):
+            pattern_lower = pattern.lower()
+            if pattern_lower.startswith('*'):
+                body = pattern_lower[1:]
+                _trie_insert(self._suffixes, reversed(body), order, category)
+                _trie_insert(self._wildcard_suffixes, reversed(body), order, category)
+                continue
+
+            if _is_extension(pattern_lower):
+                self._extensions.setdefault(pattern_lower, (order, category))
+            else:
+                _trie_insert(self._suffixes, reversed(pattern_lower), order, category)
+            _trie_insert(self._prefixes, pattern_lower, order, category)
+
+    def __getitem__(self, pattern):
+        return self._rules[pattern]
+
+    def __iter__(self):
+        return iter(self._rules)
+
+    def __len__(self):
+        return len(self._rules)
+
+    @property
+    def version(self):
+        """Short hash of the rules and their order, for caching categories on disk."""
+        if self._version is None:
+            encoded = json.dumps(list(self._rules.items()), ensure_ascii=False).encode('utf-8')
+            self._version = hashlib.sha1(encoded).hexdigest()[:16]
+        return self._version
+
+    def match_suffix(self, filename, file_ext):
+        """Return the category of the first rule the filename ends with, or None.
+
+        This is the matching used by file_sorter: every pattern is a suffix
+        of the name (a leading "*" is optional), compared case-insensitively.
+        """
+        filename_lower = filename.lower()
+        best = self._extensions.get(file_ext.lower() or filename_lower)
+        best = _trie_walk(self._suffixes, reversed(filename_lower), best)
+        return best[1] if best else None
+
+    def match_name(self, file_name, file_ext):
+        """Return the category for rule_loader style matching, or None.
+
+        An exact extension key wins outright. Otherwise the first rule in
+        file order that matches applies: "*pattern" rules match the end of
+        the name and all other rules match its start.
+        """
+        if file_ext in self._rules:
+            return self._rules[file_ext]
+
+        file_name_lower = file_name.lower()
+        best = _trie_walk(self._wildcard_suffixes, reversed(file_name_lower), None)
+        best = _trie_walk(self._prefixes, file_name_lower, best)
+        return best[1] if best else None
+
+def _is_extension(pattern):
+    """True for single-dot extension patterns like ".pdf" (not ".tar.gz")."""
+    return len(pattern) > 1 and pattern[0] == '.' and '.' not in pattern[1:]
+
+def _trie_insert(trie, chars, order, category):
+    node = trie
+    for char in chars:
+        node = node.setdefault(char, {})
+    # Keep the earliest rule when two patterns differ only by case
+    if _END not in node:
+        node[_END] = (order, category)
+
+def _trie_walk(trie, chars, best):
+    """Follow chars through trie, returning the lowest-order match seen (or best)."""
+    chars = iter(chars)
+    node = trie
+    while True:
+        hit = node.get(_END)
+        if hit is not None and (best is None or hit[0] < best[0]):
+            best = hit
+        try:
+            node = node[next(chars)]
+        except (StopIteration, KeyError):
+            return best
@@ -1,10 +1,19 @@
 import json
 import os
 
+from config_cache import cached_file, write_json_atomically
+from rule_engine import compile_rules
+
+DEFAULT_RULES_FILE = 'custom_rules.json'
+
 def load_rules_from_json(rules_file=None):
-    """Load custom rules from a JSON file."""
+    """Load custom rules from a JSON file.
+
+    The file is parsed (and compiled) once and only read again after it
+    changes on disk; each call returns a fresh dict the caller may modify.
+    """
     if rules_file is None:
-        rules_file = 'custom_rules.json'
+        rules_file = DEFAULT_RULES_FILE
     
     if not os.path.exists(rules_file):
         # Create default rules file
@@ -19,43 +28,53 @@ def load_rules_from_json(rules_file=None):
         save_rules_to_json(default_rules, rules_file)
         return default_rules
     
-    try:
-        with open(rules_file, 'r') as file:
-            return json.load(file)
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error loading rules: {e}")
-        return {}
+    loaded = _rules_file(rules_file).get()
+    return dict(loaded[0]) if loaded is not None else {}
 
-def save_rules_to_json(rules, rules_file='custom_rules.json'):
+def save_rules_to_json(rules, rules_file=DEFAULT_RULES_FILE):
     """Save rules to a JSON file."""
+    rules = dict(rules)
     try:
-        with open(rules_file, 'w') as file:
-            json.dump(rules, file, indent=4)
+        write_json_atomically(rules_file, rules)
+        _rules_file(rules_file).prime((rules, compile_rules(rules)))
         return True
     except IOError as e:
         print(f"Error saving rules: {e}")
         return False
 
+def subscribe_rules(callback, rules_file=None):
+    """Call callback(compiled_rules) whenever the rules file is changed outside the app."""
+    _rules_file(rules_file or DEFAULT_RULES_FILE).subscribe(lambda loaded: callback(loaded[1]))
+
+def _rules_file(rules_file):
+    return cached_file(rules_file, _read_rules)
+
+def _read_rules(path):
+    # Parsed and compiled together, so both are swapped in at once
+    with open(path, 'r') as file:
+        rules = json.load(file)
+    return rules, compile_rules(rules)
+
 def load_rules(rules_file):
     """Legacy function for compatibility."""
     return load_rules_from_json(rules_file)
 
+def load_compiled_rules(rules_file=None):
+    """Load rules from a JSON file and compile them for fast matching.
+
+    The compiled rules are cached with the file, so this is cheap to call.
+    """
+    rules_file = rules_file or DEFAULT_RULES_FILE
+    if not os.path.exists(rules_file):
+        return compile_rules(load_rules_from_json(rules_file))
+    loaded = _rules_file(rules_file).get()
+    return loaded[1] if loaded is not None else compile_rules({})
+
 def categorize_file(file_name, rules):
-    """Categorize a file based on rules."""
+    """Categorize a file based on rules (a dict or a compiled RuleIndex)."""
     file_ext = os.path.splitext(file_name)[1].lower()
-    
-    # Check by extension first
-    if file_ext in rules:
-        return rules[file_ext]
-    
-    # Check by filename patterns
-    for pattern, category in rules.items():
-        if pattern.startswith('*') and file_name.lower().endswith(pattern[1:].lower()):
-            return category
-        elif file_name.lower().startswith(pattern.lower()):
-            return category
-    
-    return "Uncategorized"
+    category = compile_rules(rules).match_name(file_name, file_ext)
+    return category if category is not None else "Uncategorized"
 
 def manage_rules_ui():
     """Simple console-based rules management (can be expanded to GUI)."""
@@ -0,0 +1,175 @@
+import time
+from bisect import bisect_right
+from itertools import compress
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; plain Python gives the same results, only slower
+    np = None
+
+# (label, upper bound in bytes); the last bucket takes everything larger
+SIZE_BUCKETS = [
+    ("< 1 KB", 1024),
+    ("1 KB - 1 MB", 1024 ** 2),
+    ("1 MB - 100 MB", 100 * 1024 ** 2),
+    ("100 MB - 1 GB", 1024 ** 3),
+    ("> 1 GB", None),
+]
+
+# (label, upper bound in days since last modified)
+AGE_BUCKETS = [
+    ("< 1 day", 1),
+    ("< 1 week", 7),
+    ("< 1 month", 30),
+    ("< 1 year", 365),
+    ("Older", None),
+]
+
+class ScanColumns:
+    """Scan records laid out as columns, for fast re-filtering and statistics.
+
+    Sizes, modification times and category and extension codes are held in
+    NumPy arrays when NumPy is installed, so a filter change over millions of
+    files is a few vectorized comparisons instead of a walk of the tree or
+    a Python loop over the records. Without NumPy the same methods run on
+    plain lists.
+
+    The columns are a snapshot: build a new ScanColumns after records are
+    added or recategorized.
+    """
+
+    def __init__(self, records):
+        category_codes = {}
+        extension_codes = {}
+        categories = [category_codes.setdefault(r.category, len(category_codes)) for r in records]
+        extensions = [extension_codes.setdefault(r.ext.lower(), len(extension_codes)) for r in records]
+        self.categories = list(category_codes)
+        self.extensions = list(extension_codes)
+
+        if np is None:
+            self.records = records
+            self.sizes = [r.size_bytes for r in records]
+            self.mtimes = [r.mtime for r in records]
+            self.category_codes = categories
+            self.extension_codes = extensions
+            return
+
+        count = len(records)
+        self.records = np.empty(count, dtype=object)
+        self.records[:] = records
+        self.sizes = np.fromiter((r.size_bytes for r in records), dtype=np.int64, count=count)
+        self.mtimes = np.fromiter((r.mtime for r in records), dtype=np.float64, count=count)
+        self.category_codes = np.array(categories, dtype=np.int32)
+        self.extension_codes = np.array(extensions, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def mask(self, filters):
+        """Which records pass the size, date and extension filters.
+
+        Args:
+            filters (dict): Same keys as the scan_files filters; 'min_size',
+                'max_size', 'cutoff_date' and 'excluded_extensions' are used.
+
+        Returns:
+            A boolean NumPy array, or a list of bools without NumPy.
+        """
+        min_size = filters.get('min_size', 0)
+        max_size = filters.get('max_size', float('inf'))
+        cutoff_date = filters.get('cutoff_date', None)
+        cutoff_time = time.mktime(cutoff_date.timetuple()) if cutoff_date else None
+        excluded = {ext.lower() for ext in filters.get('excluded_extensions', [])}
+        excluded_codes = [code for code, ext in enumerate(self.extensions) if ext and ext in excluded]
+
+        if np is None:
+            excluded_codes = set(excluded_codes)
+            return [
+                min_size <= size <= max_size
+                and (cutoff_time is None or mtime <= cutoff_time)
+                and code not in excluded_codes
+                for size, mtime, code in zip(self.sizes, self.mtimes, self.extension_codes)
+            ]
+
+        keep = self.sizes >= min_size
+        if max_size != float('inf'):
+            keep &= self.sizes <= max_size
+        if cutoff_time is not None:
+            keep &= self.mtimes <= cutoff_time
+        if excluded_codes:
+            keep &= ~np.isin(self.extension_codes, excluded_codes)
+        return keep
+
+    def select(self, mask=None):
+        """The records where mask is true (all of them without a mask), in scan order."""
+        if mask is None:
+            return list(self.records)
+        if np is None:
+            return list(compress(self.records, mask))
+        return self.records[mask].tolist()
+
+    def category_totals(self, mask=None):
+        """Files and bytes per category.
+
+        Returns:
+            dict: category -> {'files': int, 'bytes': int}, for categories with files.
+        """
+        codes, sizes = self._columns(mask, self.category_codes, self.sizes)
+        if np is None:
+            files = [0] * len(self.categories)
+            total_bytes = [0] * len(self.categories)
+            for code, size in zip(codes, sizes):
+                files[code] += 1
+                total_bytes[code] += size
+        else:
+            files = np.bincount(codes, minlength=len(self.categories)).tolist()
+            total_bytes = np.bincount(codes, weights=sizes, minlength=len(self.categories)).astype(np.int64).tolist()
+        return {
+            category: {'files': files[code], 'bytes': total_bytes[code]}
+            for code, category in enumerate(self.categories) if files[code]
+        }
+
+    def size_histogram(self, mask=None):
+        """Number of files in each SIZE_BUCKETS bucket, by label."""
+        sizes, = self._columns(mask, self.sizes)
+        return self._histogram(sizes, SIZE_BUCKETS)
+
+    def age_buckets(self, mask=None, now=None):
+        """Number of files in each AGE_BUCKETS bucket, by label."""
+        mtimes, = self._columns(mask, self.mtimes)
+        now = time.time() if now is None else now
+        if np is None:
+            ages = [(now - mtime) / 86400 for mtime in mtimes]
+        else:
+            ages = (now - mtimes) / 86400
+        return self._histogram(ages, AGE_BUCKETS)
+
+    def summary(self, mask=None):
+        """Totals, per-category figures and both histograms for the selected records."""
+        sizes, = self._columns(mask, self.sizes)
+        return {
+            'files': len(sizes),
+            'bytes': int(sum(sizes)) if np is None else int(sizes.sum()),
+            'categories': self.category_totals(mask),
+            'size_histogram': self.size_histogram(mask),
+            'age_buckets': self.age_buckets(mask),
+        }
+
+    def _columns(self, mask, *columns):
+        if mask is None:
+            return columns
+        if np is None:
+            return tuple(list(compress(column, mask)) for column in columns)
+        return tuple(column[mask] for column in columns)
+
+    @staticmethod
+    def _histogram(values, buckets):
+        labels = [label for label, upper in buckets]
+        edges = [upper for label, upper in buckets[:-1]]
+        if np is None:
+            counts = [0] * len(buckets)
+            for value in values:
+                counts[bisect_right(edges, value)] += 1
+        else:
+            counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(buckets)).tolist()
+        return dict(zip(labels, counts))
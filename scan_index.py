@@ -0,0 +1,272 @@
+import os
+import sqlite3
+import time
+
+from file_sorter import ScanFilter, categorize_file, file_extension, make_file_record
+
+SCAN_INDEX_FILE = "scan_index.db"
+
+# Bump when the built-in categorization changes so stored categories are recomputed
+CATEGORY_SCHEME_VERSION = 1
+
+# A directory modified this recently may change again within the same mtime
+# tick, so it is not trusted as unchanged on the next scan
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+# Commit the index every this many directories so a cancelled scan keeps its progress
+COMMIT_EVERY_DIRS = 500
+
+# Several sorts (GUI, scheduler, job queue, CLI) may share the index; a
+# writer waits this many seconds for another one instead of failing
+BUSY_TIMEOUT = 30
+
+# Bump when the tables change; an older index is dropped and rebuilt
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER,
+    position INTEGER
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+CREATE TABLE IF NOT EXISTS files (
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    inode INTEGER,
+    size INTEGER,
+    mtime_ns INTEGER,
+    category TEXT,
+    rules_version TEXT,
+    position INTEGER,
+    PRIMARY KEY (dir, name)
+) WITHOUT ROWID;
+"""
+
+class ScanIndex:
+    """On-disk SQLite index of scanned files, used to make rescans incremental.
+
+    Every file is stored with its inode, size, mtime and computed category,
+    tagged with the version of the rule set that produced the category. Each
+    directory is stored with its own mtime. On a rescan:
+
+    - a directory whose mtime has not changed is not listed or statted at
+      all; its files and subfolders come straight from the index,
+    - in a changed directory only new or changed files are recategorized,
+    - stored categories from an older rule set are recomputed.
+
+    Editing a file in place does not change its directory's mtime, so such
+    edits are only seen by a full rescan (iter_scan(..., full=True)).
+
+    Each entry's position in its directory listing is stored too, so the
+    records come out in the same order, with the same paths, as from the
+    plain walker.
+    """
+
+    def __init__(self, index_path=SCAN_INDEX_FILE):
+        self.index_path = index_path
+        self.last_stats = {}
+
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path, timeout=BUSY_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # The index is only a cache, so an old layout is simply rebuilt
+            conn.executescript(f"DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS dirs; "
+                               f"PRAGMA user_version = {SCHEMA_VERSION};")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def clear(self):
+        """Forget everything in the index."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM files")
+            conn.execute("DELETE FROM dirs")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def iter_scan(self, source_path, recursive, filters, full=False):
+        """Yield the same records as file_sorter.iter_scan_files, using the index.
+
+        Args:
+            source_path (str): Path to the source folder.
+            recursive (bool): Whether to scan subfolders.
+            filters (dict): Filters for date, size, and excluded extensions.
+            full (bool): List every directory even if its mtime is unchanged.
+        """
+        scan_filter = ScanFilter(filters)
+        rules = scan_filter.rules
+        rules_version = f"{CATEGORY_SCHEME_VERSION}:{rules.version}"
+        trusted_before_ns = time.time_ns() - RACY_WINDOW_NS
+        stats = {'dirs_skipped': 0, 'dirs_scanned': 0, 'dirs_failed': 0, 'files_categorized': 0}
+        self.last_stats = stats
+
+        # The index is keyed by absolute paths; records use the path as given
+        root = os.path.abspath(source_path)
+
+        conn = self._connect()
+        try:
+            stack = [root]
+            while stack:
+                dirpath = stack.pop()
+                try:
+                    dir_mtime_ns = os.stat(dirpath).st_mtime_ns
+                except OSError:
+                    _forget_tree(conn, dirpath)
+                    continue
+
+                row = conn.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (dirpath,)).fetchone()
+                if not full and row is not None and row[0] == dir_mtime_ns:
+                    stats['dirs_skipped'] += 1
+                    files, subdirs = _load_directory(conn, dirpath)
+                else:
+                    listing = _refresh_directory(conn, dirpath)
+                    if listing is None:
+                        # Unreadable directories are skipped, as os.walk does.
+                        # Its rows stay, and without a new mtime it is listed again next time.
+                        stats['dirs_failed'] += 1
+                        continue
+                    stats['dirs_scanned'] += 1
+                    files, subdirs = listing
+                    mtime_to_store = dir_mtime_ns if dir_mtime_ns < trusted_before_ns else None
+                    conn.execute(
+                        "INSERT INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?) "
+                        "ON CONFLICT (path) DO UPDATE SET mtime_ns = excluded.mtime_ns",
+                        (dirpath, os.path.dirname(dirpath), mtime_to_store)
+                    )
+
+                if dirpath == root:
+                    shown_path = source_path
+                else:
+                    shown_path = os.path.join(source_path, os.path.relpath(dirpath, root))
+                updates = []
+                for name, inode, size, mtime_ns, category, version, position in files:
+                    if scan_filter.is_excluded(name):
+                        continue
+
+                    file_ext = file_extension(name).lower()
+                    if version != rules_version:
+                        category = categorize_file(name, file_ext, rules)
+                        updates.append((category, rules_version, dirpath, name))
+
+                    mtime = mtime_ns / 1e9
+                    if scan_filter.accepts(size, mtime):
+                        yield make_file_record(name, os.path.join(shown_path, name), file_ext, size, mtime, category)
+
+                if updates:
+                    stats['files_categorized'] += len(updates)
+                    conn.executemany(
+                        "UPDATE files SET category = ?, rules_version = ? WHERE dir = ? AND name = ?",
+                        updates
+                    )
+
+                if (stats['dirs_skipped'] + stats['dirs_scanned']) % COMMIT_EVERY_DIRS == 0:
+                    conn.commit()
+
+                if recursive:
+                    # Push in reverse so subfolders are visited in order
+                    stack.extend(reversed(subdirs))
+        finally:
+            conn.commit()
+            conn.close()
+
+def _load_directory(conn, dirpath):
+    """Return the stored files and subfolders of an unchanged directory, in listing order."""
+    files = conn.execute(
+        "SELECT name, inode, size, mtime_ns, category, rules_version, position FROM files "
+        "WHERE dir = ? ORDER BY position",
+        (dirpath,)
+    ).fetchall()
+    subdirs = [r[0] for r in conn.execute(
+        "SELECT path FROM dirs WHERE parent = ? ORDER BY position", (dirpath,)
+    )]
+    return files, subdirs
+
+def _refresh_directory(conn, dirpath):
+    """List a changed directory and bring its rows in the index up to date.
+
+    Files whose inode, size and mtime match the index keep their stored
+    category and rule-set version; new or changed files get an empty
+    version so the caller recategorizes them. Returns None, leaving the
+    index untouched, if the directory can't be listed.
+    """
+    known_files = {
+        r[0]: r for r in conn.execute(
+            "SELECT name, inode, size, mtime_ns, category, rules_version, position FROM files WHERE dir = ?",
+            (dirpath,)
+        )
+    }
+    known_subdirs = {r[0] for r in conn.execute("SELECT path FROM dirs WHERE parent = ?", (dirpath,))}
+
+    files = []
+    subdirs = []
+    changed = []
+    moved = []
+    try:
+        with os.scandir(dirpath) as entries:
+            for position, entry in enumerate(entries):
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if is_dir:
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                    continue
+
+                try:
+                    stat = entry.stat()
+                except OSError as e:
+                    print(f"Error processing {entry.path}: {e}")
+                    continue
+
+                known = known_files.pop(entry.name, None)
+                if known is not None and known[1:4] == (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+                    if known[6] != position:
+                        known = known[:6] + (position,)
+                        moved.append((position, dirpath, entry.name))
+                    files.append(known)
+                    continue
+
+                row = (entry.name, stat.st_ino, stat.st_size, stat.st_mtime_ns, None, '', position)
+                files.append(row)
+                changed.append(row)
+    except OSError:
+        return None
+
+    if changed:
+        conn.executemany(
+            "INSERT OR REPLACE INTO files (dir, name, inode, size, mtime_ns, category, rules_version, position) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(dirpath,) + row for row in changed]
+        )
+    if moved:
+        conn.executemany("UPDATE files SET position = ? WHERE dir = ? AND name = ?", moved)
+    if known_files:
+        conn.executemany(
+            "DELETE FROM files WHERE dir = ? AND name = ?",
+            [(dirpath, name) for name in known_files]
+        )
+
+    for subdir in known_subdirs.difference(subdirs):
+        _forget_tree(conn, subdir)
+    # New subfolders get a row without an mtime so they are listed when visited
+    conn.executemany(
+        "INSERT INTO dirs (path, parent, mtime_ns, position) VALUES (?, ?, NULL, ?) "
+        "ON CONFLICT (path) DO UPDATE SET position = excluded.position",
+        [(subdir, dirpath, position) for position, subdir in enumerate(subdirs)]
+    )
+    return files, subdirs
+
+def _forget_tree(conn, dirpath):
+    """Remove a directory and everything below it from the index."""
+    # Every path below dirpath sorts between "dirpath/" and "dirpath0"
+    low = dirpath.rstrip(os.sep) + os.sep
+    high = dirpath.rstrip(os.sep) + chr(ord(os.sep) + 1)
+    conn.execute("DELETE FROM files WHERE dir = ? OR (dir >= ? AND dir < ?)", (dirpath, low, high))
+    conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (dirpath, low, high))
@@ -0,0 +1,415 @@
+"""Runs scheduled sort jobs in the background, in the GUI or headless.
+
+A job is a dict stored under "scheduled_jobs" in the config:
+
+    {
+        "id": "downloads",
+        "name": "Tidy Downloads",
+        "source": "~/Downloads",
+        "destination": "~/Sorted",
+        "recursive": true,
+        "frequency": "Daily",          # Hourly, Daily, Weekly, Monthly or a cron expression
+        "start": "2024-05-01T09:00",   # first run; later runs keep its time of day
+        "ai_sorting": false,
+        "enabled": true
+    }
+
+Jobs take the same other fields as job_queue jobs (rules_file, filters, ...).
+
+Scheduled runs scan through the scan index (scan_index.py), so a run over
+a folder that has not changed only stats its directories. Runs that were
+missed while the computer slept or the app was closed are coalesced into
+one run, and a job is never started while its previous run is still going,
+in this process or another one. Every run is appended to the history file
+with its timings and counts.
+"""
+import calendar
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta, time as clock_time
+
+from job_queue import run_sort_job
+from lock_file import acquire_lock, release_lock
+
+SCHEDULE_HISTORY_FILE = "schedule_history.jsonl"
+
+FREQUENCIES = ("Hourly", "Daily", "Weekly", "Monthly")
+
+# Longest the scheduler sleeps between checks. Sleep timers do not run while
+# the computer is suspended, so this bounds how late a run is after wake-up.
+CHECK_INTERVAL = 30.0
+
+# History lines kept when the file is compacted
+MAX_HISTORY_ENTRIES = 1000
+
+_INTERVALS = {
+    "Hourly": timedelta(hours=1),
+    "Daily": timedelta(days=1),
+    "Weekly": timedelta(weeks=1),
+}
+
+class IntervalSchedule:
+    """Hourly, Daily, Weekly or Monthly runs counted from a start time."""
+
+    def __init__(self, frequency, start):
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Unknown frequency: {frequency}")
+        self.frequency = frequency
+        self.start = start
+
+    def first_run(self, now):
+        return self.start
+
+    def next_after(self, moment):
+        """The first run strictly after moment."""
+        if moment < self.start:
+            return self.start
+        if self.frequency == "Monthly":
+            months = (moment.year - self.start.year) * 12 + moment.month - self.start.month
+            count = max(months - 1, 0)
+            while True:
+                candidate = _add_months(self.start, count)
+                if candidate > moment:
+                    return candidate
+                count += 1
+        step = _INTERVALS[self.frequency]
+        return self.start + step * ((moment - self.start) // step + 1)
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day-of-month month day-of-week.
+
+    Fields take *, numbers, ranges (1-5), lists (1,15) and steps (*/15, 8-18/2).
+    Day of week runs from 0 (Sunday) to 6, with 7 also meaning Sunday. As in
+    cron, when both day fields are restricted a day matching either one runs.
+    """
+
+    _RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        self.expression = expression
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        fields = [_parse_cron_field(part, low, high) for part, (low, high) in zip(parts, self._RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    def first_run(self, now):
+        return self.next_after(now)
+
+    def next_after(self, moment):
+        """The first run strictly after moment."""
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for offset in range(5 * 366):
+            day = start.date() + timedelta(days=offset)
+            if not self._day_matches(day):
+                continue
+            for hour in self.hours:
+                if offset == 0 and hour < start.hour:
+                    continue
+                for minute in self.minutes:
+                    if offset == 0 and hour == start.hour and minute < start.minute:
+                        continue
+                    return datetime.combine(day, clock_time(hour, minute))
+        raise ValueError(f"Cron expression never runs: {self.expression!r}")
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        day_ok = day.day in self.days
+        weekday_ok = day.isoweekday() % 7 in self.weekdays
+        if self.any_day and self.any_weekday:
+            return True
+        if self.any_day:
+            return weekday_ok
+        if self.any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+def make_schedule(job):
+    """Build the schedule for a job's 'frequency' (and 'start') settings."""
+    frequency = job.get('frequency', 'Daily')
+    if frequency in FREQUENCIES:
+        start = job.get('start')
+        start = datetime.fromisoformat(start) if start else datetime.now().replace(second=0, microsecond=0)
+        return IntervalSchedule(frequency, start)
+    return CronSchedule(frequency)
+
+def run_scheduled_job(job):
+    """Run one scheduled job; scheduled runs scan through the scan index unless the job sets "incremental": false."""
+    return run_sort_job(job, incremental=job.get('incremental', True))
+
+class Scheduler:
+    """Starts each enabled job when it is due, on a background thread.
+
+    The check loop wakes up when the next job is due (and at least every
+    CHECK_INTERVAL seconds) and compares against the wall clock, so runs
+    missed during sleep are noticed right after wake-up. However many runs
+    were missed, the job runs once and its next run is the next one after
+    now; the number of skipped runs is kept in the history.
+    """
+
+    def __init__(self, jobs, history_file=SCHEDULE_HISTORY_FILE, log=None, on_finished=None, run_job=run_scheduled_job):
+        """
+        Args:
+            jobs (list): Job dicts (see the module docstring).
+            history_file (str): JSON lines file with one entry per run.
+            log (callable): Called with (message, level) for progress messages.
+            on_finished (callable): Called with the history entry of each run.
+            run_job (callable): Runs one job and returns counts for its history entry.
+        """
+        self.history_file = history_file
+        self.log = log or (lambda message, level="INFO": print(f"{level}: {message}"))
+        self.on_finished = on_finished
+        self.run_job = run_job
+        self.running = False
+        self._jobs = {}
+        self._schedules = {}
+        self._next_due = {}
+        self._active = set()
+        self._threads = []
+        self._history_lines = 0
+        self._last_runs = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.set_jobs(jobs)
+
+    def set_jobs(self, jobs):
+        """Replace the job list; next runs continue from each job's history."""
+        last_slots = self._last_slots()
+        schedules = {}
+        next_due = {}
+        now = datetime.now()
+        for job in jobs:
+            if not job.get('enabled', True):
+                continue
+            try:
+                schedule = make_schedule(job)
+            except ValueError as e:
+                self.log(f"Scheduled job {job.get('name', job['id'])} not started: {e}", "ERROR")
+                continue
+            schedules[job['id']] = schedule
+            last_slot = last_slots.get(job['id'])
+            next_due[job['id']] = schedule.next_after(last_slot) if last_slot else schedule.first_run(now)
+
+        with self._lock:
+            self._jobs = {job['id']: job for job in jobs if job['id'] in schedules}
+            self._schedules = schedules
+            self._next_due = next_due
+        self._wake.set()
+
+    def jobs(self):
+        return list(self._jobs.values())
+
+    def next_run(self, job_id):
+        return self._next_due.get(job_id)
+
+    def last_run(self, job_id):
+        """History entry of the job's latest run, or None."""
+        return self._last_runs.get(job_id)
+
+    def is_active(self, job_id):
+        return job_id in self._active
+
+    def start(self):
+        if self.running:
+            return False
+        self.running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def run_due(self, wait=True):
+        """Start every job that is due now; with wait, return once they have finished."""
+        now = datetime.now()
+        for job_id, due in list(self._next_due.items()):
+            if due <= now:
+                self._start_due(job_id, due, now)
+        if wait:
+            self.wait()
+
+    def run_now(self, job_id):
+        """Run a job right away, outside its schedule. False if it is already running."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        return self._start(job, slot=None, missed=0)
+
+    def wait(self):
+        """Block until every run started so far has finished."""
+        for thread in list(self._threads):
+            thread.join()
+
+    def history(self, job_id=None, limit=None):
+        """Past runs, oldest first, optionally for one job and only the last limit entries."""
+        entries = [entry for entry in load_history(self.history_file) if job_id is None or entry.get('job') == job_id]
+        return entries[-limit:] if limit else entries
+
+    def _loop(self):
+        while self.running:
+            self.run_due(wait=False)
+            now = datetime.now()
+            waits = [(due - now).total_seconds() for due in self._next_due.values()]
+            self._wake.wait(max(0.5, min(waits + [CHECK_INTERVAL])))
+            self._wake.clear()
+
+    def _start_due(self, job_id, due, now):
+        schedule = self._schedules.get(job_id)
+        job = self._jobs.get(job_id)
+        if schedule is None or job is None:  # Removed by set_jobs meanwhile
+            return
+        # Coalesce: count the runs that were missed and run only once, for the latest
+        slot = due
+        missed = 0
+        while missed < 10000:
+            following = schedule.next_after(slot)
+            if following > now:
+                break
+            slot = following
+            missed += 1
+        self._next_due[job_id] = schedule.next_after(now)
+
+        if missed:
+            self.log(f"Scheduled job {job.get('name', job_id)}: {missed} missed run(s) coalesced into one", "WARNING")
+        if not self._start(job, slot, missed):
+            self.log(f"Scheduled job {job.get('name', job_id)} is still running; skipping this run", "WARNING")
+
+    def _start(self, job, slot, missed):
+        with self._lock:
+            if job['id'] in self._active:
+                return False
+            self._active.add(job['id'])
+        thread = threading.Thread(target=self._run, args=(job, slot, missed), daemon=True)
+        self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+        thread.start()
+        return True
+
+    def _run(self, job, slot, missed):
+        name = job.get('name', job['id'])
+        lock_path = self._lock_path(job['id'])
+        if not acquire_lock(lock_path):
+            self._active.discard(job['id'])
+            self.log(f"Scheduled job {name} is already running in another process; skipping", "WARNING")
+            return
+
+        started = datetime.now()
+        start = time.perf_counter()
+        self.log(f"Scheduled job {name} started")
+        try:
+            result = self.run_job(job)
+            status = "ok" if not result.get('failed') else "errors"
+        except Exception as e:
+            result = {'error': str(e)}
+            status = "failed"
+        finally:
+            release_lock(lock_path)
+            self._active.discard(job['id'])
+
+        entry = {
+            'job': job['id'],
+            'slot': slot.isoformat(timespec='minutes') if slot else None,
+            'started': started.isoformat(timespec='seconds'),
+            'seconds': round(time.perf_counter() - start, 3),
+            'missed_runs': missed,
+            'status': status,
+        }
+        entry.update(result)
+        self._append_history(entry)
+
+        if status == "failed":
+            self.log(f"Scheduled job {name} failed: {result['error']}", "ERROR")
+        else:
+            self.log(f"Scheduled job {name} finished in {entry['seconds']:.2f} s: "
+                     f"{result.get('moved', 0)} moved, {result.get('failed', 0)} failed",
+                     "SUCCESS" if status == "ok" else "WARNING")
+        if self.on_finished:
+            self.on_finished(entry)
+
+    def _last_slots(self):
+        last_slots = {}
+        entries = load_history(self.history_file)
+        self._history_lines = len(entries)
+        for entry in entries:
+            self._last_runs[entry.get('job')] = entry
+            if entry.get('slot'):
+                last_slots[entry['job']] = datetime.fromisoformat(entry['slot'])
+        return last_slots
+
+    def _append_history(self, entry):
+        with self._lock:
+            try:
+                with open(self.history_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + "\n")
+                self._last_runs[entry['job']] = entry
+                self._history_lines += 1
+                if self._history_lines > 2 * MAX_HISTORY_ENTRIES:
+                    self._compact_history()
+            except OSError as e:
+                print(f"Error writing schedule history: {e}")
+
+    def _compact_history(self):
+        entries = load_history(self.history_file)[-MAX_HISTORY_ENTRIES:]
+        temp_path = f"{self.history_file}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in entries)
+        os.replace(temp_path, self.history_file)
+        self._history_lines = len(entries)
+
+    def _lock_path(self, job_id):
+        folder = os.path.dirname(os.path.abspath(self.history_file))
+        return os.path.join(folder, f".schedule_{re.sub(r'[^A-Za-z0-9_-]', '_', str(job_id))}.lock")
+
+def load_history(history_file=SCHEDULE_HISTORY_FILE):
+    """All history entries in the file, oldest first; unreadable lines are skipped."""
+    entries = []
+    try:
+        with open(history_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Error reading schedule history: {e}")
+    return entries
+
+def _parse_cron_field(text, low, high):
+    values = set()
+    for item in text.split(','):
+        step = 1
+        if '/' in item:
+            item, step_text = item.split('/', 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Bad step in cron field {text!r}")
+        if item == '*':
+            start, end = low, high
+        elif '-' in item:
+            start, end = (int(part) for part in item.split('-', 1))
+        else:
+            start = int(item)
+            end = high if step > 1 else start
+        if not (low <= start <= end <= high):
+            raise ValueError(f"Cron field {text!r} is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+def _add_months(moment, months):
+    years, month_index = divmod(moment.month - 1 + months, 12)
+    year = moment.year + years
+    month = month_index + 1
+    return moment.replace(year=year, month=month, day=min(moment.day, calendar.monthrange(year, month)[1]))
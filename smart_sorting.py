@@ -1,72 +1,182 @@
 import os
 import re
-from pathlib import Path
 
-def smart_categorize(file_path):
-    """Smart categorization using file content analysis and naming patterns."""
+import metrics
+
+from content_sniffer import needs_sniffing, sniff_file_type, sniff_file_types
+
+# Filename keywords checked by smart_categorize, in priority order: when a name
+# contains keywords from several categories, the category listed first wins.
+# Extra keywords and categories can be added through the "smart_keywords"
+# config entry (see build_keyword_matcher).
+DEFAULT_KEYWORD_CATEGORIES = [
+    ("Projects", ['project', 'assignment', 'homework', 'thesis']),
+    ("Screenshots", ['screenshot', 'screen shot', 'capture']),
+    ("Downloads", ['download', 'temp', 'tmp']),
+    ("Work Documents", ['resume', 'cv', 'invoice', 'contract', 'report']),
+    ("Personal", ['personal', 'family', 'vacation', 'trip']),
+]
+
+DATE_PATTERN = re.compile(r'\d{4}[-_]\d{2}[-_]\d{2}')
+
+EXTENSION_CATEGORIES = {}
+for _category, _extensions in (
+    ('images', ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp']),
+    ('videos', ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v']),
+    ('audio', ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a']),
+    ('documents', ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt', '.xls', '.xlsx', '.ppt', '.pptx']),
+    ('archives', ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2']),
+    ('code', ['.py', '.js', '.html', '.css', '.cpp', '.java', '.c', '.h', '.json', '.xml']),
+):
+    for _ext in _extensions:
+        EXTENSION_CATEGORIES.setdefault(_ext, _category.title())
+
+class KeywordMatcher:
+    """All keyword categories compiled into one regular expression.
+
+    Each category is a capture group inside a lookahead, so a single
+    finditer pass visits every position of the name once and reports the
+    highest-priority category whose keyword starts there. Overlapping
+    keywords are therefore handled the same way as checking each category
+    in turn.
+    """
+
+    def __init__(self, keyword_categories):
+        self.categories = []
+        groups = []
+        for category, keywords in keyword_categories:
+            keywords = [k.lower() for k in keywords if k]
+            if not keywords:
+                continue
+            # Longest first so a keyword never hides a longer one at the same spot
+            keywords.sort(key=len, reverse=True)
+            groups.append('(' + '|'.join(re.escape(k) for k in keywords) + ')')
+            self.categories.append(category)
+        self.pattern = re.compile('(?=' + '|'.join(groups) + ')') if groups else None
+
+    def match(self, filename_lower):
+        """Return the highest-priority category whose keyword occurs in the name, or None."""
+        if self.pattern is None:
+            return None
+        best = None
+        for m in self.pattern.finditer(filename_lower):
+            index = m.lastindex - 1
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return self.categories[best] if best is not None else None
+
+def build_keyword_matcher(extra_keywords=None):
+    """Build a KeywordMatcher from the defaults plus user keywords.
+
+    Args:
+        extra_keywords (dict): Category -> list of keywords. Keywords for an
+            existing category are added to it; new categories are checked
+            after the built-in ones, in the order given.
+    """
+    merged = [(category, list(keywords)) for category, keywords in DEFAULT_KEYWORD_CATEGORIES]
+    index = {category: keywords for category, keywords in merged}
+    for category, keywords in (extra_keywords or {}).items():
+        if category in index:
+            index[category].extend(keywords)
+        else:
+            index[category] = list(keywords)
+            merged.append((category, index[category]))
+    return KeywordMatcher(merged)
+
+_default_matcher = build_keyword_matcher()
+
+def smart_categorize(file_path, file_size=None, matcher=None):
+    """Smart categorization using file content analysis and naming patterns.
+
+    Pass file_size when it is already known (e.g. from a scan record) to
+    avoid statting the file again.
+    """
     filename = os.path.basename(file_path)
-    file_ext = Path(filename).suffix.lower()
-    
+    category = _categorize_name(filename, file_path, file_size, matcher or _default_matcher)
+    # Unknown or ambiguous extension: fall back to the file's content
+    if category == "Other" and needs_sniffing(_extension(filename), EXTENSION_CATEGORIES):
+        category = analyze_file_content(file_path) or category
+    return category
+
+def smart_categorize_batch(file_records, matcher=None):
+    """Smart-categorize scan records.
+
+    Only files that end up in "Other" with an unknown or ambiguous extension
+    are read, all together on a bounded thread pool (see content_sniffer).
+
+    Args:
+        file_records (list): Records from file_sorter.scan_files; the 'name',
+            'path' and 'size_bytes' fields are used.
+        matcher (KeywordMatcher): Keyword matcher to use, defaults to the
+            built-in keyword sets.
+
+    Returns:
+        list: One category per record, in the same order.
+    """
+    matcher = matcher or _default_matcher
+    with metrics.timer('ai_categorize'):
+        categories = [
+            _categorize_name(record['name'], record['path'], record['size_bytes'], matcher)
+            for record in file_records
+        ]
+
+        # Names that said nothing useful: look at the content, all in one go
+        unknown = [
+            index for index, category in enumerate(categories)
+            if category == "Other" and needs_sniffing(_extension(file_records[index]['name']), EXTENSION_CATEGORIES)
+        ]
+        if unknown:
+            detected = sniff_file_types([file_records[index]['path'] for index in unknown])
+            for index, detected_ext in zip(unknown, detected):
+                if detected_ext:
+                    categories[index] = categorize_by_extension(detected_ext)
+    metrics.count('files_ai_categorized', len(file_records))
+    return categories
+
+def _extension(filename):
+    # Same result as Path(filename).suffix.lower(), without building a Path
+    dot = filename.rfind('.')
+    return filename[dot:].lower() if 0 < dot < len(filename) - 1 else ''
+
+def _categorize_name(filename, file_path, file_size, matcher):
+    file_ext = _extension(filename)
+
     # Analyze filename patterns
-    filename_lower = filename.lower()
-    
-    # Project files
-    if any(pattern in filename_lower for pattern in ['project', 'assignment', 'homework', 'thesis']):
-        return "Projects"
-    
-    # Screenshots
-    if any(pattern in filename_lower for pattern in ['screenshot', 'screen shot', 'capture']):
-        return "Screenshots"
-    
-    # Downloads
-    if any(pattern in filename_lower for pattern in ['download', 'temp', 'tmp']):
-        return "Downloads"
-    
-    # Work documents
-    if any(pattern in filename_lower for pattern in ['resume', 'cv', 'invoice', 'contract', 'report']):
-        return "Work Documents"
-    
-    # Personal
-    if any(pattern in filename_lower for pattern in ['personal', 'family', 'vacation', 'trip']):
-        return "Personal"
-    
+    category = matcher.match(filename.lower())
+    if category is not None:
+        return category
+
     # Date-based categorization
-    date_pattern = r'\d{4}[-_]\d{2}[-_]\d{2}'
-    if re.search(date_pattern, filename):
+    if DATE_PATTERN.search(filename):
         return "Dated Files"
-    
+
     # Size-based categorization for media
-    try:
-        file_size = os.path.getsize(file_path)
-        if file_ext in ['.jpg', '.png', '.gif'] and file_size > 5 * 1024 * 1024:  # > 5MB
+    if file_ext in ('.jpg', '.png', '.gif', '.mp4', '.avi', '.mkv'):
+        if file_size is None:
+            try:
+                file_size = os.path.getsize(file_path)
+            except OSError:
+                file_size = 0
+        if file_ext in ('.jpg', '.png', '.gif') and file_size > 5 * 1024 * 1024:  # > 5MB
             return "High Quality Images"
-        elif file_ext in ['.mp4', '.avi', '.mkv'] and file_size > 100 * 1024 * 1024:  # > 100MB
+        elif file_ext in ('.mp4', '.avi', '.mkv') and file_size > 100 * 1024 * 1024:  # > 100MB
             return "HD Videos"
-    except OSError:
-        pass
-    
+
     # Default to basic categorization
     return categorize_by_extension(file_ext)
 
 def categorize_by_extension(file_ext):
     """Basic categorization by file extension."""
-    categories = {
-        'images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp'],
-        'videos': ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v'],
-        'audio': ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a'],
-        'documents': ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt', '.xls', '.xlsx', '.ppt', '.pptx'],
-        'archives': ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2'],
-        'code': ['.py', '.js', '.html', '.css', '.cpp', '.java', '.c', '.h', '.json', '.xml']
-    }
-    
-    for category, extensions in categories.items():
-        if file_ext in extensions:
-            return category.title()
-    
-    return "Other"
+    return EXTENSION_CATEGORIES.get(file_ext, "Other")
 
 def analyze_file_content(file_path):
-    """Analyze file content for better categorization (placeholder for future ML integration)."""
-    # This could be expanded to use machine learning models
-    # to analyze file content, image recognition, document classification, etc.
-    return None
\ No newline at end of file
+    """Categorize a file by its content (magic bytes), or None if it isn't recognized.
+
+    Reads at most the first few KiB, once per unchanged file (see content_sniffer).
+    """
+    detected_ext = sniff_file_type(file_path)
+    if detected_ext is None:
+        return None
+    return categorize_by_extension(detected_ext)
\ No newline at end of file
@@ -0,0 +1,379 @@
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+
+from lock_file import acquire_lock, lock_is_stale, release_lock
+from move_engine import plan_destinations, sort_files
+from undo_manager import get_undo_history, log_sort_operation, restore_files
+
+SORT_JOURNAL_DIR = "sort_journal"
+
+# Completion markers are fsync'd in batches, not once per file
+FSYNC_EVERY_FILES = 1000
+FSYNC_INTERVAL = 1.0
+
+# Each sort gets its own write-ahead journal file in SORT_JOURNAL_DIR, one
+# JSON object per line:
+#   {"type": "begin", "id": ..., "timestamp": ..., "destination": ..., "moves": [...]}
+#   {"type": "done", "indexes": [...]}   moves that have completed
+# The begin record is fsync'd before the first file moves. The file is
+# deleted once the sort has been logged for undo.
+#
+# While a sort runs, <id>.lock next to its journal holds the owner's PID
+# (see lock_file.py). Sorts from the GUI, the auto-sorter, the scheduler,
+# the job queue and CLI processes can run at the same time, so a journal is
+# only taken as interrupted when its lock is gone or its owner has died.
+#
+# Recovery trusts the done markers first: a marked move is complete even if
+# a new file has since appeared at its original path. Moves after the last
+# fsync are judged from the filesystem.
+
+def journaled_sort(file_records, destination_folder, on_progress=None, on_error=None, workers_per_device=4):
+    """Run move_engine.sort_files under a write-ahead journal and log it for undo.
+
+    Takes the same arguments as move_engine.sort_files and returns the moved
+    files. If the process dies part way through, find_interrupted_sorts()
+    reports the operation on the next start so it can be rolled forward or back.
+    """
+    journal = SortJournal.begin(file_records, destination_folder)
+    indexes = {id(file_data): index for index, file_data in enumerate(file_records)}
+
+    def progress(moved, done, total):
+        journal.mark_done(indexes[id(file_data)] for file_data in moved)
+        if on_progress:
+            on_progress(moved, done, total)
+
+    try:
+        moved_files = sort_files(
+            file_records, destination_folder,
+            on_progress=progress, on_error=on_error, workers_per_device=workers_per_device,
+            destinations=[move['new_path'] for move in journal.moves]
+        )
+        journal.sync()
+        log_sort_operation(moved_files, operation_id=journal.operation_id)
+    except BaseException:
+        # Unlocked, the journal now shows up in find_interrupted_sorts()
+        journal.sync()
+        journal.close()
+        raise
+    journal.remove()
+    return moved_files
+
+class SortJournal:
+    """Write-ahead journal of one sort operation."""
+
+    def __init__(self, path, operation_id, destination, moves, done=None):
+        self.path = path
+        self.operation_id = operation_id
+        self.destination = destination
+        self.moves = moves
+        self.done = set(done or ())
+        self.lock_path = os.path.splitext(path)[0] + ".lock"
+        self._locked = False
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @classmethod
+    def begin(cls, file_records, destination_folder):
+        """Record the planned moves and fsync them before anything is moved."""
+        os.makedirs(SORT_JOURNAL_DIR, exist_ok=True)
+        operation_id = uuid.uuid4().hex
+        moves = [
+            {
+                'original_path': file_data['path'],
+                'new_path': new_path,
+                'category': file_data['category']
+            }
+            for file_data, new_path in zip(file_records, plan_destinations(file_records, destination_folder))
+        ]
+        journal = cls(os.path.join(SORT_JOURNAL_DIR, f"{operation_id}.jsonl"), operation_id,
+                      destination_folder, moves)
+        # Locked before the journal exists, so it is never seen unowned
+        if not journal.claim():
+            raise OSError(f"Could not lock sort journal {journal.path}")
+        journal._file = open(journal.path, 'a', encoding='utf-8')
+        journal._write({
+            "type": "begin",
+            "id": operation_id,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "destination": destination_folder,
+            "moves": moves
+        })
+        journal.sync()
+        _fsync_directory(SORT_JOURNAL_DIR)
+        return journal
+
+    @classmethod
+    def load(cls, path):
+        """Read a journal left behind by an interrupted sort; None if unreadable."""
+        begin = None
+        done = set()
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn last line from the crash
+                    continue
+                if record.get("type") == "begin":
+                    begin = record
+                elif record.get("type") == "done":
+                    done.update(record.get("indexes", []))
+        if begin is None:
+            return None
+        return cls(path, begin["id"], begin.get("destination", ""), begin.get("moves", []), done)
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')) + "\n")
+
+    def mark_done(self, indexes):
+        """Append a completion marker; fsync'd once enough files or time have accumulated."""
+        indexes = list(indexes)
+        if not indexes:
+            return
+        self.done.update(indexes)
+        self._write({"type": "done", "indexes": indexes})
+        self._unsynced += len(indexes)
+        if self._unsynced >= FSYNC_EVERY_FILES or time.monotonic() - self._last_sync >= FSYNC_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def claim(self):
+        """Take the journal's lock; False if another live process or sort holds it."""
+        if not self._locked:
+            self._locked = acquire_lock(self.lock_path)
+        return self._locked
+
+    def close(self):
+        """Close the journal file and release its lock, leaving the journal in place."""
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self._locked:
+            release_lock(self.lock_path)
+            self._locked = False
+
+    def remove(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Could not remove sort journal {self.path}: {e}")
+        self.close()
+
+    def completed_moves(self):
+        """Moves that actually happened.
+
+        A move with a done marker is complete. The markers may trail the last
+        fsync, so an unmarked move also counts when its file is at the new
+        path and no longer at the original one.
+        """
+        return [
+            move for index, move in enumerate(self.moves)
+            if index in self.done
+            or (os.path.exists(move['new_path']) and not os.path.exists(move['original_path']))
+        ]
+
+    def pending_moves(self):
+        """Unmarked moves whose file is still at its original path."""
+        return [
+            move for index, move in enumerate(self.moves)
+            if index not in self.done and os.path.exists(move['original_path'])
+        ]
+
+    def partial_copies(self):
+        """New paths left by cross-device moves that were cut short.
+
+        A cross-device move copies the file and then deletes the original,
+        so an unmarked move whose file exists at both paths may have stopped
+        before the delete, with the copy incomplete. The original is intact.
+        """
+        return [move['new_path'] for move in self._unresolved_moves() if _is_partial_copy(move)]
+
+    def kept_copies(self):
+        """New paths of unmarked moves that exist at both paths but are not partial copies.
+
+        A same-device rename that finished after the last fsync, with a new
+        file since created at the original path, looks like this; so does a
+        cross-device copy that completed before the original was deleted.
+        The file at the new path may be the only sorted copy, so recovery
+        leaves both paths alone.
+        """
+        return [move['new_path'] for move in self._unresolved_moves() if not _is_partial_copy(move)]
+
+    def _unresolved_moves(self):
+        return [move for move in self.pending_moves() if os.path.exists(move['new_path'])]
+
+    def _remove_partial_copies(self):
+        """Delete partial copies and report the files left at both paths.
+
+        Returns:
+            set: New paths of the moves left for the user to check.
+        """
+        for path in self.partial_copies():
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Could not remove partial copy {path}: {e}")
+        kept = self.kept_copies()
+        for path in kept:
+            print(f"Left {path} in place: a file also exists at its original path.")
+        return set(kept)
+
+    def touches(self, source, destination):
+        """True if this sort moved files out of source or into destination."""
+        source = os.path.abspath(source) + os.sep
+        destination = os.path.abspath(destination) + os.sep
+        return any(
+            os.path.abspath(move['original_path']).startswith(source)
+            or os.path.abspath(move['new_path']).startswith(destination)
+            for move in self.moves
+        )
+
+    def summary(self):
+        return (f"{len(self.completed_moves())} of {len(self.moves)} files were moved "
+                f"into {self.destination}")
+
+    def roll_forward(self, on_progress=None, on_error=None, workers_per_device=4):
+        """Finish the remaining moves and log the whole operation for undo."""
+        if not self.claim():
+            return False, "This sort is being finished by another process."
+        try:
+            return self._roll_forward(on_progress, on_error, workers_per_device)
+        finally:
+            self.close()
+
+    def _roll_forward(self, on_progress, on_error, workers_per_device):
+        kept = self._remove_partial_copies()
+        completed = self.completed_moves()
+        # Moving over a kept copy could overwrite the only sorted file
+        pending = [move for move in self.pending_moves() if move['new_path'] not in kept]
+        records = [
+            {
+                'name': os.path.basename(move['new_path']),
+                'path': move['original_path'],
+                'category': move['category']
+            }
+            for move in pending
+        ]
+        # Keep the planned names; the journal already promised them to undo
+        moved_now = sort_files(records, self.destination, on_progress=on_progress, on_error=on_error,
+                               workers_per_device=workers_per_device,
+                               destinations=[move['new_path'] for move in pending])
+        moved_files = completed + moved_now
+        if not _is_logged(self.operation_id):
+            log_sort_operation(moved_files, operation_id=self.operation_id)
+        self.remove()
+        message = f"Finished the interrupted sort: {len(moved_files)} of {len(self.moves)} files sorted."
+        if kept:
+            message += f" {len(kept)} files exist at both paths and were left in place."
+        return True, message
+
+    def roll_back(self, workers_per_device=4):
+        """Move the files that were already sorted back to where they came from."""
+        if not self.claim():
+            return False, "This sort is being handled by another process."
+        try:
+            kept = self._remove_partial_copies()
+            note = f" {len(kept)} files exist at both paths and were left in place." if kept else ""
+            completed = self.completed_moves()
+            if not completed:
+                self.remove()
+                return True, "Nothing had been moved yet; the interrupted sort was discarded." + note
+            success, message = restore_files(completed, workers_per_device=workers_per_device)
+            if success:
+                self.remove()
+            return success, message + note
+        finally:
+            self.close()
+
+def find_interrupted_sorts():
+    """Return SortJournal objects for sorts that did not finish, oldest first.
+
+    Sorts still running, in this process or another one, are left out.
+    """
+    if not os.path.isdir(SORT_JOURNAL_DIR):
+        return []
+
+    journals = []
+    names = set(os.listdir(SORT_JOURNAL_DIR))
+    for name in sorted(names):
+        stem, ext = os.path.splitext(name)
+        path = os.path.join(SORT_JOURNAL_DIR, name)
+        if ext == ".lock":
+            # A sort that died between taking its lock and writing its journal
+            if stem + ".jsonl" not in names and lock_is_stale(path):
+                release_lock(path)
+            continue
+        if ext != ".jsonl" or _is_running(path):
+            continue
+        try:
+            journal = SortJournal.load(path)
+        except OSError as e:
+            print(f"Could not read sort journal {path}: {e}")
+            continue
+        if journal is None:
+            # Crashed before the plan was written; nothing was moved
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        if _is_logged(journal.operation_id):
+            # Crashed after logging for undo but before cleaning up
+            if journal.claim():
+                journal.remove()
+            continue
+        journals.append(journal)
+
+    journals.sort(key=lambda journal: os.path.getmtime(journal.path))
+    return journals
+
+def _is_running(journal_path):
+    lock_path = os.path.splitext(journal_path)[0] + ".lock"
+    return os.path.exists(lock_path) and not lock_is_stale(lock_path)
+
+def _is_partial_copy(move):
+    """True if a move crossed devices and its copy does not match the original.
+
+    shutil.move copies with copy2, so a finished copy has the original's
+    size and modification time.
+    """
+    try:
+        source = os.stat(move['original_path'])
+        copy = os.stat(move['new_path'])
+        destination_dev = os.stat(os.path.dirname(os.path.abspath(move['new_path']))).st_dev
+    except OSError:
+        return False
+    if source.st_dev == destination_dev:
+        return False
+    return copy.st_size != source.st_size or int(copy.st_mtime) != int(source.st_mtime)
+
+def _is_logged(operation_id):
+    return any(operation.get("id") == operation_id for operation in get_undo_history())
+
+def _fsync_directory(path):
+    """Make a newly created journal file's directory entry durable (POSIX only)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,32 @@
+import os
+
+from duplicate_finder import apply_duplicate_policy, find_duplicates
+from file_sorter import scan_files
+from sort_journal import journaled_sort
+from undo_manager import undo_last_sort
+
+def test_quarantine_keeps_every_same_name_duplicate(tmp_path, monkeypatch):
+    # The undo and sort journals are written to the working directory
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "s"
+    for folder in ("a", "b", "c"):
+        (source / folder).mkdir(parents=True)
+        (source / folder / "r.txt").write_text("same content")
+    destination = tmp_path / "d"
+
+    files = scan_files(str(source), True, {})
+    find_duplicates(files)
+    to_move, left_in_place = apply_duplicate_policy(files, 'quarantine')
+    moved = journaled_sort(to_move, str(destination))
+
+    assert left_in_place == []
+    assert len(moved) == 3
+    new_paths = [entry['new_path'] for entry in moved]
+    assert len(set(new_paths)) == 3
+    assert all(os.path.exists(path) for path in new_paths)
+    assert sorted(os.listdir(destination / "Duplicates")) == ["r (2).txt", "r.txt"]
+
+    success, message = undo_last_sort()
+    assert success, message
+    for folder in ("a", "b", "c"):
+        assert (source / folder / "r.txt").read_text() == "same content"
@@ -1,27 +1,209 @@
+import errno
 import json
 import os
 import shutil
+import threading
+import uuid
 from datetime import datetime
 
-UNDO_LOG_FILE = "undo_log.json"
+import metrics
+from move_engine import move_paths
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+UNDO_JOURNAL_FILE = "undo_log.jsonl"
+UNDO_LOG_FILE = "undo_log.json"  # Legacy format, migrated into the journal on first use
+UNDO_LOCK_FILE = UNDO_JOURNAL_FILE + ".lock"
 MAX_UNDO_HISTORY = 5  # Keep track of the last 5 sort operations
+COMPACT_EVERY = 50  # Rewrite the journal after this many appends from this process
 
-def _load_undo_log():
-    """Loads the undo history from the log file."""
-    if os.path.exists(UNDO_LOG_FILE):
-        with open(UNDO_LOG_FILE, 'r') as f:
+_READ_BLOCK_SIZE = 64 * 1024
+_appends_since_compaction = 0
+
+class _JournalLock:
+    """Serialises journal changes between threads and between processes.
+
+    The auto-sorter and a manual sort can log from different threads at
+    once, and the GUI, the CLI and scheduled jobs from different processes.
+    Other processes are kept out with an OS lock on UNDO_LOCK_FILE, held
+    while any thread here is inside; nesting in one thread is allowed.
+    """
+
+    def __init__(self):
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._file = open(UNDO_LOCK_FILE, 'a+b')
+                _lock_file(self._file)
+            except BaseException:
+                if self._file:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if self._depth == 0:
             try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return []
-    return []
+                _unlock_file(self._file)
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
+
+def _lock_file(file):
+    if fcntl:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        return
+    file.seek(0)
+    while True:
+        try:
+            # Blocks for up to 10 seconds per attempt
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+def _unlock_file(file):
+    if fcntl:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+_journal_lock = _JournalLock()
+
+# The journal has one JSON object per line, oldest first:
+#   {"type": "sort", "id": ..., "timestamp": ..., "files": [...]}  a completed sort
+#   {"type": "undo", "id": ...}                                     that sort was undone
+# Appending is O(1), and the latest operations are read by scanning
+# backwards from the end of the file, so neither depends on history size.
 
-def _save_undo_log(log_entries):
-    """Saves the undo history to the log file."""
-    with open(UNDO_LOG_FILE, 'w') as f:
-        json.dump(log_entries, f, indent=4)
+def _migrate_legacy_log():
+    """Convert an old undo_log.json (one JSON array) into the line journal."""
+    if os.path.exists(UNDO_JOURNAL_FILE) or not os.path.exists(UNDO_LOG_FILE):
+        return
+
+    try:
+        with open(UNDO_LOG_FILE, 'r') as f:
+            legacy_entries = json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Could not migrate {UNDO_LOG_FILE}: {e}")
+        legacy_entries = []
+
+    with open(UNDO_JOURNAL_FILE, 'w') as f:
+        for entry in legacy_entries[-MAX_UNDO_HISTORY:]:
+            record = {
+                "type": "sort",
+                "id": uuid.uuid4().hex,
+                "timestamp": entry.get("timestamp", ""),
+                # Some older logs used "files_moved" for the file list
+                "files": entry.get("files", entry.get("files_moved", []))
+            }
+            f.write(json.dumps(record, separators=(',', ':')) + "\n")
+
+    os.replace(UNDO_LOG_FILE, UNDO_LOG_FILE + ".migrated")
+    print(f"Migrated {len(legacy_entries)} undo operation(s) to {UNDO_JOURNAL_FILE}")
+
+def _append_journal(record):
+    """Append one record to the journal, compacting it every COMPACT_EVERY appends."""
+    global _appends_since_compaction
+    line = json.dumps(record, separators=(',', ':')) + "\n"
+    with _journal_lock:
+        _migrate_legacy_log()
+        with open(UNDO_JOURNAL_FILE, 'a+b') as f:
+            # A crash mid-append can leave a partial last line; start a fresh one
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = "\n" + line
+            f.write(line.encode('utf-8'))
+
+        _appends_since_compaction += 1
+        if _appends_since_compaction >= COMPACT_EVERY:
+            compact_undo_journal()
+
+def _iter_journal_reversed():
+    """Yield the journal's records from newest to oldest, skipping damaged lines."""
+    if not os.path.exists(UNDO_JOURNAL_FILE):
+        return
 
-def log_sort_operation(moved_files):
+    with open(UNDO_JOURNAL_FILE, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            read_size = min(_READ_BLOCK_SIZE, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size) + remainder
+            lines = block.split(b"\n")
+            # The first piece may be the tail of a line that starts in an earlier block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                record = _parse_line(line)
+                if record is not None:
+                    yield record
+        record = _parse_line(remainder)
+        if record is not None:
+            yield record
+
+def _parse_line(line):
+    if not line.strip():
+        return None
+    try:
+        return json.loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+def get_undo_history(limit=MAX_UNDO_HISTORY):
+    """Return the newest sort operations that can still be undone, newest first.
+
+    Only the last MAX_UNDO_HISTORY sorts are undoable, as before; sorts that
+    were already undone are skipped.
+    """
+    _migrate_legacy_log()
+    undone = set()
+    operations = []
+    sorts_seen = 0
+    for record in _iter_journal_reversed():
+        if record.get("type") == "undo":
+            undone.add(record.get("id"))
+        elif record.get("type") == "sort":
+            sorts_seen += 1
+            if record.get("id") not in undone:
+                operations.append(record)
+            if sorts_seen >= MAX_UNDO_HISTORY or len(operations) >= limit:
+                break
+    return operations
+
+def compact_undo_journal():
+    """Rewrite the journal keeping only the operations that can still be undone."""
+    global _appends_since_compaction
+    with _journal_lock:
+        _appends_since_compaction = 0
+        if not os.path.exists(UNDO_JOURNAL_FILE):
+            return
+
+        operations = list(reversed(get_undo_history()))
+        temp_file = UNDO_JOURNAL_FILE + ".tmp"
+        with open(temp_file, 'w') as f:
+            for record in operations:
+                f.write(json.dumps(record, separators=(',', ':')) + "\n")
+        os.replace(temp_file, UNDO_JOURNAL_FILE)
+
+def log_sort_operation(moved_files, operation_id=None):
     """
     Logs a completed sort operation for potential undo.
 
@@ -31,47 +213,69 @@ def log_sort_operation(moved_files):
                             - 'original_path': The file's path before moving.
                             - 'new_path': The file's path after moving.
                             - 'category': The category it was moved into (for context/deletion of empty dirs).
+        operation_id (str): Optional id for the operation, e.g. the id of its
+                            write-ahead sort journal. A random one is used otherwise.
     """
     if not moved_files:
         return
 
-    undo_log = _load_undo_log()
-
     # Add a timestamp to the operation
     operation_record = {
+        "type": "sort",
+        "id": operation_id or uuid.uuid4().hex,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "files": moved_files
     }
-    undo_log.append(operation_record)
-
-    # Keep only the latest MAX_UNDO_HISTORY operations
-    if len(undo_log) > MAX_UNDO_HISTORY:
-        undo_log = undo_log[-MAX_UNDO_HISTORY:]
-
-    _save_undo_log(undo_log)
+    with metrics.timer('undo_log_write'):
+        _append_journal(operation_record)
     print(f"Logged sort operation with {len(moved_files)} files for undo.")
 
-def undo_last_sort():
+def undo_last_sort(workers_per_device=4):
     """
     Undoes the last logged file sorting operation.
 
+    Args:
+        workers_per_device (int): Concurrent cross-device copies per device.
+
     Returns:
         tuple: (success, message) where success is a boolean and message is a string.
     """
-    undo_log = _load_undo_log()
+    # Held until the files are back, so two processes can't undo the same sort
+    with _journal_lock:
+        history = get_undo_history(limit=1)
+
+        if not history:
+            return False, "No previous sort operations to undo."
 
-    if not undo_log:
-        return False, "No previous sort operations to undo."
+        last_operation = history[0]
+        # Remove it from the undoable history
+        _append_journal({"type": "undo", "id": last_operation.get("id")})
 
-    last_operation = undo_log.pop()  # Get the last operation and remove it from history
-    _save_undo_log(undo_log) # Save the updated log
+        files_to_undo = last_operation.get("files", [])
+        if not files_to_undo:
+            return False, "The last operation record was empty."
 
-    files_to_undo = last_operation.get("files", [])
-    if not files_to_undo:
-        return False, "The last operation record was empty."
+        return restore_files(files_to_undo, workers_per_device=workers_per_device)
 
+def restore_files(files_to_undo, workers_per_device=4):
+    """
+    Moves files back to where they were before a sort.
+
+    Same-device files are renamed back in bulk and cross-device files are
+    copied back on a worker pool (see move_engine.move_paths). Category
+    folders left empty are removed once at the end.
+
+    Args:
+        files_to_undo (list): Moved-file dictionaries as passed to log_sort_operation.
+        workers_per_device (int): Concurrent cross-device copies per device.
+
+    Returns:
+        tuple: (success, message) where success is a boolean and message is a string.
+    """
     successful_undos = 0
     failed_undos = []
+    moves = []
+    folder_refcounts = {}
 
     for file_data in reversed(files_to_undo): # Undo in reverse order of moving
         original_path = file_data.get('original_path')
@@ -85,24 +289,35 @@ def undo_last_sort():
             failed_undos.append(f"File not found at new path: {new_path}")
             continue
 
-        try:
-            shutil.move(new_path, original_path)
+        moves.append((new_path, original_path))
+        # Number of files this undo takes out of each category folder
+        category_folder = os.path.dirname(new_path)
+        folder_refcounts[category_folder] = folder_refcounts.get(category_folder, 0) + 1
+
+    with metrics.timer('undo'):
+        errors = move_paths(moves, workers_per_device=workers_per_device)
+    for (new_path, original_path), error in zip(moves, errors):
+        if error is None:
             successful_undos += 1
+            folder_refcounts[os.path.dirname(new_path)] -= 1
+        else:
+            failed_undos.append(f"Failed to move '{new_path}' back to '{original_path}': {error}")
+    metrics.count('files_restored', successful_undos)
+    metrics.count('undo_errors', len(failed_undos))
 
-            # Attempt to remove the now empty directory if it was created for the category
-            # This is a bit more complex as the original category folder might contain other files
-            # A safer approach is to only remove if it's truly empty AND was created by this sort.
-            # For simplicity, we'll try to remove if it's empty after the move.
-            category_folder = os.path.dirname(new_path)
-            if os.path.exists(category_folder) and not os.listdir(category_folder):
-                try:
-                    os.rmdir(category_folder)
-                    print(f"Removed empty category folder: {category_folder}")
-                except OSError as e:
-                    print(f"Could not remove empty directory {category_folder}: {e}")
-
-        except Exception as e:
-            failed_undos.append(f"Failed to move '{new_path}' back to '{original_path}': {e}")
+    # Once every file this sort put in a category folder is back, try to
+    # remove the folder. rmdir refuses folders that still hold other files.
+    for category_folder, remaining in folder_refcounts.items():
+        if remaining:
+            continue
+        try:
+            os.rmdir(category_folder)
+            print(f"Removed empty category folder: {category_folder}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                print(f"Could not remove empty directory {category_folder}: {e}")
 
     message = f"Successfully undid {successful_undos} file(s)."
     if failed_undos:
@@ -173,6 +388,6 @@ if __name__ == "__main__":
         shutil.rmtree(test_source_dir)
     if os.path.exists(test_dest_dir):
         shutil.rmtree(test_dest_dir)
-    if os.path.exists(UNDO_LOG_FILE):
-        os.remove(UNDO_LOG_FILE)
+    if os.path.exists(UNDO_JOURNAL_FILE):
+        os.remove(UNDO_JOURNAL_FILE)
     print("Cleanup complete.")
\ No newline at end of file